@@ -1,37 +1,35 @@
 # backend/ai.py
 import os
 import json
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Protocol
 from dotenv import load_dotenv
-import google.generativeai as genai
+from .explanation_cache import ExplanationCache
 from .schemas import AIExplanation
+from .tokenizers import get_tokenizer
 
 # Load environment variables from .env file
 load_dotenv()
 
 # --- Gemini API Configuration ---
-api_key = os.getenv("GOOGLE_API_KEY")
-if not api_key:
-    raise ValueError("GOOGLE_API_KEY environment variable not set.")
-genai.configure(api_key=api_key)
+GEMINI_MODEL_NAME = 'gemini-1.5-flash-latest'
 
-# --- In-Memory Cache ---
-explanation_cache = {}
+# Maximum number of explanation requests in flight to the provider at once (per worker)
+MAX_CONCURRENT_REQUESTS = int(os.getenv("AI_MAX_CONCURRENT_REQUESTS", "8"))
+# Maximum number of words explained by a single multi-word prompt
+BATCH_PROMPT_SIZE = int(os.getenv("AI_BATCH_PROMPT_SIZE", "20"))
 
-def get_ai_explanation(word: str, context: str, language: str) -> AIExplanation:
-    """
-    Gets a detailed, AI-powered explanation for a word, using a cache and robust error handling.
-    """
-    cache_key = f"{language}:{word.lower()}"
+# --- Two-Tier Explanation Cache ---
+CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "10000"))
+CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", str(30 * 24 * 3600)))
+# When enabled, the same word in different sentences gets its own explanation.
+CACHE_CONTEXT_SENSITIVE = os.getenv("AI_CACHE_CONTEXT_SENSITIVE", "false").lower() == "true"
 
-    if cache_key in explanation_cache:
-        print(f"CACHE HIT: Returning cached explanation for '{word}'.")
-        return explanation_cache[cache_key]
+explanation_cache = ExplanationCache(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS)
 
-    print(f"CACHE MISS: Fetching new explanation for '{word}' from Gemini API.")
-    
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
 
-    prompt = f"""
+def build_prompt(word: str, context: str, language: str) -> str:
+    return f"""
     You are an expert linguistic assistant. The user is reading a text in "{language}" and has clicked on the word "{word}".
     The surrounding context is: "{context}"
 
@@ -39,38 +37,301 @@ def get_ai_explanation(word: str, context: str, language: str) -> AIExplanation:
     Do not include any text or markdown outside of the single, valid JSON object.
     """
 
-    try:
-        response = model.generate_content(prompt)
-        
-        # --- NEW: Clean the response text before parsing ---
-        # The API sometimes wraps the JSON in ```json ... ``` which breaks parsing.
-        # This removes the wrapping markdown and any leading/trailing whitespace.
-        cleaned_text = response.text.strip().replace('```json', '').replace('```', '').strip()
 
-        if not cleaned_text:
-            # This can happen if the API's safety filters block the response.
-            print("ERROR: Gemini API returned an empty response after cleaning.")
-            print(f"Prompt Feedback: {response.prompt_feedback}")
-            raise ValueError("Empty response from API, likely due to content filtering.")
+def build_batch_prompt(words: List[str], context: str, language: str) -> str:
+    return f"""
+    You are an expert linguistic assistant. The user is reading a text in "{language}".
+    The surrounding context is: "{context}"
+
+    Explain each of these words as used in that context: {json.dumps(words, ensure_ascii=False)}
 
-        response_dict = json.loads(cleaned_text)
-        explanation = AIExplanation(**response_dict)
+    Respond with a single JSON object whose keys are exactly those words. Each value must be an object with these exact keys: "definition", "part_of_speech", "translation", "contextual_insight".
+    Do not include any text or markdown outside of the single, valid JSON object.
+    """
+
+
+def parse_response_text(text: str) -> dict:
+    """
+    Parses the model's JSON answer.
+    """
+    # The API sometimes wraps the JSON in ```json ... ``` which breaks parsing.
+    # This removes the wrapping markdown and any leading/trailing whitespace.
+    cleaned_text = text.strip().replace('```json', '').replace('```', '').strip()
+
+    if not cleaned_text:
+        # This can happen if the API's safety filters block the response.
+        raise ValueError("Empty response from API, likely due to content filtering.")
+
+    return json.loads(cleaned_text)
+
+
+# --- Explanation Providers ---
+class ExplanationProvider(Protocol):
+    """
+    Anything that can produce an explanation for a word. Gemini in production,
+    `FakeProvider` in tests and benchmarks.
+    """
+
+    async def explain(self, word: str, context: str, language: str) -> AIExplanation:
+        ...
+
+    async def explain_many(self, words: List[str], context: str, language: str) -> Dict[str, AIExplanation]:
+        """
+        Explains several words with one model call. Words the model skipped are left out.
+        """
+        ...
+
+
+def _load_gemini():
+    """
+    Imports and configures the Gemini SDK. Deferred until the first explanation is
+    requested: the SDK is slow to import, and most processes never call it.
+    """
+    import google.generativeai as genai
 
-        explanation_cache[cache_key] = explanation
-        return explanation
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY environment variable not set.")
+    genai.configure(api_key=api_key)
+    return genai
 
+
+class GeminiProvider:
+    """
+    Calls the Gemini API with the SDK's non-blocking `generate_content_async`.
+    """
+
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME):
+        self.model = _load_gemini().GenerativeModel(model_name)
+
+    async def explain(self, word: str, context: str, language: str) -> AIExplanation:
+        response = await self.model.generate_content_async(build_prompt(word, context, language))
+        try:
+            return AIExplanation(**parse_response_text(response.text))
+        except Exception:
+            # We can also print the raw response text if it exists, for debugging
+            try:
+                print(f"RAW API RESPONSE: {response.text}")
+            except Exception:
+                print("RAW API RESPONSE: Could not be read.")
+            print(f"Prompt Feedback: {getattr(response, 'prompt_feedback', None)}")
+            raise
+
+    async def explain_many(self, words: List[str], context: str, language: str) -> Dict[str, AIExplanation]:
+        response = await self.model.generate_content_async(build_batch_prompt(words, context, language))
+        answers = parse_response_text(response.text)
+        explanations = {}
+        for word in words:
+            try:
+                explanations[word] = AIExplanation(**answers[word])
+            except Exception:
+                continue
+        return explanations
+
+
+class FakeProvider:
+    """
+    A local provider that answers after an optional delay without any network access.
+    Records how many calls it received and the peak number of concurrent calls.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self.words_explained = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def explain(self, word: str, context: str, language: str) -> AIExplanation:
+        return (await self.explain_many([word], context, language))[word]
+
+    async def explain_many(self, words: List[str], context: str, language: str) -> Dict[str, AIExplanation]:
+        self.calls += 1
+        self.words_explained += len(words)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            return {
+                word: AIExplanation(
+                    definition=f"Definition of '{word}'.",
+                    part_of_speech="noun",
+                    translation=word,
+                    contextual_insight=f"[{language}] {context[:80]}",
+                )
+                for word in words
+            }
+        finally:
+            self.in_flight -= 1
+
+
+_provider: Optional[ExplanationProvider] = None
+
+
+def get_provider() -> ExplanationProvider:
+    """
+    Returns the active provider, creating the one named by EXPLANATION_PROVIDER on first use.
+    """
+    global _provider
+    if _provider is None:
+        if os.getenv("EXPLANATION_PROVIDER", "gemini").lower() == "fake":
+            _provider = FakeProvider()
+        else:
+            _provider = GeminiProvider()
+    return _provider
+
+
+def set_provider(provider: Optional[ExplanationProvider]):
+    """
+    Replaces the active provider. Passing None restores the configured default.
+    """
+    global _provider
+    _provider = provider
+
+
+# --- Request Coalescing ---
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one in-flight task.
+    Every caller awaiting a key receives the result of the same call.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shield so one caller disconnecting does not cancel the call for everyone else.
+        return await asyncio.shield(task)
+
+
+_flights = SingleFlight()
+_limiter: Optional[asyncio.Semaphore] = None
+_limiter_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _get_limiter() -> asyncio.Semaphore:
+    """
+    Returns the outbound concurrency cap for the running event loop.
+    """
+    global _limiter, _limiter_loop
+    loop = asyncio.get_running_loop()
+    if _limiter is None or _limiter_loop is not loop:
+        _limiter = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        _limiter_loop = loop
+    return _limiter
+
+
+def _error_explanation(message: str) -> AIExplanation:
+    return AIExplanation(
+        definition="Sorry, an error occurred while fetching the explanation.",
+        part_of_speech="Error",
+        translation="N/A",
+        contextual_insight=message,
+    )
+
+
+def cache_key_for(word: str, context: str, language: str):
+    return explanation_cache.make_key(language, word, context if CACHE_CONTEXT_SENSITIVE else None)
+
+
+async def _fetch_explanation(word: str, context: str, language: str, cache_key) -> AIExplanation:
+    # Another worker may already have paid for this explanation.
+    persisted = await asyncio.to_thread(explanation_cache.load, cache_key)
+    if persisted is not None:
+        return persisted
+
+    print(f"CACHE MISS: Fetching new explanation for '{word}'.")
+    try:
+        async with _get_limiter():
+            explanation = await get_provider().explain(word, context, language)
     except Exception as e:
-        # The error log will now be much more informative
         print(f"An error occurred while getting AI explanation: {e}")
-        # We can also print the raw response text if it exists, for debugging
-        try:
-            print(f"RAW API RESPONSE: {response.text}")
-        except:
-            print("RAW API RESPONSE: Could not be read.")
-            
-        return AIExplanation(
-            definition="Sorry, an error occurred while fetching the explanation.",
-            part_of_speech="Error",
-            translation="N/A",
-            contextual_insight=str(e),
-        )
+        return _error_explanation(str(e))
+
+    await asyncio.to_thread(explanation_cache.store, cache_key, explanation)
+    return explanation
+
+
+async def get_ai_explanation(word: str, context: str, language: str) -> AIExplanation:
+    """
+    Gets a detailed, AI-powered explanation for a word, using a cache and robust error handling.
+    Concurrent lookups of the same word share a single provider call.
+    """
+    cache_key = cache_key_for(word, context, language)
+
+    cached = explanation_cache.get(cache_key)
+    if cached is not None:
+        print(f"CACHE HIT: Returning cached explanation for '{word}'.")
+        return cached
+
+    return await _flights.do(cache_key, lambda: _fetch_explanation(word, context, language, cache_key))
+
+
+# --- Batch Explanations ---
+def extract_words(paragraph: str, language: str) -> List[str]:
+    """
+    Returns the distinct words of a paragraph in reading order.
+    """
+    return list(dict.fromkeys(get_tokenizer(language).iter_tokens(paragraph)))
+
+
+async def _explain_chunk(words: List[str], context: str, language: str) -> Dict[str, AIExplanation]:
+    try:
+        async with _get_limiter():
+            explanations = await get_provider().explain_many(words, context, language)
+    except Exception as e:
+        print(f"An error occurred while getting batch AI explanations: {e}")
+        explanations = {}
+    missing = [w for w in words if w not in explanations]
+    if missing:
+        print(f"Batch explanation skipped {len(missing)} of {len(words)} words.")
+    return explanations
+
+
+async def get_ai_explanations(words: List[str], context: str, language: str) -> Dict[str, AIExplanation]:
+    """
+    Explains many words that share one context. Cached words are served from the cache;
+    the rest are sent to the provider in as few multi-word prompts as possible.
+    Results are keyed by the normalized word.
+    """
+    keys = {}
+    for word in words:
+        key = cache_key_for(word, context, language)
+        keys.setdefault(key[1], key)
+
+    results: Dict[str, AIExplanation] = {}
+    misses = []
+    for word, key in keys.items():
+        cached = explanation_cache.get(key)
+        if cached is not None:
+            results[word] = cached
+        else:
+            misses.append(key)
+
+    if misses:
+        persisted = await asyncio.to_thread(explanation_cache.load_many, misses)
+        for key, explanation in persisted.items():
+            results[key[1]] = explanation
+
+    missing_words = [word for word in keys if word not in results]
+    if not missing_words:
+        return results
+
+    print(f"CACHE MISS: Fetching {len(missing_words)} explanations in batches of {BATCH_PROMPT_SIZE}.")
+    chunks = [missing_words[i:i + BATCH_PROMPT_SIZE] for i in range(0, len(missing_words), BATCH_PROMPT_SIZE)]
+    fetched: Dict[str, AIExplanation] = {}
+    for chunk_result in await asyncio.gather(*[_explain_chunk(chunk, context, language) for chunk in chunks]):
+        fetched.update(chunk_result)
+
+    await asyncio.to_thread(explanation_cache.store_many, {keys[word]: exp for word, exp in fetched.items()})
+    results.update(fetched)
+    for word in missing_words:
+        if word not in results:
+            results[word] = _error_explanation("The model did not return an explanation for this word.")
+    return results
@@ -0,0 +1,66 @@
+# backend/async_crud.py
+"""
+AsyncSession versions of the queries behind the high-traffic routes. The statements
+themselves are built in `crud`, so both paths always run the same SQL.
+"""
+import asyncio
+from typing import Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud, models, schemas, security
+
+
+# --- Users ---
+async def get_user(db: AsyncSession, user_id: UUID) -> Optional[models.User]:
+    return await db.get(models.User, user_id)
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    return (await db.scalars(crud.user_by_email_statement(email))).first()
+
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    """
+    Like `crud.authenticate_user`. bcrypt runs in a worker thread so it doesn't stall the event loop.
+    """
+    user = await get_user_by_email(db, email=email)
+    if not user:
+        return None
+    if not await asyncio.to_thread(security.verify_password, password, user.hashed_password):
+        return None
+    return user
+
+
+# --- Books ---
+async def get_book(db: AsyncSession, book_id: UUID) -> Optional[models.Book]:
+    return await db.get(models.Book, book_id)
+
+async def get_content_for_book(db: AsyncSession, book_id: UUID, start: Optional[int] = None,
+                               count: Optional[int] = None) -> list[models.BookContent]:
+    return list((await db.scalars(crud.content_statement(book_id, start, count))).all())
+
+
+# --- Vocabulary & SRS ---
+async def get_due_vocabulary(db: AsyncSession, user_id: UUID, limit: int = 50,
+                             cursor: Optional[str] = None) -> Tuple[list[models.Vocabulary], Optional[str]]:
+    rows = (await db.scalars(crud.due_vocabulary_statement(user_id, limit, cursor))).all()
+    return crud.due_vocabulary_batch(list(rows), limit)
+
+async def count_due_vocabulary(db: AsyncSession, user_id: UUID) -> int:
+    return await db.scalar(crud.due_count_statement(user_id))
+
+async def get_owned_vocabulary(db: AsyncSession, user_id: UUID, vocab_id: UUID) -> Optional[models.Vocabulary]:
+    return (await db.scalars(crud.owned_vocabulary_statement(user_id, [vocab_id]))).first()
+
+async def update_vocabulary_srs(db: AsyncSession, vocab_item: models.Vocabulary, performance_rating: int) -> models.Vocabulary:
+    crud.apply_srs_review(vocab_item, performance_rating)
+    await db.commit()
+    return vocab_item
+
+async def review_vocabulary_batch(db: AsyncSession, user_id: UUID,
+                                  reviews: list[schemas.ReviewItem]) -> schemas.ReviewBatchResponse:
+    vocab_ids = {review.vocab_id for review in reviews}
+    cards = {card.id: card for card in (await db.scalars(crud.owned_vocabulary_statement(user_id, vocab_ids)))}
+    updated, not_found = crud.apply_review_batch(cards, reviews)
+    await db.commit()
+    return schemas.ReviewBatchResponse(updated=updated, not_found=not_found)
@@ -0,0 +1,123 @@
+# backend/benchmark_db_modes.py
+import sys
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List
+
+import anyio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import async_crud, crud, models
+from backend.database import Base, create_async_db_engine, create_db_engine
+
+
+def seed(session_factory, users: int, cards: int) -> List[uuid.UUID]:
+    """
+    Creates `users` users with `cards` due vocabulary words each.
+    """
+    now = datetime.now(timezone.utc)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    db = session_factory()
+    try:
+        for user_id in user_ids:
+            db.add(models.User(id=user_id, email=f"{user_id}@bench.local", hashed_password="x"))
+            db.add_all(
+                models.Vocabulary(
+                    user_id=user_id, word=f"w{i}", definition="{}", context_sentence="...",
+                    next_review_at=now - timedelta(minutes=i),
+                )
+                for i in range(cards)
+            )
+        db.commit()
+    finally:
+        db.close()
+    return user_ids
+
+
+async def run(label: str, operation: Callable[[uuid.UUID], Awaitable], user_ids: List[uuid.UUID],
+              requests: int, concurrency: int) -> dict:
+    """
+    Issues `requests` operations from `concurrency` concurrent clients and reports throughput and latency.
+    """
+    latencies: List[float] = []
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(user_ids[i % len(user_ids)])
+
+    async def client():
+        while not queue.empty():
+            user_id = queue.get_nowait()
+            started_at = time.perf_counter()
+            await operation(user_id)
+            latencies.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    latencies.sort()
+    return {
+        "mode": label,
+        "requests_per_sec": requests / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+    }
+
+
+async def main_async(args) -> None:
+    url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    user_ids = seed(SessionLocal, args.users, args.cards)
+
+    async_engine = create_async_db_engine(url)
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    # A sync route: Starlette runs it on the shared thread pool (40 threads by default).
+    limiter = anyio.CapacityLimiter(args.threads)
+
+    def sync_due(user_id):
+        db = SessionLocal()
+        try:
+            return crud.get_due_vocabulary(db, user_id, limit=args.limit)
+        finally:
+            db.close()
+
+    async def sync_operation(user_id):
+        return await anyio.to_thread.run_sync(sync_due, user_id, limiter=limiter)
+
+    async def async_operation(user_id):
+        async with AsyncSessionLocal() as db:
+            return await async_crud.get_due_vocabulary(db, user_id, limit=args.limit)
+
+    print(f"{args.requests} due-for-review queries, {args.concurrency} concurrent clients, {url}")
+    print(f"{'mode':<8} {'req/sec':>10} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, operation in [("sync", sync_operation), ("async", async_operation)]:
+        await operation(user_ids[0])  # warm up the pool
+        result = await run(label, operation, user_ids, args.requests, args.concurrency)
+        print(f"{result['mode']:<8} {result['requests_per_sec']:>10,.0f} {result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f}")
+
+    await async_engine.dispose()
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the sync (thread pool) and async database paths under concurrency.")
+    parser.add_argument("--database-url", default=None, help="Defaults to a fresh SQLite file in a temp directory.")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--cards", type=int, default=200, help="Due cards per user.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=40, help="Thread pool size for the sync path.")
+    parser.add_argument("--limit", type=int, default=50, help="Cards per due-for-review query.")
+    asyncio.run(main_async(parser.parse_args()))
@@ -0,0 +1,63 @@
+# backend/benchmark_tokenizers.py
+import sys
+import os
+import time
+import argparse
+from typing import List
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.populate_db import books_to_add, iter_paragraphs
+from backend.tokenizers import get_tokenizer
+
+
+def benchmark_file(file_path: str, language: str, repeat: int) -> dict:
+    """
+    Tokenizes the paragraphs of one source file `repeat` times and reports throughput.
+    Paragraph splitting happens once, up front, so only the tokenizer is timed.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        paragraphs: List[str] = list(iter_paragraphs(f))
+    tokenizer = get_tokenizer(language)
+
+    tokens = 0
+    started_at = time.perf_counter()
+    for _ in range(repeat):
+        for _token in tokenizer.iter_stream(paragraphs):
+            tokens += 1
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        "file": os.path.basename(file_path),
+        "language": language,
+        "tokens": tokens,
+        "seconds": elapsed,
+        "tokens_per_sec": tokens / elapsed if elapsed else float("inf"),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure tokenizer throughput on the bundled source texts.")
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over each text (the samples are short).")
+    parser.add_argument("--min-tokens-per-sec", type=float, default=0,
+                        help="Exit with status 1 if any text tokenizes slower than this.")
+    args = parser.parse_args()
+
+    print(f"{'file':<22} {'lang':<5} {'tokens':>10} {'seconds':>8} {'tokens/sec':>12}")
+    too_slow = False
+    for book in books_to_add:
+        result = benchmark_file(book["file_path"], book["language"], args.repeat)
+        print(f"{result['file']:<22} {result['language']:<5} {result['tokens']:>10} "
+              f"{result['seconds']:>8.3f} {result['tokens_per_sec']:>12,.0f}")
+        if result["tokens_per_sec"] < args.min_tokens_per_sec:
+            too_slow = True
+
+    if too_slow:
+        print(f"FAIL: throughput below {args.min_tokens_per_sec:,.0f} tokens/sec.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# backend/coverage.py
+import threading
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+
+# --- Book x Word Incidence Matrix ---
+class CoverageIndex:
+    """
+    A precomputed book x word incidence matrix in CSR form, built from `book_word_links`.
+
+    Row `i` holds the column ids of every unique (lowercased) word in `book_ids[i]`
+    and, in `data`, how many times each occurs, so the coverage of every book can be
+    computed in one vectorized pass over the user's known-word ids instead of loading
+    `Book.unique_words` per book.
+    """
+
+    def __init__(self, book_ids: List[UUID], indptr: np.ndarray, indices: np.ndarray,
+                 data: np.ndarray, word_columns: Dict[str, int], fingerprint: Tuple = ()):
+        self.book_ids = book_ids
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.word_columns = word_columns
+        self.fingerprint = fingerprint
+        self.row_of = {book_id: row for row, book_id in enumerate(book_ids)}
+        self.book_sizes = np.diff(indptr)
+        self.book_tokens = self._row_sums(data)
+
+    @classmethod
+    def build(cls, db: Session, fingerprint: Tuple = ()) -> "CoverageIndex":
+        """
+        Builds the matrix with a single query over the link table, ordered by book.
+        """
+        rows = (
+            db.query(models.BookWordLink.c.book_id, func.lower(models.Word.text), models.BookWordLink.c.occurrences)
+            .join(models.Word, models.Word.id == models.BookWordLink.c.word_id)
+            .order_by(models.BookWordLink.c.book_id)
+            .all()
+        )
+
+        word_columns: Dict[str, int] = {}
+        book_ids: List[UUID] = []
+        indptr = [0]
+        indices: List[int] = []
+        data: List[int] = []
+        current_book = None
+        current_row: Dict[int, int] = {}
+
+        def close_row():
+            if current_book is not None and current_row:
+                book_ids.append(current_book)
+                for column in sorted(current_row):
+                    indices.append(column)
+                    data.append(current_row[column])
+                indptr.append(len(indices))
+
+        for book_id, text, occurrences in rows:
+            if book_id != current_book:
+                close_row()
+                current_book = book_id
+                current_row = {}
+            column = word_columns.setdefault(text, len(word_columns))
+            # Case variants of one word collapse into a single column.
+            current_row[column] = current_row.get(column, 0) + (occurrences or 1)
+        close_row()
+
+        return cls(
+            book_ids=book_ids,
+            indptr=np.asarray(indptr, dtype=np.int64),
+            indices=np.asarray(indices, dtype=np.int32),
+            data=np.asarray(data, dtype=np.int64),
+            word_columns=word_columns,
+            fingerprint=fingerprint,
+        )
+
+    def known_vector(self, known_words: Iterable[str]) -> np.ndarray:
+        """
+        Returns a boolean vector over the word columns marking the words the user knows.
+        """
+        vector = np.zeros(len(self.word_columns), dtype=bool)
+        columns = [self.word_columns[w] for w in known_words if w in self.word_columns]
+        if columns:
+            vector[columns] = True
+        return vector
+
+    def _row_sums(self, values: np.ndarray) -> np.ndarray:
+        """
+        Sums `values` (aligned with `indices`) per book row. Handles empty rows.
+        """
+        cumulative = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+        return cumulative[self.indptr[1:]] - cumulative[self.indptr[:-1]]
+
+    def coverage(self, known_words: Iterable[str]) -> np.ndarray:
+        """
+        Returns the fraction of each book's unique words that appear in `known_words`.
+        """
+        if not self.book_ids:
+            return np.zeros(0, dtype=np.float64)
+        hits = self.known_vector(known_words)[self.indices]
+        return self._row_sums(hits) / self.book_sizes
+
+    def token_coverage(self, known_words: Iterable[str]) -> np.ndarray:
+        """
+        Returns the fraction of each book's running words (tokens) that the user knows.
+        This is the measure behind the "98% comprehensible input" target: a known word
+        that occurs 500 times counts 500 times.
+        """
+        if not self.book_ids:
+            return np.zeros(0, dtype=np.float64)
+        hits = self.known_vector(known_words)[self.indices]
+        return self._row_sums(np.where(hits, self.data, 0)) / self.book_tokens
+
+
+# --- Catalog Version ---
+def bump_catalog_version(db: Session):
+    """
+    Marks the catalog as changed in the current transaction. Call this wherever book
+    word links are written with Core statements (ingestion, deletes); books added
+    through the ORM are also picked up by the book count in the fingerprint.
+    """
+    bumped = db.execute(update(models.CatalogVersion).where(models.CatalogVersion.id == 1)
+                        .values(version=models.CatalogVersion.version + 1))
+    if not bumped.rowcount:
+        db.execute(insert(models.CatalogVersion).values(id=1, version=1))
+
+
+# --- Process-wide Index Cache ---
+# One index per engine: a replica may lag the primary, so their indexes differ.
+_indexes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def _catalog_fingerprint(db: Session) -> Tuple:
+    """
+    A cheap summary of the catalog that changes whenever books or their links change,
+    so an index built before another process (e.g. populate_db) wrote is never served
+    stale. Only touches `books` and the catalog version row, never the link table.
+    """
+    book_count, latest_book = db.query(func.count(models.Book.id), func.max(models.Book.created_at)).one()
+    version = db.query(models.CatalogVersion.version).filter(models.CatalogVersion.id == 1).scalar()
+    return (book_count, latest_book, version)
+
+
+def get_coverage_index(db: Session) -> CoverageIndex:
+    """
+    Returns the cached coverage index for the session's database, rebuilding it if the
+    catalog has changed.
+    """
+    bind = db.get_bind()
+    bind = getattr(bind, "engine", bind)
+    fingerprint = _catalog_fingerprint(db)
+    index = _indexes.get(bind)
+    if index is not None and index.fingerprint == fingerprint:
+        return index
+    with _index_lock:
+        index = _indexes.get(bind)
+        if index is None or index.fingerprint != fingerprint:
+            index = _indexes[bind] = CoverageIndex.build(db, fingerprint=fingerprint)
+        return index
+
+
+def invalidate_coverage_index():
+    """
+    Drops the cached indexes. Call this after ingesting or deleting books.
+    """
+    with _index_lock:
+        _indexes.clear()
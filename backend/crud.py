@@ -1,9 +1,16 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from uuid import UUID
+from sqlalchemy.orm import Session, raiseload
+from sqlalchemy import Select, and_, event, func, or_, select
+from uuid import UUID, uuid4
 from datetime import date, datetime, timedelta, timezone
-from typing import Set
-from . import models, schemas, security
+from typing import Dict, Iterator, Optional, Set, Tuple, Union
+import base64
+import json
+import os
+import threading
+import time
+import numpy as np
+from . import coverage, models, replicas, schemas, security
+from .database import dialect_insert
 
 
 # --- User CRUD Functions ---
@@ -12,13 +19,16 @@ def get_user(db: Session, user_id: UUID):
     """
     Retrieve a single user by their ID.
     """
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    return db.get(models.User, user_id)
+
+def user_by_email_statement(email: str) -> Select:
+    return select(models.User).where(models.User.email == email).limit(1)
 
 def get_user_by_email(db: Session, email: str):
     """
     Retrieve a single user by their email address.
     """
-    return db.query(models.User).filter(models.User.email == email).first()
+    return db.scalars(user_by_email_statement(email)).first()
 
 def create_user(db: Session, user: schemas.UserCreate):
     """
@@ -46,130 +56,296 @@ def authenticate_user(db: Session, email: str, password: str):
 # --- Reading Activity CRUD Function ---
 def log_or_update_reading_activity(db: Session, user_id: UUID, minutes: int):
     """
-    Finds today's reading activity for a user. If it exists, adds minutes to it.
-    If it doesn't exist, a new entry is created for today's date.
+    Adds minutes to today's reading activity for a user, creating the entry if needed.
+    A single INSERT ... ON CONFLICT DO UPDATE, so concurrent calls can't collide on `_user_date_uc`.
     """
     today = date.today()
-    
-    activity = db.query(models.ReadingActivity).filter(
+
+    insert = dialect_insert(db, models.ReadingActivity)
+    db.execute(
+        insert.values(id=uuid4(), user_id=user_id, date=today, minutes_read=minutes).on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={"minutes_read": models.ReadingActivity.minutes_read + insert.excluded.minutes_read},
+        )
+    )
+    advance_reading_streak(db, user_id, today)
+    replicas.note_write(db, user_id)
+    db.commit()
+    # Core statements bypass the mapper listeners.
+    user_stats_cache.invalidate(user_id)
+
+    return db.query(models.ReadingActivity).filter(
         models.ReadingActivity.user_id == user_id,
         models.ReadingActivity.date == today
-    ).first()
-    
-    if activity:
-        activity.minutes_read += minutes
+    ).populate_existing().one()
+
+# --- Reading Streak ---
+def lock_reading_streak(db: Session, user_id: UUID) -> Tuple[models.ReadingStreak, bool]:
+    """
+    Returns the user's streak row, locked for update, creating an empty one if needed,
+    and whether it was created. The row is created with INSERT ... ON CONFLICT DO NOTHING,
+    so two concurrent first activities both get the row instead of one of them failing
+    on the primary key.
+    """
+    db.flush()
+    created = db.execute(
+        dialect_insert(db, models.ReadingStreak)
+        .values(user_id=user_id, current_streak=0, longest_streak=0)
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    ).rowcount == 1
+    streak = db.scalars(
+        select(models.ReadingStreak)
+        .where(models.ReadingStreak.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).one()
+    return streak, created
+
+def advance_reading_streak(db: Session, user_id: UUID, day: date) -> models.ReadingStreak:
+    """
+    Records activity on `day` in the user's streak state. O(1): one primary-key
+    upsert and lookup and an in-place update. The caller commits.
+    """
+    streak, created = lock_reading_streak(db, user_id)
+    if created:
+        # First activity under streak tracking: start from the history already recorded.
+        streak = recompute_reading_streak(db, user_id)
+    if streak.last_active_date is not None and streak.last_active_date >= day:
+        return streak
+
+    if streak.last_active_date == day - timedelta(days=1):
+        streak.current_streak += 1
     else:
-        activity = models.ReadingActivity(
-            user_id=user_id,
-            date=today,
-            minutes_read=minutes
+        streak.current_streak = 1
+    streak.longest_streak = max(streak.longest_streak, streak.current_streak)
+    streak.last_active_date = day
+    return streak
+
+def recompute_reading_streak(db: Session, user_id: UUID) -> models.ReadingStreak:
+    """
+    Rebuilds the user's streak state from `reading_activities`. Used to backfill
+    users without state and by the repair job (backend/repair_streaks.py). The caller commits.
+    """
+    last_active_date = db.query(func.max(models.ReadingActivity.date)).filter(
+        models.ReadingActivity.user_id == user_id
+    ).scalar()
+
+    if replicas.is_replica_session(db):
+        # Replicas are read-only: the state is computed but not stored.
+        streak = models.ReadingStreak(user_id=user_id)
+    else:
+        streak, _created = lock_reading_streak(db, user_id)
+    streak.last_active_date = last_active_date
+    streak.current_streak = get_reading_streak(db, user_id, last_active_date) if last_active_date else 0
+    streak.longest_streak = get_longest_reading_streak(db, user_id)
+    return streak
+
+# --- User Stats ---
+# Bounds how stale stats can be after writes this process doesn't see: other workers'
+# writes and Core statements, which skip the mapper listeners below.
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+# The streak query first looks this many days back, and doubles the window only
+# while the streak fills it, so a long history is never scanned in full.
+STREAK_SCAN_DAYS = 64
+
+
+class UserStatsCache:
+    """
+    Per-user UserStats, valid for `ttl_seconds` and for the day they were computed on
+    (the streak depends on today's date). ORM writes to vocabulary and reading activity
+    in this process drop the owner's entry through the mapper listeners below; Core
+    writers (e.g. the heartbeat flush) invalidate explicitly. Anything else is only
+    bounded by the short TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = STATS_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[UUID, Tuple[schemas.UserStats, float, date]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID, today: date) -> Optional[schemas.UserStats]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] <= time.monotonic() or entry[2] != today:
+                return None
+            return entry[0]
+
+    def put(self, user_id: UUID, today: date, stats: schemas.UserStats):
+        with self._lock:
+            self._entries[user_id] = (stats, time.monotonic() + self.ttl_seconds, today)
+
+    def invalidate(self, user_id: UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_stats_cache = UserStatsCache()
+
+
+@event.listens_for(models.Vocabulary, "after_insert")
+@event.listens_for(models.Vocabulary, "after_delete")
+@event.listens_for(models.ReadingActivity, "after_insert")
+@event.listens_for(models.ReadingActivity, "after_update")
+@event.listens_for(models.ReadingActivity, "after_delete")
+@event.listens_for(models.ReadingStreak, "after_insert")
+@event.listens_for(models.ReadingStreak, "after_update")
+def _invalidate_cached_stats(mapper, connection, target):
+    user_stats_cache.invalidate(target.user_id)
+
+
+def _island_key(db: Session):
+    """
+    Gaps and islands: with reading dates ordered newest first, day_number(date) + row_number()
+    is constant within a run of consecutive days, so each value identifies one streak.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        day_number = models.ReadingActivity.date - date(1970, 1, 1)
+    else:
+        day_number = func.julianday(models.ReadingActivity.date)
+    return day_number + func.row_number().over(order_by=models.ReadingActivity.date.desc())
+
+
+def get_reading_streak(db: Session, user_id: UUID, today: Optional[date] = None) -> int:
+    """
+    Length of the run of consecutive reading days ending today or yesterday: the newest island.
+    Only the last STREAK_SCAN_DAYS days are scanned unless the streak spans them all.
+    """
+    today = today or date.today()
+    window = STREAK_SCAN_DAYS
+    while True:
+        lower = today - timedelta(days=window - 1)
+        ranked = (
+            db.query(
+                models.ReadingActivity.date.label("date"),
+                _island_key(db).label("island"),
+            )
+            .filter(
+                models.ReadingActivity.user_id == user_id,
+                models.ReadingActivity.date >= lower,
+                models.ReadingActivity.date <= today,
+            )
+            .subquery()
         )
-        db.add(activity)
-        
-    db.commit()
-    db.refresh(activity)
-    return activity
+        latest = (
+            db.query(func.count(), func.min(ranked.c.date), func.max(ranked.c.date))
+            .group_by(ranked.c.island)
+            .order_by(func.max(ranked.c.date).desc())
+            .first()
+        )
+        if latest is None:
+            return 0
+        length, first_day, last_day = latest
+        if last_day < today - timedelta(days=1):
+            return 0
+        if first_day > lower:
+            return length
+        window *= 2
+
+
+def get_longest_reading_streak(db: Session, user_id: UUID) -> int:
+    """
+    The longest run of consecutive reading days in the user's whole history.
+    """
+    ranked = (
+        db.query(_island_key(db).label("island"))
+        .filter(models.ReadingActivity.user_id == user_id)
+        .subquery()
+    )
+    lengths = db.query(func.count(ranked.c.island).label("length")).group_by(ranked.c.island).subquery()
+    return db.query(func.max(lengths.c.length)).scalar() or 0
+
 
-# --- User Stats Calculation Function ---
-def get_user_stats(db: Session, user: models.User) -> schemas.UserStats:
+def get_user_stats(db: Session, user: Union[models.User, schemas.Principal]) -> schemas.UserStats:
     """
-    Calculates the reading streak, total words learned, and total minutes read for a user.
+    Calculates the reading streak, total words learned, and total minutes read for a user,
+    with aggregates in SQL. Results are cached per user until their next write.
     """
     today = date.today()
-    yesterday = today - timedelta(days=1)
-    
-    total_words_learned = len(user.vocabulary)
-    
-    # Use a query to sum up minutes for better performance with large histories
+    cached = user_stats_cache.get(user.id, today)
+    if cached is not None:
+        return cached
+
+    total_words_learned = db.query(func.count(models.Vocabulary.id)).filter(
+        models.Vocabulary.user_id == user.id
+    ).scalar()
     total_minutes_read = db.query(func.sum(models.ReadingActivity.minutes_read)).filter(
         models.ReadingActivity.user_id == user.id
     ).scalar() or 0
-    
-    reading_streak = 0
-    
-    recent_activity_dates = sorted(
-        [activity.date for activity in user.reading_history],
-        reverse=True
-    )
-    
-    if not recent_activity_dates:
-        return schemas.UserStats(
-            reading_streak=0,
-            total_words_learned=total_words_learned,
-            total_minutes_read=total_minutes_read
-        )
-        
-    if recent_activity_dates[0] == today or recent_activity_dates[0] == yesterday:
-        reading_streak = 1
-        for i in range(len(recent_activity_dates) - 1):
-            if recent_activity_dates[i] - recent_activity_dates[i+1] == timedelta(days=1):
-                reading_streak += 1
-            else:
-                break
-                
-    return schemas.UserStats(
-        reading_streak=reading_streak,
+
+    streak = db.get(models.ReadingStreak, user.id)
+    if streak is None:
+        streak = recompute_reading_streak(db, user.id)
+        # On a replica it's served but not stored: the row is created by the user's next activity.
+        if not replicas.is_replica_session(db):
+            db.commit()
+    # A streak is still alive until a full day has been missed.
+    alive = streak.last_active_date is not None and streak.last_active_date >= today - timedelta(days=1)
+
+    stats = schemas.UserStats(
+        reading_streak=streak.current_streak if alive else 0,
         total_words_learned=total_words_learned,
-        total_minutes_read=total_minutes_read
+        total_minutes_read=total_minutes_read,
+        longest_streak=streak.longest_streak,
+        last_active_date=streak.last_active_date
     )
+    # A replica may lag behind the user's latest writes; only primary reads are cached.
+    if not replicas.is_replica_session(db):
+        user_stats_cache.put(user.id, today, stats)
+    return stats
 
 # ---  Comprehensible Input Recommendation Logic  ---
-def get_user_recommendations(db: Session, user: models.User, limit: int = 3) -> list[models.Book]:
+def get_user_recommendations(db: Session, user: Union[models.User, schemas.Principal], limit: int = 3) -> list[models.Book]:
     """
     Generates book recommendations based on the user's vocabulary knowledge,
     aiming for the optimal 98% "comprehensible input" zone.
     """
     
     # 1. Get the set of words the user has learned.
-    user_known_words: Set[str] = {v.word.lower() for v in user.vocabulary}
+    user_known_words: Set[str] = {
+        word.lower() for (word,) in db.query(models.Vocabulary.word).filter(models.Vocabulary.user_id == user.id)
+    }
 
     # 2. Handle the "cold start" problem for new users.
     if not user_known_words:
         print("User has no vocabulary. Recommending easiest books.")
         # Fallback: Recommend the easiest books available.
         # Ideally, this would also filter by the user's target language.
-        return db.query(models.Book).order_by(models.Book.difficulty_level.asc()).limit(limit).all()
+        return _catalog_query(db).order_by(models.Book.difficulty_level.asc()).limit(limit).all()
 
     # 3. Get IDs of all books the user has in their library to exclude them.
-    user_book_ids_in_library = {link.book_id for link in user.books_in_library}
+    user_book_ids_in_library = {
+        book_id for (book_id,) in db.query(models.UserBookLink.book_id).filter(models.UserBookLink.user_id == user.id)
+    }
 
-    # 4. Get all candidate books, excluding those already in the user's library.
-    candidate_books = db.query(models.Book).filter(
-        models.Book.id.notin_(user_book_ids_in_library)
-    ).all()
+    # 4. Score every analyzed book in one vectorized pass over the incidence matrix.
+    # Books with no vocabulary analyzed are not part of the index.
+    index = coverage.get_coverage_index(db)
+    if not index.book_ids:
+        return []
 
-    # 5. Score the candidate books based on vocabulary coverage.
-    recommendation_scores = []
-    
     OPTIMAL_COVERAGE = 0.98  # Target 98% known words
 
-    for book in candidate_books:
-        # The book.unique_words relationship gives us all Word objects for the book.
-        book_words: Set[str] = {w.text.lower() for w in book.unique_words}
-        
-        if not book_words:
-            continue # Skip books with no vocabulary analyzed.
-
-        # Calculate how many of the book's words the user knows.
-        known_words_in_book = user_known_words.intersection(book_words)
-        
-        # Calculate the lexical coverage percentage.
-        coverage = len(known_words_in_book) / len(book_words)
-        
-        # The score is how close the coverage is to our optimal target.
-        # A smaller difference is better, so we subtract from 1.
-        score = 1.0 - abs(OPTIMAL_COVERAGE - coverage)
-        
-        recommendation_scores.append((score, book))
-        print(f"Book: '{book.title}', Coverage: {coverage:.2%}, Score: {score:.4f}")
+    # Coverage is token-weighted: the share of the book's running words the user knows.
+    # The score is how close the coverage is to our optimal target.
+    # A smaller difference is better, so we subtract from 1.
+    scores = 1.0 - np.abs(OPTIMAL_COVERAGE - index.token_coverage(user_known_words))
+    for book_id in user_book_ids_in_library:
+        row = index.row_of.get(book_id)
+        if row is not None:
+            scores[row] = -np.inf
 
+    # 5. Sort by score (descending) and load only the top results.
+    ranked_rows = [row for row in np.argsort(-scores, kind="stable") if np.isfinite(scores[row])][:limit]
+    top_ids = [index.book_ids[row] for row in ranked_rows]
+    if not top_ids:
+        return []
 
-    # 6. Sort by score (descending) and return the top results.
-    recommendation_scores.sort(key=lambda x: x[0], reverse=True)
-    
-    recommended_books = [book for score, book in recommendation_scores]
-    
-    return recommended_books[:limit]
+    books_by_id = {book.id: book for book in _catalog_query(db).filter(models.Book.id.in_(top_ids))}
+    return [books_by_id[book_id] for book_id in top_ids if book_id in books_by_id]
 
 
 # --- Book CRUD Functions ---
@@ -179,16 +355,54 @@ def create_book(db: Session, book: schemas.BookCreate):
     db.add(db_book)
     db.commit()
     db.refresh(db_book)
+    coverage.invalidate_coverage_index()
     return db_book
 
+def _catalog_query(db: Session):
+    """
+    Book query for catalog views. Paragraphs are only served by the content endpoint,
+    so any attempt to load `Book.content` from these results raises instead of
+    silently pulling the whole text through the ORM.
+    """
+    return db.query(models.Book).options(raiseload(models.Book.content))
+
 def get_books(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Book).offset(skip).limit(limit).all()
+    return _catalog_query(db).offset(skip).limit(limit).all()
 
 def get_book(db: Session, book_id: UUID):
-    return db.query(models.Book).filter(models.Book.id == book_id).first()
+    return _catalog_query(db).filter(models.Book.id == book_id).first()
+
+def content_statement(book_id: UUID, start: Optional[int] = None, count: Optional[int] = None) -> Select:
+    statement = select(models.BookContent).where(models.BookContent.book_id == book_id)
+    if start is not None:
+        statement = statement.where(models.BookContent.paragraph_index >= start)
+    statement = statement.order_by(models.BookContent.paragraph_index)
+    if count is not None:
+        statement = statement.limit(count)
+    return statement
+
+def get_content_for_book(db: Session, book_id: UUID, start: Optional[int] = None, count: Optional[int] = None):
+    """
+    Returns a book's paragraphs in reading order. `start` and `count` select a window
+    by `paragraph_index` (keyset, not OFFSET), so any window costs the same to fetch.
+    """
+    return db.scalars(content_statement(book_id, start, count)).all()
 
-def get_content_for_book(db: Session, book_id: UUID):
-    return db.query(models.BookContent).filter(models.BookContent.book_id == book_id).order_by(models.BookContent.paragraph_index).all()
+def iter_content_for_book(db: Session, book_id: UUID, batch_size: int = 500) -> Iterator[models.BookContent]:
+    """
+    Yields a book's paragraphs in reading order, fetching `batch_size` rows at a time
+    by keyset so memory stays flat regardless of book length.
+    """
+    last_index = -1
+    while True:
+        batch = db.query(models.BookContent).filter(
+            models.BookContent.book_id == book_id,
+            models.BookContent.paragraph_index > last_index
+        ).order_by(models.BookContent.paragraph_index).limit(batch_size).all()
+        if not batch:
+            return
+        yield from batch
+        last_index = batch[-1].paragraph_index
 
 
 # --- Vocabulary CRUD Functions ---
@@ -203,12 +417,131 @@ def create_vocabulary_entry(db: Session, vocabulary: schemas.VocabularyCreate, u
 def get_all_vocabulary(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.Vocabulary).order_by(models.Vocabulary.created_at.desc()).offset(skip).limit(limit).all()
 
-def get_vocabulary_for_user(db: Session, user_id: UUID):
-    return db.query(models.Vocabulary).filter(models.Vocabulary.user_id == user_id).order_by(models.Vocabulary.created_at.desc()).all()
+def get_vocabulary_for_user(db: Session, user_id: UUID, limit: int = 100):
+    return db.query(models.Vocabulary).filter(models.Vocabulary.user_id == user_id).order_by(models.Vocabulary.created_at.desc()).limit(limit).all()
+
+def encode_keyset_cursor(position: datetime, row_id: UUID) -> str:
+    """
+    Encodes a (timestamp, id) keyset position as an opaque cursor.
+    """
+    raw = json.dumps([position.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_keyset_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decodes a cursor from `encode_keyset_cursor`. Raises ValueError if it is malformed.
+    """
+    try:
+        position, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(position), UUID(row_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor.") from e
+
+def get_vocabulary_page(
+    db: Session,
+    user_id: UUID,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+    due_only: bool = False,
+) -> schemas.VocabularyPage:
+    """
+    Returns one page of a user's vocabulary, newest first, using keyset pagination on
+    (created_at, id) so deep pages cost the same as the first one.
+    `search` filters by word prefix; `due_only` keeps the words due for review.
+    The total counts every row matching the filters, across all pages.
+    """
+    query = db.query(models.Vocabulary).filter(models.Vocabulary.user_id == user_id)
+    if search:
+        # Wildcards in the search are matched literally, so it stays a prefix lookup.
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.filter(models.Vocabulary.word.ilike(f"{escaped}%", escape="\\"))
+    if due_only:
+        query = query.filter(models.Vocabulary.next_review_at <= datetime.now(timezone.utc))
+
+    total = query.order_by(None).with_entities(func.count(models.Vocabulary.id)).scalar()
+
+    if cursor:
+        created_at, vocab_id = decode_keyset_cursor(cursor)
+        query = query.filter(or_(
+            models.Vocabulary.created_at < created_at,
+            and_(models.Vocabulary.created_at == created_at, models.Vocabulary.id < vocab_id),
+        ))
+
+    # Fetch one extra row to know whether another page follows.
+    rows = query.order_by(models.Vocabulary.created_at.desc(), models.Vocabulary.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_keyset_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+    return schemas.VocabularyPage(items=items, next_cursor=next_cursor, total=total)
+
+def due_vocabulary_statement(user_id: UUID, limit: int = 50, cursor: Optional[str] = None) -> Select:
+    """
+    Due words, most overdue first, after `cursor`; one row more than `limit` to detect a next batch.
+    Raises ValueError for a malformed cursor.
+    """
+    statement = select(models.Vocabulary).where(
+        models.Vocabulary.user_id == user_id,
+        models.Vocabulary.next_review_at <= datetime.now(timezone.utc)
+    )
+    if cursor:
+        next_review_at, vocab_id = decode_keyset_cursor(cursor)
+        statement = statement.where(or_(
+            models.Vocabulary.next_review_at > next_review_at,
+            and_(models.Vocabulary.next_review_at == next_review_at, models.Vocabulary.id > vocab_id),
+        ))
+    return statement.order_by(models.Vocabulary.next_review_at.asc(), models.Vocabulary.id.asc()).limit(limit + 1)
+
+def due_vocabulary_batch(rows: list[models.Vocabulary], limit: int) -> Tuple[list[models.Vocabulary], Optional[str]]:
+    items = rows[:limit]
+    next_cursor = encode_keyset_cursor(items[-1].next_review_at, items[-1].id) if len(rows) > limit else None
+    return items, next_cursor
+
+def get_due_vocabulary(
+    db: Session, user_id: UUID, limit: int = 50, cursor: Optional[str] = None
+) -> Tuple[list[models.Vocabulary], Optional[str]]:
+    """
+    Returns up to `limit` words due for review, most overdue first, and the cursor of
+    the next batch (None if this is the last one). Served by the (user_id, next_review_at) index.
+    """
+    rows = db.scalars(due_vocabulary_statement(user_id, limit, cursor)).all()
+    return due_vocabulary_batch(list(rows), limit)
+
+def due_count_statement(user_id: UUID) -> Select:
+    return select(func.count(models.Vocabulary.id)).where(
+        models.Vocabulary.user_id == user_id,
+        models.Vocabulary.next_review_at <= datetime.now(timezone.utc)
+    )
+
+def count_due_vocabulary(db: Session, user_id: UUID) -> int:
+    """
+    Counts the words due for review with an index-only scan. Cheap enough for badges.
+    """
+    return db.scalar(due_count_statement(user_id))
+
+def owned_vocabulary_statement(user_id: UUID, vocab_ids) -> Select:
+    """
+    The given vocabulary rows, restricted to those owned by `user_id`.
+    """
+    return select(models.Vocabulary).where(
+        models.Vocabulary.user_id == user_id,
+        models.Vocabulary.id.in_(vocab_ids)
+    )
 
 
 # --- SRS Logic Function ---
-def update_vocabulary_srs(db: Session, vocab_item: models.Vocabulary, performance_rating: int):
+def apply_srs_review(vocab_item: models.Vocabulary, performance_rating: int, reviewed_at: Optional[datetime] = None):
+    """
+    Applies one SM-2 review to `vocab_item` in memory. The caller commits.
+    The next review is scheduled from `reviewed_at` (default: now), so reviews
+    done offline are scheduled from when they actually happened.
+    """
+    now = datetime.now(timezone.utc)
+    if reviewed_at is None:
+        reviewed_at = now
+    elif reviewed_at.tzinfo is None:
+        reviewed_at = reviewed_at.replace(tzinfo=timezone.utc)
+    reviewed_at = min(reviewed_at, now)
+
     if performance_rating >= 3:
         if vocab_item.interval == 1:
             new_interval = 6
@@ -224,24 +557,46 @@ def update_vocabulary_srs(db: Session, vocab_item: models.Vocabulary, performanc
         
     vocab_item.ease_factor = new_ease_factor
     vocab_item.interval = new_interval
-    vocab_item.next_review_at = datetime.now(timezone.utc) + timedelta(days=new_interval)
-    
+    vocab_item.next_review_at = reviewed_at + timedelta(days=new_interval)
+    return vocab_item
+
+def update_vocabulary_srs(db: Session, vocab_item: models.Vocabulary, performance_rating: int):
+    apply_srs_review(vocab_item, performance_rating)
     db.commit()
     db.refresh(vocab_item)
     return vocab_item
 
-# --- Event CRUD Function ---
-def create_event(db: Session, user_id: UUID, event: schemas.EventCreate) -> models.Event:
+def apply_review_batch(cards: Dict[UUID, models.Vocabulary], reviews: list[schemas.ReviewItem]) -> Tuple[list, list]:
     """
-    Logs a new event for a specific user.
+    Applies `reviews` to the loaded `cards` in memory, oldest first.
+    Returns (updated cards, ids not found), both in request order.
     """
-    db_event = models.Event(
-        user_id=user_id,
-        event_name=event.event_name,
-        properties=event.properties
-    )
-    db.add(db_event)
+    def review_time(review: schemas.ReviewItem) -> datetime:
+        if review.reviewed_at is None:
+            return datetime.max.replace(tzinfo=timezone.utc)
+        if review.reviewed_at.tzinfo is None:
+            return review.reviewed_at.replace(tzinfo=timezone.utc)
+        return review.reviewed_at
+
+    # A card reviewed twice while offline gets both reviews, oldest first.
+    for review in sorted(reviews, key=review_time):
+        card = cards.get(review.vocab_id)
+        if card is not None:
+            apply_srs_review(card, review.performance_rating, review.reviewed_at)
+
+    requested = list(dict.fromkeys(review.vocab_id for review in reviews))
+    updated = [cards[vocab_id] for vocab_id in requested if vocab_id in cards]
+    not_found = [vocab_id for vocab_id in requested if vocab_id not in cards]
+    return updated, not_found
+
+def review_vocabulary_batch(db: Session, user_id: UUID, reviews: list[schemas.ReviewItem]) -> schemas.ReviewBatchResponse:
+    """
+    Applies many reviews in one transaction: one query loads (and checks ownership of)
+    every card, SM-2 runs in memory in `reviewed_at` order, and a single commit writes
+    the result. Ids that don't exist or belong to another user are reported, not applied.
+    """
+    vocab_ids = {review.vocab_id for review in reviews}
+    cards = {card.id: card for card in db.scalars(owned_vocabulary_statement(user_id, vocab_ids))}
+    updated, not_found = apply_review_batch(cards, reviews)
     db.commit()
-    db.refresh(db_event)
-    print(f"Logged event '{event.event_name}' for user {user_id}")
-    return db_event
\ No newline at end of file
+    return schemas.ReviewBatchResponse(updated=updated, not_found=not_found)
@@ -0,0 +1,243 @@
+# backend/events.py
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# --- Configuration ---
+EVENT_BUFFER_MAX_SIZE = int(os.getenv("EVENT_BUFFER_MAX_SIZE", "10000"))
+EVENT_FLUSH_SIZE = int(os.getenv("EVENT_FLUSH_SIZE", "500"))
+EVENT_FLUSH_INTERVAL_SECONDS = float(os.getenv("EVENT_FLUSH_INTERVAL_SECONDS", "2"))
+# How long a request may wait for room in a full buffer before it is refused.
+EVENT_SUBMIT_TIMEOUT_SECONDS = float(os.getenv("EVENT_SUBMIT_TIMEOUT_SECONDS", "1"))
+# A batch that fails this many writes in a row (e.g. a longer outage) is dropped.
+EVENT_FLUSH_MAX_ATTEMPTS = int(os.getenv("EVENT_FLUSH_MAX_ATTEMPTS", "5"))
+
+
+class BufferFull(Exception):
+    """ Raised when the buffer stays full for longer than the submit timeout. """
+
+
+class EventBuffer:
+    """
+    An in-process buffer for analytics events.
+
+    `submit` assigns ids and timestamps and returns immediately; a background thread
+    writes the buffered rows with one multi-row INSERT and one commit whenever
+    `flush_size` events are waiting or `flush_interval` seconds have passed, so
+    analytics traffic takes the database write lock a few times a second instead of
+    once per event. When `max_size` events are waiting, submitters block for up to
+    `submit_timeout` seconds and then get `BufferFull`. A batch that fails to write
+    goes back to the front of the buffer and is retried on the next flush; it is only
+    dropped after `max_attempts` failures. `stop()` drains what is left.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        flush_size: int = 500,
+        flush_interval: float = 2.0,
+        submit_timeout: float = 1.0,
+        max_attempts: int = 5,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self._pending: "deque[Dict]" = deque()
+        # Failed writes per event id, for events waiting to be retried.
+        self._attempts: Dict[uuid.UUID, int] = {}
+        self._condition = threading.Condition()
+        # Serializes writers so a manual flush and the background flush never interleave.
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.accepted = 0
+        self.written = 0
+        self.rejected = 0
+        self.failed = 0
+        self.dropped = 0
+
+    # --- Producers ---
+    @staticmethod
+    def _rows(user_id: uuid.UUID, events: List[schemas.EventCreate]) -> List[Dict]:
+        now = datetime.now(timezone.utc)
+        return [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "event_name": event.event_name,
+                "properties": event.properties,
+                "created_at": now,
+            }
+            for event in events
+        ]
+
+    def try_submit(self, user_id: uuid.UUID, events: List[schemas.EventCreate]) -> Optional[List[schemas.Event]]:
+        """
+        Non-blocking `submit`: returns None instead of waiting when the buffer is full.
+        Safe to call from the event loop.
+        """
+        rows = self._rows(user_id, events)
+        self.start()
+        with self._condition:
+            if len(self._pending) + len(rows) > self.max_size:
+                self._condition.notify_all()
+                return None
+            self._pending.extend(rows)
+            self.accepted += len(rows)
+            if len(self._pending) >= self.flush_size:
+                self._condition.notify_all()
+        return [schemas.Event(**row) for row in rows]
+
+    def submit(self, user_id: uuid.UUID, events: List[schemas.EventCreate]) -> List[schemas.Event]:
+        """
+        Buffers `events` for `user_id` and returns them as they will be stored.
+        Raises BufferFull if there is no room within `submit_timeout`.
+        """
+        rows = self._rows(user_id, events)
+        self.start()
+
+        deadline = time.monotonic() + self.submit_timeout
+        with self._condition:
+            while len(self._pending) + len(rows) > self.max_size:
+                # Wake the flusher and wait for it to make room.
+                self._condition.notify_all()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    if len(self._pending) + len(rows) > self.max_size:
+                        self.rejected += len(rows)
+                        raise BufferFull("Too many analytics events are waiting to be written.")
+            self._pending.extend(rows)
+            self.accepted += len(rows)
+            if len(self._pending) >= self.flush_size:
+                self._condition.notify_all()
+
+        return [schemas.Event(**row) for row in rows]
+
+    # --- Writer ---
+    def _take_batch(self) -> List[Dict]:
+        with self._condition:
+            batch = [self._pending.popleft() for _ in range(min(self.flush_size, len(self._pending)))]
+            # Room was freed: wake any blocked submitters.
+            self._condition.notify_all()
+            return batch
+
+    def _write(self, batch: List[Dict]) -> bool:
+        """
+        Writes `batch` in one transaction. On failure the batch is requeued, and False returned.
+        """
+        db = self.session_factory()
+        try:
+            db.execute(insert(models.Event), batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            self.failed += len(batch)
+            logger.warning("Failed to write %d analytics events: %s", len(batch), e)
+            self._requeue(batch)
+            return False
+        finally:
+            db.close()
+        self.written += len(batch)
+        with self._condition:
+            for row in batch:
+                self._attempts.pop(row["id"], None)
+        return True
+
+    def _requeue(self, batch: List[Dict]):
+        """
+        Puts a failed batch back at the front of the buffer, in order, unless it has
+        already failed `max_attempts` times.
+        """
+        with self._condition:
+            attempts = max(self._attempts.get(row["id"], 0) for row in batch) + 1
+            if attempts >= self.max_attempts:
+                for row in batch:
+                    self._attempts.pop(row["id"], None)
+                self.dropped += len(batch)
+                logger.error("Dropping %d analytics events after %d failed writes.", len(batch), attempts)
+                return
+            for row in batch:
+                self._attempts[row["id"]] = attempts
+            self._pending.extendleft(reversed(batch))
+
+    def flush(self) -> int:
+        """
+        Writes everything buffered so far, in batches of `flush_size`. Stops at the
+        first failed batch, which the next flush retries. Returns the number of events written.
+        """
+        total = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take_batch()
+                if not batch or not self._write(batch):
+                    return total
+                total += len(batch)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._stopping and len(self._pending) < self.flush_size:
+                    self._condition.wait(self.flush_interval)
+                if self._stopping:
+                    return
+            self.flush()
+
+    # --- Lifecycle ---
+    def start(self):
+        """ Starts the background flusher, if it isn't running yet. """
+        with self._condition:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="event-buffer-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """ Stops the background flusher and writes every event still buffered. """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self) -> schemas.EventBufferStats:
+        with self._condition:
+            pending = len(self._pending)
+        return schemas.EventBufferStats(
+            pending=pending,
+            max_size=self.max_size,
+            accepted=self.accepted,
+            written=self.written,
+            rejected=self.rejected,
+            failed=self.failed,
+            dropped=self.dropped,
+        )
+
+
+buffer = EventBuffer(
+    max_size=EVENT_BUFFER_MAX_SIZE,
+    flush_size=EVENT_FLUSH_SIZE,
+    flush_interval=EVENT_FLUSH_INTERVAL_SECONDS,
+    submit_timeout=EVENT_SUBMIT_TIMEOUT_SECONDS,
+    max_attempts=EVENT_FLUSH_MAX_ATTEMPTS,
+)
@@ -0,0 +1,243 @@
+# backend/explanation_cache.py
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+from .schemas import AIExplanation
+
+CacheKey = Tuple[str, str, str]
+
+
+def normalize_word(word: str) -> str:
+    return unicodedata.normalize("NFC", word.strip()).lower()
+
+
+def context_hash(context: Optional[str]) -> str:
+    """
+    A short, stable hash of the whitespace-normalized context, or '' when there is none.
+    """
+    if not context:
+        return ""
+    normalized = " ".join(unicodedata.normalize("NFC", context).lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+class ExplanationCache:
+    """
+    Two-tier explanation cache.
+
+    The memory tier is an LRU bounded by `max_entries` whose entries expire after
+    `ttl_seconds`. Misses fall through to the `explanation_cache_entries` table,
+    which survives restarts and is shared by every worker. Hits from the table are
+    promoted back into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 30 * 24 * 3600,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.session_factory = session_factory
+        self._entries: "OrderedDict[CacheKey, Tuple[AIExplanation, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(language: str, word: str, context: Optional[str] = None) -> CacheKey:
+        return (language, normalize_word(word), context_hash(context))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic()
+
+    # --- Memory Tier ---
+    def get(self, key: CacheKey) -> Optional[AIExplanation]:
+        """
+        Looks the key up in memory only. Never touches the database.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            explanation, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return explanation
+
+    def put(self, key: CacheKey, explanation: AIExplanation):
+        """
+        Stores an explanation in memory, evicting the least recently used entries if full.
+        """
+        with self._lock:
+            self._entries[key] = (explanation, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # --- Persistent Tier ---
+    def load(self, key: CacheKey) -> Optional[AIExplanation]:
+        """
+        Looks the key up in the database and promotes a fresh hit into memory.
+        Counts a miss when neither tier has the key.
+        """
+        language, word, ctx_hash = key
+        db = self.session_factory()
+        try:
+            row = db.get(models.ExplanationCacheEntry, (language, word, ctx_hash))
+            if row is not None and not self._is_expired(row.created_at):
+                explanation = AIExplanation(**row.explanation)
+            else:
+                explanation = None
+        finally:
+            db.close()
+
+        if explanation is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.persistent_hits += 1
+        self.put(key, explanation)
+        return explanation
+
+    def load_many(self, keys: Iterable[CacheKey]) -> Dict[CacheKey, AIExplanation]:
+        """
+        Batched `load`: one query per (language, context) group instead of one per key.
+        """
+        groups: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+        for language, word, ctx_hash in keys:
+            groups[(language, ctx_hash)].add(word)
+
+        found: Dict[CacheKey, AIExplanation] = {}
+        requested = sum(len(words) for words in groups.values())
+        db = self.session_factory()
+        try:
+            for (language, ctx_hash), words in groups.items():
+                rows = db.query(models.ExplanationCacheEntry).filter(
+                    models.ExplanationCacheEntry.language == language,
+                    models.ExplanationCacheEntry.context_hash == ctx_hash,
+                    models.ExplanationCacheEntry.word.in_(words),
+                ).all()
+                for row in rows:
+                    if not self._is_expired(row.created_at):
+                        found[(language, row.word, ctx_hash)] = AIExplanation(**row.explanation)
+        finally:
+            db.close()
+
+        with self._lock:
+            self.persistent_hits += len(found)
+            self.misses += requested - len(found)
+        for key, explanation in found.items():
+            self.put(key, explanation)
+        return found
+
+    def warm(self, limit: int) -> int:
+        """
+        Loads the `limit` most recently stored explanations into memory, so a fresh worker
+        starts with the words readers are looking up right now. Doesn't touch the hit and
+        miss counters. Returns the number of entries loaded.
+        """
+        limit = min(limit, self.max_entries)
+        if limit <= 0:
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        db = self.session_factory()
+        try:
+            rows = db.query(models.ExplanationCacheEntry).filter(
+                models.ExplanationCacheEntry.created_at > cutoff
+            ).order_by(models.ExplanationCacheEntry.created_at.desc()).limit(limit).all()
+            entries = [((row.language, row.word, row.context_hash), AIExplanation(**row.explanation)) for row in rows]
+        finally:
+            db.close()
+
+        # Oldest first, so the newest entries end up most recently used.
+        for key, explanation in reversed(entries):
+            self.put(key, explanation)
+        return len(entries)
+
+    def store(self, key: CacheKey, explanation: AIExplanation):
+        """
+        Writes an explanation through to both tiers.
+        """
+        self.put(key, explanation)
+        self.store_many({key: explanation}, memory=False)
+
+    def store_many(self, explanations: Dict[CacheKey, AIExplanation], memory: bool = True):
+        """
+        Writes several explanations through to the database in one transaction.
+        """
+        if not explanations:
+            return
+        if memory:
+            for key, explanation in explanations.items():
+                self.put(key, explanation)
+        now = datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            for (language, word, ctx_hash), explanation in explanations.items():
+                db.merge(models.ExplanationCacheEntry(
+                    language=language,
+                    word=word,
+                    context_hash=ctx_hash,
+                    explanation=explanation.model_dump(),
+                    created_at=now,
+                ))
+            db.commit()
+        except Exception as e:
+            # The memory tier still holds the result; losing the write only costs a future lookup.
+            print(f"Could not persist explanation cache entries: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def _is_expired(self, created_at: datetime) -> bool:
+        if created_at.tzinfo is None:
+            # SQLite drops the timezone; values are always written in UTC.
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return created_at + timedelta(seconds=self.ttl_seconds) <= datetime.now(timezone.utc)
+
+    # --- Introspection ---
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def clear(self):
+        """
+        Empties the memory tier and resets the counters. The database tier is left intact.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.persistent_hits = self.misses = self.evictions = self.expirations = 0
@@ -1,31 +1,54 @@
 # backend/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from pathlib import Path
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from datetime import timedelta, datetime, timezone
+from datetime import date, timedelta, datetime, timezone
 
 # --- Robust Environment Loading ---
 env_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 # --- Local Module Imports ---
-from . import ai, crud, models, schemas, security
-from .database import get_db, engine
+from . import ai, async_crud, crud, events, reading_sessions, replicas, rollups, schemas, security, srs_forecast, startup
+from .database import get_async_db, get_db
+from .replicas import get_async_read_db, get_read_db
 
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if startup.CREATE_SCHEMA_ON_STARTUP:
+        startup.create_schema()
+    if startup.WARMUP_ON_STARTUP:
+        await startup.warm_up()
+    events.buffer.start()
+    reading_sessions.coalescer.start()
+    rollups.scheduler.start()
+    startup.mark_ready()
+    yield
+    startup.mark_ready(False)
+    rollups.scheduler.stop()
+    # Write every buffered analytics event and pending heartbeat before the process exits.
+    events.buffer.stop()
+    reading_sessions.coalescer.stop()
+    await replicas.router.dispose()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # --- CORS Middleware ---
 origins = [
     "http://localhost",
     "http://localhost:3000",
 ]
+# Hands writers a last-write cookie so their next reads skip lagging replicas.
+app.middleware("http")(replicas.track_writes)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -36,6 +59,17 @@ app.add_middleware(
 
 # --- API Endpoints ---
 
+# --- Health Endpoints ---
+@app.get("/health/ready", tags=["Health"])
+def readiness_endpoint(response: Response):
+    """
+    200 once the worker has finished its startup steps, 503 before that and while shutting down.
+    """
+    if not startup.is_ready():
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        return {"status": "starting"}
+    return {"status": "ready"}
+
 # --- User & Auth Endpoints ---
 @app.post("/users/", response_model=schemas.User, tags=["Users"])
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
@@ -45,8 +79,8 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     return crud.create_user(db=db, user=user)
 
 @app.post("/token", response_model=schemas.Token, tags=["Users"])
-def login_for_access_token(db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()):
-    user = crud.authenticate_user(db, email=form_data.username, password=form_data.password)
+async def login_for_access_token(db: AsyncSession = Depends(get_async_db), form_data: OAuth2PasswordRequestForm = Depends()):
+    user = await async_crud.authenticate_user(db, email=form_data.username, password=form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -74,7 +108,7 @@ def read_users_me(current_user: schemas.User = Depends(security.get_current_user
 def log_reading_activity_endpoint(
     request: LogActivityRequest,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+    current_user: schemas.Principal = Depends(security.get_current_principal)
 ):
     """
     Logs reading activity for the current user.
@@ -87,10 +121,22 @@ def log_reading_activity_endpoint(
         db=db, user_id=current_user.id, minutes=request.minutes
     )
 
+@app.post("/users/me/reading/heartbeat", status_code=status.HTTP_202_ACCEPTED, tags=["Users"])
+async def reading_heartbeat_endpoint(
+    heartbeat: schemas.ReadingHeartbeat,
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
+):
+    """
+    Records minutes read and paragraph progress. Heartbeats are coalesced in memory
+    and written every few seconds, so the response does not wait for the database.
+    """
+    reading_sessions.coalescer.record(current_user.id, heartbeat)
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
 @app.get("/users/me/stats", response_model=schemas.UserStats, tags=["Users"])
 def get_user_stats_endpoint(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal)
 ):
     """
     Calculates and returns key stats for the authenticated user's dashboard.
@@ -98,10 +144,10 @@ def get_user_stats_endpoint(
     stats = crud.get_user_stats(db=db, user=current_user)
     return stats
 
-@app.get("/users/me/recommendations", response_model=list[schemas.Book], tags=["Users"])
+@app.get("/users/me/recommendations", response_model=list[schemas.BookSummary], tags=["Users"])
 def get_user_recommendations_endpoint(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+    db: Session = Depends(get_read_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal)
 ):
     """
     Generates and returns book recommendations for the currently authenticated user.
@@ -110,89 +156,270 @@ def get_user_recommendations_endpoint(
     return recommendations
 
 # --- Book Endpoints ---
-@app.get("/books/", response_model=List[schemas.Book], tags=["Books"])
-def read_books_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+MAX_CONTENT_WINDOW = 500
+
+@app.get("/books/", response_model=List[schemas.BookSummary], tags=["Books"])
+def read_books_endpoint(skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     return crud.get_books(db, skip=skip, limit=limit)
 
-@app.get("/books/{book_id}", response_model=schemas.Book, tags=["Books"])
-def read_book_endpoint(book_id: UUID, db: Session = Depends(get_db)):
+@app.get("/books/{book_id}", response_model=schemas.BookSummary, tags=["Books"])
+def read_book_endpoint(book_id: UUID, db: Session = Depends(get_read_db)):
     db_book = crud.get_book(db, book_id=book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
     return db_book
 
 @app.get("/books/{book_id}/content", response_model=List[schemas.BookContent], tags=["Books"])
-def read_book_content_endpoint(book_id: UUID, db: Session = Depends(get_db)):
+async def read_book_content_endpoint(
+    book_id: UUID,
+    start: Optional[int] = Query(None, alias="from", ge=0),
+    count: Optional[int] = Query(None, ge=1, le=MAX_CONTENT_WINDOW),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Returns the book's paragraphs. Use `?from=<paragraph_index>&count=<n>` to fetch
+    only the window the reader is displaying.
+    """
+    db_book = await async_crud.get_book(db, book_id=book_id)
+    if db_book is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    return await async_crud.get_content_for_book(db=db, book_id=book_id, start=start, count=count)
+
+@app.get("/books/{book_id}/content/stream", tags=["Books"])
+def stream_book_content_endpoint(book_id: UUID, db: Session = Depends(get_read_db)):
+    """
+    Streams the full book as NDJSON, one paragraph per line, for downloads.
+    """
     db_book = crud.get_book(db, book_id=book_id)
     if db_book is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    return crud.get_content_for_book(db=db, book_id=book_id)
 
-# --- AI Endpoint ---
+    def ndjson_lines():
+        try:
+            for paragraph in crud.iter_content_for_book(db=db, book_id=book_id):
+                yield schemas.BookContent.model_validate(paragraph).model_dump_json() + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+# --- AI Endpoints ---
+MAX_BATCH_EXPLAIN_WORDS = 200
+
 @app.post("/explain", response_model=schemas.ExplainResponse, tags=["AI"])
-def explain_word_endpoint(request: schemas.ExplainRequest):
-    explanation = ai.get_ai_explanation(
+async def explain_word_endpoint(request: schemas.ExplainRequest):
+    explanation = await ai.get_ai_explanation(
         word=request.word, 
         context=request.context,
         language="es" # Hardcoded for now
     )
     return schemas.ExplainResponse(explanation=explanation)
 
+@app.post("/explain/batch", response_model=schemas.BatchExplainResponse, tags=["AI"])
+async def explain_batch_endpoint(request: schemas.BatchExplainRequest):
+    """
+    Explains every requested word (or every word of a paragraph) in one round-trip.
+    Results are keyed by the lowercased word.
+    """
+    words = request.words if request.words else ai.extract_words(request.paragraph or "", request.language)
+    if not words:
+        raise HTTPException(status_code=400, detail="Provide a paragraph or a list of words.")
+    if len(words) > MAX_BATCH_EXPLAIN_WORDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_EXPLAIN_WORDS} words per batch.")
+
+    explanations = await ai.get_ai_explanations(
+        words=words,
+        context=request.context or request.paragraph or "",
+        language=request.language
+    )
+    return schemas.BatchExplainResponse(explanations=explanations)
+
+@app.get("/explain/cache/stats", response_model=schemas.ExplanationCacheStats, tags=["AI"])
+def explanation_cache_stats_endpoint(admin: schemas.Principal = Depends(security.get_admin_principal)):
+    """
+    Hit, miss and eviction counters of this worker's explanation cache.
+    """
+    return ai.explanation_cache.stats()
+
 # --- Vocabulary Endpoints (CLEANED UP AND REORDERED) ---
 
-@app.get("/vocabulary/due-for-review", response_model=list[schemas.Vocabulary], tags=["Vocabulary"])
-def get_due_vocabulary_for_user_endpoint(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+@app.get("/vocabulary/due-for-review", response_model=schemas.DueVocabularyPage, tags=["Vocabulary"])
+async def get_due_vocabulary_for_user_endpoint(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
+):
+    """
+    Fetches vocabulary words that are due for review for the current user, most overdue first.
+    When more are due, `next_cursor` fetches the next batch.
+    """
+    try:
+        due_words, next_cursor = await async_crud.get_due_vocabulary(db=db, user_id=current_user.id, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return schemas.DueVocabularyPage(items=due_words, next_cursor=next_cursor)
+
+@app.get("/vocabulary/due-count", response_model=schemas.DueCount, tags=["Vocabulary"])
+async def get_due_count_endpoint(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
 ):
-    """ Fetches vocabulary words that are due for review for the current user. """
-    due_words = db.query(models.Vocabulary).filter(
-        models.Vocabulary.user_id == current_user.id,
-        models.Vocabulary.next_review_at <= datetime.now(timezone.utc)
-    ).all()
-    return due_words
+    """ Number of words due for review, for badges. """
+    return schemas.DueCount(due=await async_crud.count_due_vocabulary(db=db, user_id=current_user.id))
+
+@app.get("/vocabulary/forecast", response_model=schemas.ReviewForecast, tags=["Vocabulary"])
+def review_forecast_endpoint(
+    days: int = Query(30, ge=1, le=365),
+    distribution: Optional[str] = Query(None, description='Rating shares, e.g. "5:0.3,4:0.4,3:0.2,1:0.1".'),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal)
+):
+    """
+    Forecasts how many reviews the current user will have on each of the next `days` days.
+    """
+    try:
+        rating_distribution = srs_forecast.parse_distribution(distribution) if distribution else srs_forecast.DEFAULT_RATING_DISTRIBUTION
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cards, daily = srs_forecast.forecast_for_user(db, user_id=current_user.id, days=days, distribution=rating_distribution)
+    return schemas.ReviewForecast(
+        start_date=datetime.now(timezone.utc).date(),
+        cards=cards,
+        daily_reviews=[round(float(reviews), 2) for reviews in daily],
+    )
+
+@app.get("/vocabulary/", response_model=schemas.VocabularyPage, tags=["Vocabulary"])
+def list_vocabulary_endpoint(
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, description="Only words starting with this prefix."),
+    due: bool = Query(False, description="Only words due for review."),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal)
+):
+    """ Lists the current user's vocabulary newest first, one page at a time. """
+    try:
+        return crud.get_vocabulary_page(
+            db=db, user_id=current_user.id, limit=limit, cursor=cursor, search=q, due_only=due
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/vocabulary/", response_model=schemas.Vocabulary, tags=["Vocabulary"])
 def create_vocabulary_entry_endpoint(
     vocabulary: schemas.VocabularyCreate,
     db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+    current_user: schemas.Principal = Depends(security.get_current_principal)
 ):
     """ Save a new vocabulary word for the currently authenticated user. """
     return crud.create_vocabulary_entry(db=db, vocabulary=vocabulary, user_id=current_user.id)
 
+MAX_REVIEW_BATCH_SIZE = 1000
+
+@app.post("/vocabulary/reviews/batch", response_model=schemas.ReviewBatchResponse, tags=["Vocabulary"])
+async def review_vocabulary_batch_endpoint(
+    request: schemas.ReviewBatchRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
+):
+    """
+    Applies a whole practice session's reviews (e.g. after being offline) in one transaction.
+    Unknown ids, or ids of another user's words, are returned in `not_found`.
+    """
+    if len(request.reviews) > MAX_REVIEW_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_REVIEW_BATCH_SIZE} reviews per batch.")
+    return await async_crud.review_vocabulary_batch(db=db, user_id=current_user.id, reviews=request.reviews)
+
 @app.post("/vocabulary/{vocab_id}/review", response_model=schemas.Vocabulary, tags=["Vocabulary"])
-def review_vocabulary_word_endpoint(
+async def review_vocabulary_word_endpoint(
     vocab_id: UUID,
     request: schemas.ReviewRequest,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
 ):
     """ Updates the SRS data for a specific vocabulary word after a user reviews it. """
-    vocab_item = db.query(models.Vocabulary).filter(
-        models.Vocabulary.id == vocab_id,
-        models.Vocabulary.user_id == current_user.id
-    ).first()
+    vocab_item = await async_crud.get_owned_vocabulary(db, user_id=current_user.id, vocab_id=vocab_id)
 
     if not vocab_item:
         raise HTTPException(status_code=404, detail="Vocabulary item not found.")
     if not (0 <= request.performance_rating <= 5):
         raise HTTPException(status_code=400, detail="Performance rating must be between 0 and 5.")
 
-    return crud.update_vocabulary_srs(
+    return await async_crud.update_vocabulary_srs(
         db=db,
         vocab_item=vocab_item,
         performance_rating=request.performance_rating
     )
 
 # --- Analytics Endpoint ---
+MAX_EVENT_BATCH_SIZE = 500
+
+async def _buffer_events(user_id: UUID, new_events: List[schemas.EventCreate]) -> List[schemas.Event]:
+    buffered = events.buffer.try_submit(user_id, new_events)
+    if buffered is not None:
+        return buffered
+    # The buffer is full: wait for room off the event loop.
+    try:
+        return await asyncio.to_thread(events.buffer.submit, user_id, new_events)
+    except events.BufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
 @app.post("/events/log", response_model=schemas.Event, tags=["Analytics"])
-def log_event_endpoint(
+async def log_event_endpoint(
     event: schemas.EventCreate,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(security.get_current_user)
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
 ):
     """
     Logs a generic user event for analytics purposes.
+    The event is buffered and written with others shortly after; the response is what will be stored.
+    """
+    return (await _buffer_events(current_user.id, [event]))[0]
+
+@app.post("/events/log/batch", response_model=schemas.EventBatchResponse, tags=["Analytics"])
+async def log_events_batch_endpoint(
+    request: schemas.EventBatchRequest,
+    current_user: schemas.Principal = Depends(security.get_current_principal_async)
+):
+    """
+    Logs many events in one request.
+    """
+    if len(request.events) > MAX_EVENT_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EVENT_BATCH_SIZE} events per batch.")
+    return schemas.EventBatchResponse(accepted=len(await _buffer_events(current_user.id, request.events)))
+
+@app.get("/analytics/rollups", response_model=List[schemas.EventRollup], tags=["Analytics"])
+def event_rollups_endpoint(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    event_name: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    admin: schemas.Principal = Depends(security.get_admin_principal)
+):
+    """
+    Daily event counts and distinct users, read from the rollup table (see backend/rollups.py).
+    """
+    return rollups.get_rollups(db, start=start, end=end, event_name=event_name)
+
+@app.get("/events/buffer/stats", response_model=schemas.EventBufferStats, tags=["Analytics"])
+def event_buffer_stats_endpoint(admin: schemas.Principal = Depends(security.get_admin_principal)):
+    """
+    Returns the event buffer's depth and write counters.
+    """
+    return events.buffer.stats()
+
+# --- Database Endpoints ---
+@app.get("/database/read-routing/stats", response_model=schemas.ReadRoutingStats, tags=["Database"])
+def read_routing_stats_endpoint(admin: schemas.Principal = Depends(security.get_admin_principal)):
+    """
+    Returns how many reads this worker sent to the primary and to replicas.
+    """
+    return replicas.router.stats()
+
+# --- Admin Endpoints ---
+@app.get("/admin/reading/heartbeats/stats", response_model=schemas.HeartbeatStats, tags=["Admin"])
+def reading_heartbeat_stats_endpoint(admin: schemas.Principal = Depends(security.get_admin_principal)):
+    """
+    Returns this worker's heartbeat coalescer pending count and write counters.
     """
-    return crud.create_event(db=db, user_id=current_user.id, event=event)
+    return reading_sessions.coalescer.stats()
@@ -1,11 +1,16 @@
 import uuid
-from sqlalchemy import Column, Integer, String, DateTime, func, Text, ForeignKey, Float, Date, UniqueConstraint, Table
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, func, Text, ForeignKey, Float, Date, UniqueConstraint, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID 
 from sqlalchemy.types import JSON # Import generic JSON
 from .database import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 # --- Event Model for Analytics ---
 class Event(Base):
     __tablename__ = 'events'
@@ -14,16 +19,82 @@ class Event(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     event_name = Column(String, index=True, nullable=False)
     properties = Column(JSON, nullable=True) # Using JSONB for flexible event properties
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python as well so the (created_at, id) rollup watermark compares like for like.
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
 
     user = relationship("User")
 
+    # Serves the rollup job's keyset scan past its watermark
+    __table_args__ = (Index('ix_events_created_id', 'created_at', 'id'),)
+
+
+# --- Event Rollup Models ---
+class EventDailyRollup(Base):
+    """
+    Per-day, per-event-name totals, maintained incrementally by backend/rollups.py.
+    """
+    __tablename__ = 'event_daily_rollups'
+
+    day = Column(Date, primary_key=True)
+    event_name = Column(String, primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    user_count = Column(Integer, nullable=False, default=0)
+
+
+class EventDailyUser(Base):
+    """
+    The users seen per day and event name, so distinct-user counts can be advanced incrementally.
+    """
+    __tablename__ = 'event_daily_users'
+
+    day = Column(Date, primary_key=True)
+    event_name = Column(String, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+
+
+class RollupWatermark(Base):
+    """
+    The (created_at, id) of the last raw event a rollup has consumed.
+    """
+    __tablename__ = 'rollup_watermarks'
+
+    name = Column(String, primary_key=True)
+    last_created_at = Column(DateTime(timezone=True), nullable=True)
+    last_event_id = Column(UUID(as_uuid=True), nullable=True)
+
+
+# --- Catalog Version ---
+class CatalogVersion(Base):
+    """
+    A single row whose `version` is bumped whenever book word links are written or
+    deleted, so each process can tell cheaply that its coverage index is stale.
+    """
+    __tablename__ = 'catalog_version'
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(Integer, nullable=False, default=0)
+
+
+# --- ExplanationCacheEntry Model ---
+# Persistent tier of the AI explanation cache, shared by every worker and kept across restarts.
+class ExplanationCacheEntry(Base):
+    __tablename__ = 'explanation_cache_entries'
+
+    language = Column(String, primary_key=True)
+    word = Column(String, primary_key=True)
+    # Hash of the normalized context sentence, or '' for context-free entries
+    context_hash = Column(String, primary_key=True, default='')
+    explanation = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
 
 # --- BookWordLink Association Table ---
 # This table creates the many-to-many relationship between books and their unique words.
 BookWordLink = Table('book_word_links', Base.metadata,
     Column('book_id', UUID(as_uuid=True), ForeignKey('books.id'), primary_key=True),
-    Column('word_id', UUID(as_uuid=True), ForeignKey('words.id'), primary_key=True)
+    Column('word_id', UUID(as_uuid=True), ForeignKey('words.id'), primary_key=True),
+    # How many times the word occurs in the book (token count, not just presence)
+    Column('occurrences', Integer, nullable=False, default=1, server_default='1')
 )
 
 
@@ -58,6 +129,20 @@ class ReadingActivity(Base):
     # Establish the relationship back to the User
     user = relationship("User", back_populates="reading_history")
 
+
+# --- ReadingStreak Model ---
+class ReadingStreak(Base):
+    """
+    A user's streak state, kept up to date by `crud.log_or_update_reading_activity`
+    so stats never have to walk `reading_activities`. `crud.recompute_reading_streak` repairs it.
+    """
+    __tablename__ = "reading_streaks"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_active_date = Column(Date, nullable=True)
+
 # --- UserBookLink Model ---
 # This table tracks a user's personal progress in a specific book
 class UserBookLink(Base):
@@ -100,6 +185,8 @@ class Book(Base):
     genre = Column(String, nullable=True)
     cover_image_url = Column(String, nullable=True)
     rating = Column(Float, nullable=True)
+    # Total number of word tokens in the book; the denominator for token-weighted coverage
+    total_tokens = Column(Integer, nullable=False, default=0, server_default='0')
 
     content = relationship("BookContent", back_populates="book", cascade="all, delete-orphan")
     users_tracking_progress = relationship("UserBookLink", back_populates="book", cascade="all, delete-orphan")
@@ -119,6 +206,9 @@ class BookContent(Base):
     original_text = Column(Text, nullable=False)
     translated_text = Column(Text, nullable=False)
 
+    # Serves ordered range scans of a book's paragraphs (windowed reads and streaming)
+    __table_args__ = (Index('ix_book_content_book_paragraph', 'book_id', 'paragraph_index'),)
+
     book = relationship("Book", back_populates="content")
 
 # --- Vocabulary Model ---
@@ -130,12 +220,21 @@ class Vocabulary(Base):
     word = Column(String, index=True, nullable=False)
     definition = Column(Text, nullable=False)
     context_sentence = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set in Python as well so the stored format always matches bound parameters;
+    # the (created_at, id) keyset cursor compares against it.
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
 
     # --- SRS FIELDS ---
-    next_review_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    next_review_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False)
     interval = Column(Integer, default=1, nullable=False)
     ease_factor = Column(Float, default=2.5, nullable=False)
 
+    __table_args__ = (
+        # Serves the newest-first, keyset-paginated vocabulary listing
+        Index('ix_vocabulary_user_created', 'user_id', 'created_at', 'id'),
+        # Serves the most-overdue-first review queue and the due count
+        Index('ix_vocabulary_user_next_review', 'user_id', 'next_review_at'),
+    )
+
     # Establish the relationship back to the User
     owner = relationship("User", back_populates="vocabulary")
\ No newline at end of file
@@ -1,15 +1,21 @@
 # backend/populate_db.py
 import sys
 import os
-import re
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from uuid import UUID, uuid4
+from sqlalchemy import delete, insert, select
 from sqlalchemy.orm import Session
-from typing import Set
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from backend.coverage import bump_catalog_version, invalidate_coverage_index
 from backend.database import SessionLocal, engine
-from backend.models import Base, Book, BookContent, Word # 1. Import the new Word model
+from backend.tokenizers import get_tokenizer
+from backend.models import Base, Book, BookContent, BookWordLink, UserBookLink, Word
 
 # --- Configuration for Books to Add ---
 books_to_add = [
@@ -45,97 +51,121 @@ books_to_add = [
     },
 ]
 
-# --- NEW: Text Normalization and Word Extraction Function ---
-def normalize_and_extract_words(text: str) -> Set[str]:
+UNTRANSLATED_TEXT = "[Translation not available]"
+
+# Paragraph rows sent per executemany while streaming a book into the database
+CONTENT_BATCH_SIZE = 1000
+
+# --- Text Normalization and Word Extraction ---
+# Tokenization is language-specific; see backend/tokenizers.py for the rules per language.
+def iter_words(text: str, language: str) -> Iterator[str]:
+    """
+    Lazily yields the normalized (lowercased) words of a piece of text.
+    """
+    return get_tokenizer(language).iter_tokens(text)
+
+
+def normalize_and_extract_words(text: str, language: str = "") -> Set[str]:
     """
     Normalizes text by converting to lowercase, removing punctuation,
     and returns a set of unique words.
     """
-    # Convert to lowercase
-    text = text.lower()
-    # Find all sequences of word characters (alphanumeric)
-    words = re.findall(r'\b[a-z\']+\b', text)
-    return set(words)
+    return set(iter_words(text, language))
+
+
+def count_words(paragraphs: Iterable[str], language: str) -> Counter:
+    """
+    Accumulates per-word occurrence counts one paragraph at a time, so memory is
+    bounded by the vocabulary size rather than the length of the text.
+    """
+    return Counter(get_tokenizer(language).iter_stream(paragraphs))
+
+
+MIN_PARAGRAPH_LENGTH = 20
+
+
+def iter_paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Yields the paragraphs between the Project Gutenberg START/END markers as they are read.
+    Paragraphs are separated by blank lines; fragments shorter than 20 characters are dropped.
+    Only the lines of the current paragraph are held in memory.
+    """
+    in_content_section = False
+    paragraph_buffer = []
+
+    for line in lines:
+        stripped_line = line.strip()
+
+        if '*** START OF THE PROJECT GUTENBERG EBOOK' in stripped_line.upper():
+            in_content_section = True
+            paragraph_buffer = []
+            continue
+
+        if '*** END OF THE PROJECT GUTENBERG EBOOK' in stripped_line.upper():
+            break
+
+        if not in_content_section:
+            continue
+
+        if not stripped_line:
+            if paragraph_buffer:
+                full_paragraph = " ".join(paragraph_buffer)
+                if len(full_paragraph) >= MIN_PARAGRAPH_LENGTH:
+                    yield full_paragraph
+                paragraph_buffer = []
+        else:
+            paragraph_buffer.append(stripped_line)
+
+    if in_content_section and paragraph_buffer:
+        full_paragraph = " ".join(paragraph_buffer)
+        if len(full_paragraph) >= MIN_PARAGRAPH_LENGTH:
+            yield full_paragraph
 
 
 def parse_and_add_content(db: Session, book_record: Book, file_path: str):
     """
     Parses a text file, adds its content as paragraphs, and analyzes its unique vocabulary.
+    This is the ORM path, one object at a time; `bulk_ingest_book` is much faster.
     """
     print(f"Opening '{file_path}' to populate content for '{book_record.title}'...")
-    full_text_content = []
     try:
+        word_counts: Counter = Counter()
+        paragraph_count = 0
         with open(file_path, "r", encoding="utf-8") as f:
-            in_content_section = False
-            paragraph_buffer = []
-            paragraph_index = 0
-
-            for line in f:
-                stripped_line = line.strip()
-
-                if '*** START OF THE PROJECT GUTENBERG EBOOK' in stripped_line.upper():
-                    in_content_section = True
-                    paragraph_buffer = []
-                    continue
-
-                if '*** END OF THE PROJECT GUTENBERG EBOOK' in stripped_line.upper():
-                    break
-
-                if not in_content_section:
-                    continue
-
-                if not stripped_line:
-                    if paragraph_buffer:
-                        full_paragraph = " ".join(paragraph_buffer)
-                        if len(full_paragraph) >= 20:
-                            book_content = BookContent(
-                                book_id=book_record.id,
-                                paragraph_index=paragraph_index,
-                                original_text=full_paragraph,
-                                translated_text="[Translation not available]"
-                            )
-                            db.add(book_content)
-                            full_text_content.append(full_paragraph) # Store for analysis
-                            paragraph_index += 1
-                        paragraph_buffer = []
-                else:
-                    paragraph_buffer.append(stripped_line)
-
-            if in_content_section and paragraph_buffer:
-                full_paragraph = " ".join(paragraph_buffer)
-                if len(full_paragraph) >= 20:
-                    book_content = BookContent(
-                        book_id=book_record.id,
-                        paragraph_index=paragraph_index,
-                        original_text=full_paragraph,
-                        translated_text="[Translation not available]"
-                    )
-                    db.add(book_content)
-                    full_text_content.append(full_paragraph) # Store for analysis
-                    paragraph_index += 1
-
-            if paragraph_index > 0:
-                print(f"Successfully added {paragraph_index} paragraphs to '{book_record.title}'.")
-            else:
-                 print(f"Warning: No paragraphs were found for '{book_record.title}'. Check the markers in the file.")
+            for paragraph_index, full_paragraph in enumerate(iter_paragraphs(f)):
+                db.add(BookContent(
+                    book_id=book_record.id,
+                    paragraph_index=paragraph_index,
+                    original_text=full_paragraph,
+                    translated_text=UNTRANSLATED_TEXT
+                ))
+                word_counts.update(iter_words(full_paragraph, book_record.language))
+                paragraph_count += 1
+
+        if paragraph_count:
+            print(f"Successfully added {paragraph_count} paragraphs to '{book_record.title}'.")
+        else:
+            print(f"Warning: No paragraphs were found for '{book_record.title}'. Check the markers in the file.")
 
         # --- NEW: Vocabulary Analysis Pipeline ---
-        if full_text_content:
-            print(f"Analyzing unique vocabulary for '{book_record.title}'...")
-            combined_text = " ".join(full_text_content)
-            unique_words = normalize_and_extract_words(combined_text)
-            print(f"Found {len(unique_words)} unique words.")
+        if word_counts:
+            print(f"Found {len(word_counts)} unique words in '{book_record.title}'.")
+            book_record.total_tokens = sum(word_counts.values())
 
-            for word_text in unique_words:
+            links = []
+            for word_text, occurrences in word_counts.items():
                 # Check if word already exists in the master list for this language
                 db_word = db.query(Word).filter(Word.text == word_text, Word.language == book_record.language).first()
                 if not db_word:
                     # If it doesn't exist, create it
                     db_word = Word(text=word_text, language=book_record.language)
                     db.add(db_word)
+                    db.flush()
                 
-                # Link the word to the book
-                book_record.unique_words.append(db_word)
+                # Link the word to the book, recording how often it occurs
+                links.append({"book_id": book_record.id, "word_id": db_word.id, "occurrences": occurrences})
+            db.execute(insert(BookWordLink), links)
+            bump_catalog_version(db)
             
             print(f"Finished linking vocabulary for '{book_record.title}'.")
 
@@ -147,7 +177,139 @@ def parse_and_add_content(db: Session, book_record: Book, file_path: str):
         db.rollback()
 
 
-def populate_database():
+# --- Bulk Ingestion Pipeline ---
+def parse_book_file(file_path: str, language: str) -> Optional[Counter]:
+    """
+    Streams one source file and returns its per-word occurrence counts.
+    Runs in a worker process; memory stays bounded by the vocabulary, not the file size.
+    Returns None if the file does not exist.
+    """
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            return count_words(iter_paragraphs(f), language)
+    except FileNotFoundError:
+        return None
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_word_ids(db: Session, language: str) -> Dict[str, UUID]:
+    """
+    Preloads the text -> id map of every known word in a language with one query.
+    """
+    rows = db.execute(select(Word.text, Word.id).where(Word.language == language))
+    return {text: word_id for text, word_id in rows}
+
+
+def insert_missing_words(db: Session, language: str, words: Iterable[str], word_ids: Dict[str, UUID]) -> int:
+    """
+    Inserts the words that are not yet in `word_ids` with a single executemany,
+    and adds their new ids to the map. Returns the number of words inserted.
+    """
+    new_rows = [
+        {"id": uuid4(), "text": text, "language": language}
+        for text in words if text not in word_ids
+    ]
+    if new_rows:
+        db.execute(insert(Word), new_rows)
+        for row in new_rows:
+            word_ids[row["text"]] = row["id"]
+    return len(new_rows)
+
+
+def bulk_ingest_book(db: Session, book_id: UUID, language: str, paragraphs: Iterable[str],
+                     word_counts: Mapping[str, int], word_ids: Dict[str, UUID]):
+    """
+    Writes a book's paragraphs, new words and word links with executemany inserts.
+    `paragraphs` may be a generator; it is consumed in batches of CONTENT_BATCH_SIZE.
+    """
+    rows = (
+        {
+            "id": uuid4(),
+            "book_id": book_id,
+            "paragraph_index": paragraph_index,
+            "original_text": paragraph,
+            "translated_text": UNTRANSLATED_TEXT,
+        }
+        for paragraph_index, paragraph in enumerate(paragraphs)
+    )
+    paragraph_count = 0
+    for batch in iter_batches(rows, CONTENT_BATCH_SIZE):
+        db.execute(insert(BookContent), batch)
+        paragraph_count += len(batch)
+
+    inserted = insert_missing_words(db, language, word_counts, word_ids)
+    if word_counts:
+        db.execute(insert(BookWordLink), [
+            {"book_id": book_id, "word_id": word_ids[text], "occurrences": occurrences}
+            for text, occurrences in word_counts.items()
+        ])
+        bump_catalog_version(db)
+    print(f"Added {paragraph_count} paragraphs and {len(word_counts)} word links ({inserted} new words).")
+
+
+def delete_book(db: Session, book_id: UUID):
+    """
+    Removes a book and everything that references it with set-based deletes.
+    """
+    db.execute(delete(BookWordLink).where(BookWordLink.c.book_id == book_id))
+    db.execute(delete(BookContent).where(BookContent.book_id == book_id))
+    db.execute(delete(UserBookLink).where(UserBookLink.book_id == book_id))
+    db.execute(delete(Book).where(Book.id == book_id))
+    bump_catalog_version(db)
+
+
+def bulk_populate(db: Session, books: List[dict], workers: Optional[int] = None):
+    """
+    Tokenizes every source file in parallel across a process pool, then writes each
+    book in its own transaction from this process (SQLite allows a single writer).
+    Workers only return word counts; paragraphs are streamed from the file again
+    straight into batched inserts, so no book is ever held in memory whole.
+    """
+    file_paths = [book_data["file_path"] for book_data in books]
+    languages = [book_data["language"] for book_data in books]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        word_counts_per_book = list(pool.map(parse_book_file, file_paths, languages))
+
+    word_ids_by_language: Dict[str, Dict[str, UUID]] = {}
+    for book_data, word_counts in zip(books, word_counts_per_book):
+        book_fields = {key: value for key, value in book_data.items() if key != "file_path"}
+        if word_counts is None:
+            print(f"Error: '{book_data['file_path']}' not found. Skipping this book.")
+            continue
+
+        for (existing_id,) in db.execute(select(Book.id).where(Book.title == book_fields["title"])).all():
+            print(f"Book '{book_fields['title']}' already exists. Deleting and recreating.")
+            delete_book(db, existing_id)
+
+        language = book_fields["language"]
+        if language not in word_ids_by_language:
+            word_ids_by_language[language] = load_word_ids(db, language)
+
+        book_id = uuid4()
+        db.execute(insert(Book), [{"id": book_id, "total_tokens": sum(word_counts.values()), **book_fields}])
+        print(f"Created book record for: '{book_fields['title']}'")
+        try:
+            with open(book_data["file_path"], "r", encoding="utf-8") as f:
+                bulk_ingest_book(db, book_id, language, iter_paragraphs(f), word_counts, word_ids_by_language[language])
+            db.commit()
+        except Exception as e:
+            print(f"An error occurred while ingesting {book_data['file_path']}: {e}")
+            db.rollback()
+            # The rolled-back transaction may have held new words; reload the map.
+            word_ids_by_language[language] = load_word_ids(db, language)
+
+
+def populate_database(bulk: bool = True, workers: Optional[int] = None):
     """
     Populates the database with books, their content, and their vocabulary.
     """
@@ -156,26 +318,33 @@ def populate_database():
     db = SessionLocal()
 
     try:
-        for book_data in books_to_add:
-            # Check if the book already exists
-            existing_book = db.query(Book).filter(Book.title == book_data["title"]).first()
-            if existing_book:
-                print(f"Book '{book_data['title']}' already exists. Deleting and recreating.")
-                db.delete(existing_book)
-                db.commit()
+        if bulk:
+            bulk_populate(db, [dict(book_data) for book_data in books_to_add], workers=workers)
+        else:
+            for book_data in books_to_add:
+                book_data = dict(book_data)
+                # Check if the book already exists
+                existing_book = db.query(Book).filter(Book.title == book_data["title"]).first()
+                if existing_book:
+                    print(f"Book '{book_data['title']}' already exists. Deleting and recreating.")
+                    db.delete(existing_book)
+                    bump_catalog_version(db)
+                    db.commit()
 
-            # Create a new book record
-            file_path = book_data.pop("file_path") # Remove file_path before creating Book
-            new_book = Book(**book_data)
-            db.add(new_book)
-            db.commit()
-            db.refresh(new_book)
-            print(f"Created book record for: '{new_book.title}'")
+                # Create a new book record
+                file_path = book_data.pop("file_path") # Remove file_path before creating Book
+                new_book = Book(**book_data)
+                db.add(new_book)
+                db.commit()
+                db.refresh(new_book)
+                print(f"Created book record for: '{new_book.title}'")
 
-            # Parse the text file and add its content and vocabulary
-            parse_and_add_content(db, new_book, file_path)
-            db.commit()
+                # Parse the text file and add its content and vocabulary
+                parse_and_add_content(db, new_book, file_path)
+                db.commit()
 
+        # The recommendation engine's book x word matrix must be rebuilt to include the new books.
+        invalidate_coverage_index()
         print("\nDatabase population complete.")
     except Exception as e:
         print(f"A critical error occurred: {e}")
@@ -184,4 +353,8 @@ def populate_database():
         db.close()
 
 if __name__ == "__main__":
-    populate_database()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Load the configured books into the database.")
+    parser.add_argument("--orm", action="store_true", help="Use the slow object-at-a-time ORM path instead of bulk inserts.")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (defaults to the CPU count).")
+    args = parser.parse_args()
+    populate_database(bulk=not args.orm, workers=args.workers)
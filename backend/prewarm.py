@@ -0,0 +1,157 @@
+# backend/prewarm.py
+import sys
+import os
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List, Optional, Set
+from uuid import UUID
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import ai
+from backend.database import SessionLocal
+from backend.models import Book, BookWordLink, Word
+
+DEFAULT_CHECKPOINT_PATH = "backend/prewarm_checkpoint.json"
+
+
+# --- Word Ranking ---
+def rank_book_words(db: Session, book: Book, top_n: int, rank_by: str = "frequency") -> List[str]:
+    """
+    Returns the book's top-N words to pre-explain.
+
+    "frequency" favours the words that occur most often in this book (the words every
+    reader of it will meet), then words shared by many books; "rarity" favours words
+    that appear in few books of the catalog (the words most likely to be clicked).
+    Ties are broken alphabetically so the ranking is stable across runs.
+    """
+    document_frequency = (
+        db.query(BookWordLink.c.word_id, func.count().label("books"))
+        .group_by(BookWordLink.c.word_id)
+        .subquery()
+    )
+    if rank_by == "frequency":
+        order = (BookWordLink.c.occurrences.desc(), document_frequency.c.books.desc())
+    else:
+        order = (document_frequency.c.books.asc(), BookWordLink.c.occurrences.desc())
+    rows = (
+        db.query(Word.text)
+        .join(BookWordLink, BookWordLink.c.word_id == Word.id)
+        .join(document_frequency, document_frequency.c.word_id == Word.id)
+        .filter(BookWordLink.c.book_id == book.id)
+        .order_by(*order, Word.text)
+        .limit(top_n)
+        .all()
+    )
+    return [text for (text,) in rows]
+
+
+# --- Checkpoints ---
+def load_checkpoint(path: Optional[str]) -> Dict[str, Set[str]]:
+    """
+    Returns {book_id: words already in the explanation cache}. Progress is kept by
+    word rather than by rank, so it stays valid when the catalog (and the ranking) changes.
+    Raises ValueError if the file isn't a checkpoint, rather than losing its progress.
+    """
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(
+        isinstance(words, list) and all(isinstance(word, str) for word in words) for words in data.values()
+    ):
+        raise ValueError(f"'{path}' is not a pre-warm checkpoint: expected {{book_id: [word, ...]}}.")
+    return {book_id: set(words) for book_id, words in data.items()}
+
+
+def save_checkpoint(path: Optional[str], checkpoint: Dict[str, Set[str]]):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({book_id: sorted(words) for book_id, words in checkpoint.items()}, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+# --- Pre-warming Job ---
+async def prewarm_explanations(
+    db: Session,
+    top_n: int = 200,
+    rank_by: str = "frequency",
+    words_per_minute: float = 300,
+    checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+    book_ids: Optional[List[str]] = None,
+) -> int:
+    """
+    Pre-populates the explanation cache with each book's top-N words.
+    Work is sent in batches of `ai.BATCH_PROMPT_SIZE` words, throttled to
+    `words_per_minute`, and checkpointed after every batch. Only words that reached
+    the cache are checkpointed; the run stops at the first batch the provider fails
+    entirely, so a later run retries the rest.
+    Returns the number of words cached in this run.
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    query = db.query(Book).order_by(Book.created_at, Book.title)
+    if book_ids:
+        query = query.filter(Book.id.in_([UUID(str(book_id)) for book_id in book_ids]))
+
+    processed = 0
+    for book in query.all():
+        done = checkpoint.setdefault(str(book.id), set())
+        words = [word for word in rank_book_words(db, book, top_n=top_n, rank_by=rank_by) if word not in done]
+        if not words:
+            continue
+
+        print(f"Pre-warming {len(words)} explanations for '{book.title}'...")
+        for start in range(0, len(words), ai.BATCH_PROMPT_SIZE):
+            batch = words[start:start + ai.BATCH_PROMPT_SIZE]
+            started_at = time.monotonic()
+            await ai.get_ai_explanations(words=batch, context="", language=book.language)
+
+            # Failed words come back as uncached error placeholders.
+            cached = [word for word in batch if ai.cache_key_for(word, "", book.language) in ai.explanation_cache]
+            done.update(cached)
+            processed += len(cached)
+            save_checkpoint(checkpoint_path, checkpoint)
+            if not cached:
+                print(f"The provider failed a whole batch for '{book.title}'; stopping. Re-run to resume.")
+                print(f"Pre-warming stopped: {processed} words processed.")
+                return processed
+
+            # Throughput limit: never go faster than `words_per_minute`.
+            if words_per_minute > 0:
+                min_duration = len(batch) * 60.0 / words_per_minute
+                elapsed = time.monotonic() - started_at
+                if elapsed < min_duration:
+                    await asyncio.sleep(min_duration - elapsed)
+
+    print(f"Pre-warming complete: {processed} words processed.")
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-populate the AI explanation cache from book vocabularies.")
+    parser.add_argument("--top-n", type=int, default=200, help="Words to pre-explain per book.")
+    parser.add_argument("--rank-by", choices=["frequency", "rarity"], default="frequency")
+    parser.add_argument("--words-per-minute", type=float, default=300, help="Throughput limit (0 disables it).")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="Checkpoint file used to resume.")
+    parser.add_argument("--book-id", action="append", dest="book_ids", help="Only pre-warm these books.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        asyncio.run(prewarm_explanations(
+            db,
+            top_n=args.top_n,
+            rank_by=args.rank_by,
+            words_per_minute=args.words_per_minute,
+            checkpoint_path=args.checkpoint,
+            book_ids=args.book_ids,
+        ))
+    finally:
+        db.close()
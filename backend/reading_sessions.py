@@ -0,0 +1,249 @@
+# backend/reading_sessions.py
+import itertools
+import os
+import threading
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud, models, replicas, schemas
+from .database import SessionLocal, dialect_insert
+
+# --- Configuration ---
+HEARTBEAT_FLUSH_INTERVAL_SECONDS = float(os.getenv("HEARTBEAT_FLUSH_INTERVAL_SECONDS", "10"))
+# A pending update is dropped after failing this many flushes (e.g. its user was deleted).
+HEARTBEAT_MAX_FLUSH_ATTEMPTS = int(os.getenv("HEARTBEAT_MAX_FLUSH_ATTEMPTS", "5"))
+
+SessionKey = Tuple[uuid.UUID, date, Optional[uuid.UUID]]
+
+
+class PendingProgress:
+    __slots__ = ("minutes", "paragraph_index", "last_read_at")
+
+    def __init__(self):
+        self.minutes = 0
+        self.paragraph_index: Optional[int] = None
+        self.last_read_at: Optional[datetime] = None
+
+
+class HeartbeatCoalescer:
+    """
+    Coalesces reading-session heartbeats in memory per (user, day, book) and writes
+    them on a timer. A flush is one transaction of atomic upserts:
+      - reading_activities: minutes are added with ON CONFLICT (user_id, date) DO UPDATE,
+        so concurrent writers can never hit the `_user_date_uc` violation;
+      - user_book_links: progress (the last paragraph reached) and last_read_at are
+        set with ON CONFLICT (user_id, book_id) DO UPDATE;
+    plus the O(1) streak update for every user that read that day.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 10.0,
+        max_attempts: int = 5,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.session_factory = session_factory
+        self._pending: Dict[SessionKey, PendingProgress] = defaultdict(PendingProgress)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.heartbeats = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.dropped = 0
+        # Failed flushes per pending key
+        self._attempts: Dict[SessionKey, int] = {}
+
+    def record(self, user_id: uuid.UUID, heartbeat: schemas.ReadingHeartbeat, day: Optional[date] = None):
+        """
+        Adds a heartbeat to the pending state. Never touches the database.
+        """
+        key = (user_id, day or date.today(), heartbeat.book_id)
+        with self._lock:
+            pending = self._pending[key]
+            pending.minutes += heartbeat.minutes
+            if heartbeat.paragraph_index is not None:
+                pending.paragraph_index = heartbeat.paragraph_index
+                pending.last_read_at = datetime.now(timezone.utc)
+            self.heartbeats += 1
+        self.start()
+
+    def flush(self) -> int:
+        """
+        Writes everything pending in one transaction. Returns the number of rows upserted.
+        If that transaction fails, each user's updates are retried in their own, so one
+        bad row can't hold back everyone else's progress.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, defaultdict(PendingProgress)
+            if not pending:
+                return 0
+
+            failed: Dict[SessionKey, PendingProgress] = {}
+            written = self._write(pending)
+            if written is None:
+                by_user: Dict[uuid.UUID, Dict[SessionKey, PendingProgress]] = defaultdict(dict)
+                for key, item in pending.items():
+                    by_user[key[0]][key] = item
+                written = 0
+                for user_pending in by_user.values():
+                    user_written = self._write(user_pending)
+                    if user_written is None:
+                        failed.update(user_pending)
+                    else:
+                        written += user_written
+                self._requeue(failed)
+
+            with self._lock:
+                for key in pending.keys() - failed.keys():
+                    self._attempts.pop(key, None)
+            self.flushes += 1
+            self.rows_written += written
+            return written
+
+    def _write(self, pending: Dict[SessionKey, PendingProgress]) -> Optional[int]:
+        """
+        Writes `pending` in one transaction. Returns the number of rows upserted, or None if it failed.
+        """
+        minutes: Dict[Tuple[uuid.UUID, date], int] = defaultdict(int)
+        progress: Dict[Tuple[uuid.UUID, uuid.UUID], PendingProgress] = {}
+        for (user_id, day, book_id), item in pending.items():
+            if item.minutes:
+                minutes[(user_id, day)] += item.minutes
+            if book_id is not None and item.paragraph_index is not None:
+                latest = progress.get((user_id, book_id))
+                if latest is None or item.last_read_at > latest.last_read_at:
+                    progress[(user_id, book_id)] = item
+
+        db = self.session_factory()
+        try:
+            written = write_reading_progress(db, minutes, progress)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to flush {len(pending)} reading-session updates: {e}")
+            return None
+        finally:
+            db.close()
+
+        for user_id, _day in minutes:
+            crud.user_stats_cache.invalidate(user_id)
+        return written
+
+    def _requeue(self, pending: Dict[SessionKey, PendingProgress]):
+        """
+        Puts unwritten updates back so the next flush retries them. Updates that
+        have failed `max_attempts` times are dropped.
+        """
+        with self._lock:
+            for key, item in pending.items():
+                attempts = self._attempts.get(key, 0) + 1
+                if attempts >= self.max_attempts:
+                    self._attempts.pop(key, None)
+                    self.dropped += 1
+                    print(f"Dropping reading-session update for user {key[0]} after {attempts} failed flushes.")
+                    continue
+                self._attempts[key] = attempts
+                current = self._pending[key]
+                current.minutes += item.minutes
+                if current.paragraph_index is None:
+                    current.paragraph_index, current.last_read_at = item.paragraph_index, item.last_read_at
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # --- Lifecycle ---
+    def start(self):
+        """ Starts the flush timer, if it isn't running yet. """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="heartbeat-flusher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """ Stops the flush timer and writes whatever is pending. """
+        with self._lock:
+            self._stopping = True
+            thread, self._thread = self._thread, None
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self) -> schemas.HeartbeatStats:
+        with self._lock:
+            pending = len(self._pending)
+        return schemas.HeartbeatStats(
+            pending=pending,
+            heartbeats=self.heartbeats,
+            flushes=self.flushes,
+            rows_written=self.rows_written,
+            dropped=self.dropped,
+        )
+
+
+def write_reading_progress(
+    db: Session,
+    minutes: Dict[Tuple[uuid.UUID, date], int],
+    progress: Dict[Tuple[uuid.UUID, uuid.UUID], PendingProgress],
+) -> int:
+    """
+    Upserts coalesced minutes and book progress, and advances streaks. The caller commits.
+    Returns the number of rows upserted.
+    """
+    if minutes:
+        insert = dialect_insert(db, models.ReadingActivity)
+        db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["user_id", "date"],
+                set_={"minutes_read": models.ReadingActivity.minutes_read + insert.excluded.minutes_read},
+            ),
+            [
+                {"id": uuid.uuid4(), "user_id": user_id, "date": day, "minutes_read": total}
+                for (user_id, day), total in minutes.items()
+            ],
+        )
+        for user_id, day in sorted(minutes, key=lambda key: key[1]):
+            crud.advance_reading_streak(db, user_id, day)
+
+    # Drop progress for books that don't exist, so one bad id can't fail the whole flush.
+    book_ids = {book_id for _user_id, book_id in progress}
+    if book_ids:
+        existing = {book_id for (book_id,) in db.query(models.Book.id).filter(models.Book.id.in_(book_ids))}
+        progress = {key: item for key, item in progress.items() if key[1] in existing}
+
+    if progress:
+        insert = dialect_insert(db, models.UserBookLink)
+        db.execute(
+            insert.on_conflict_do_update(
+                index_elements=["user_id", "book_id"],
+                set_={"progress": insert.excluded.progress, "last_read_at": insert.excluded.last_read_at},
+            ),
+            [
+                {"user_id": user_id, "book_id": book_id, "progress": item.paragraph_index, "last_read_at": item.last_read_at}
+                for (user_id, book_id), item in progress.items()
+            ],
+        )
+
+    # Core upserts: keep these users' reads on the primary until replicas have them.
+    for user_id in {user_id for user_id, _key in itertools.chain(minutes, progress)}:
+        replicas.note_write(db, user_id)
+
+    return len(minutes) + len(progress)
+
+
+coalescer = HeartbeatCoalescer(flush_interval=HEARTBEAT_FLUSH_INTERVAL_SECONDS, max_attempts=HEARTBEAT_MAX_FLUSH_ATTEMPTS)
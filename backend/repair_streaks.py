@@ -0,0 +1,50 @@
+# backend/repair_streaks.py
+import sys
+import os
+import argparse
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import crud, models
+from backend.database import SessionLocal
+
+COMMIT_EVERY = 500
+
+
+def repair_reading_streaks(db: Session, user_ids: Optional[Iterable[UUID]] = None) -> int:
+    """
+    Recomputes the stored streak state from `reading_activities` for the given users
+    (default: every user). Returns the number of users whose state was wrong.
+    """
+    if user_ids is None:
+        user_ids = [user_id for (user_id,) in db.query(models.User.id).order_by(models.User.id)]
+
+    repaired = 0
+    for count, user_id in enumerate(user_ids, start=1):
+        stored = db.get(models.ReadingStreak, user_id)
+        before = None if stored is None else (stored.current_streak, stored.longest_streak, stored.last_active_date)
+        streak = crud.recompute_reading_streak(db, user_id)
+        if before != (streak.current_streak, streak.longest_streak, streak.last_active_date):
+            repaired += 1
+        if count % COMMIT_EVERY == 0:
+            db.commit()
+    db.commit()
+    return repaired
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild stored reading streaks from the activity history.")
+    parser.add_argument("--user-id", action="append", dest="user_ids", help="Only repair these users.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        repaired = repair_reading_streaks(db, [UUID(user_id) for user_id in args.user_ids] if args.user_ids else None)
+    finally:
+        db.close()
+    print(f"Repaired the reading streak of {repaired} users.")
@@ -0,0 +1,254 @@
+# backend/replicas.py
+"""
+Routes read-only requests to replica databases. Writes always go through the
+primary (`get_db` / `get_async_db`); routes that only read take `get_read_db` /
+`get_async_read_db` instead, which hand out a replica session unless no replica is
+configured or the caller committed a write within the last `READ_YOUR_WRITES_SECONDS`.
+
+The time of a user's last write travels with the client in a signed cookie, so
+stickiness holds whichever worker serves their next read.
+"""
+import itertools
+import os
+import time
+from contextvars import ContextVar
+from typing import Iterable, List, Optional, Set
+from uuid import UUID
+
+from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from . import schemas, security
+from .database import create_async_db_engine, create_db_engine, get_async_db, get_db
+
+# --- Configuration ---
+# Comma-separated URLs of read replicas. Empty: every read goes to the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# After a user's own write, their reads stay on the primary this long. Keep it above the replication lag.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+# "none" when the frontend is served from another site; the cookie is then sent over HTTPS only.
+READ_YOUR_WRITES_COOKIE_SAMESITE = os.getenv("READ_YOUR_WRITES_COOKIE_SAMESITE", "lax").lower()
+LAST_WRITE_COOKIE = "last_write"
+
+# Session.info keys
+REPLICA_KEY = "replica"
+WRITTEN_USERS_KEY = "written_user_ids"
+
+# Users whose writes the current request committed; set by `track_writes`.
+_request_writers: ContextVar[Optional[Set[UUID]]] = ContextVar("request_writers", default=None)
+
+
+class ReplicaWriteError(RuntimeError):
+    """ Raised when a session bound to a replica tries to flush changes. """
+
+
+class ReadRouter:
+    """
+    Hands out replica sessions round-robin and counts where reads were served.
+    """
+
+    def __init__(
+        self,
+        replica_urls: Iterable[str] = (),
+        stickiness_seconds: float = READ_YOUR_WRITES_SECONDS,
+        **engine_kwargs,
+    ):
+        self.replica_urls = list(replica_urls)
+        self.stickiness_seconds = stickiness_seconds
+        self._engine_kwargs = engine_kwargs
+        self._engines = [create_db_engine(url, **engine_kwargs) for url in self.replica_urls]
+        self._sessionmakers = [
+            sessionmaker(autocommit=False, autoflush=False, bind=engine, info={REPLICA_KEY: True})
+            for engine in self._engines
+        ]
+        # Created on first use, like the primary's async engine.
+        self._async_engines: Optional[List[AsyncEngine]] = None
+        self._async_sessionmakers: Optional[List[async_sessionmaker]] = None
+        self._round_robin = itertools.count()
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    @property
+    def has_replicas(self) -> bool:
+        return bool(self._sessionmakers)
+
+    # --- Read-your-writes ---
+    def last_write_cookie(self, user_id: UUID, written_at: Optional[float] = None) -> str:
+        """ A signed "<user id>:<unix time>" value recording a write by `user_id`. """
+        written_at = time.time() if written_at is None else written_at
+        return security.sign_value(f"{user_id}:{written_at:.3f}")
+
+    def wrote_recently(self, user_id: Optional[UUID], cookie: Optional[str]) -> bool:
+        """ Whether `cookie` proves a write by `user_id` within the last `stickiness_seconds`. """
+        if user_id is None or not cookie:
+            return False
+        value = security.unsign_value(cookie)
+        if value is None:
+            return False
+        try:
+            cookie_user_id, written_at = value.rsplit(":", 1)
+            return UUID(cookie_user_id) == user_id and time.time() - float(written_at) < self.stickiness_seconds
+        except ValueError:
+            return False
+
+    def use_replica(self, sticky: bool) -> bool:
+        """ Whether a read may be served by a replica; `sticky` when the caller wrote recently. """
+        routed = self.has_replicas and not sticky
+        if routed:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        return routed
+
+    # --- Sessions ---
+    def _next(self, items: list):
+        return items[next(self._round_robin) % len(items)]
+
+    def replica_session(self) -> Session:
+        return self._next(self._sessionmakers)()
+
+    def async_replica_session(self) -> AsyncSession:
+        if self._async_sessionmakers is None:
+            self._async_engines = [create_async_db_engine(url, **self._engine_kwargs) for url in self.replica_urls]
+            self._async_sessionmakers = [
+                async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False, info={REPLICA_KEY: True})
+                for engine in self._async_engines
+            ]
+        return self._next(self._async_sessionmakers)()
+
+    async def dispose(self):
+        for engine in self._engines:
+            engine.dispose()
+        for engine in self._async_engines or []:
+            await engine.dispose()
+
+    def stats(self) -> schemas.ReadRoutingStats:
+        return schemas.ReadRoutingStats(
+            replicas=len(self.replica_urls),
+            primary_reads=self.primary_reads,
+            replica_reads=self.replica_reads,
+        )
+
+
+router = ReadRouter(DATABASE_REPLICA_URLS)
+
+
+def is_replica_session(db) -> bool:
+    return bool(db.info.get(REPLICA_KEY))
+
+
+def note_write(db, user_id: UUID):
+    """
+    Records a write by `user_id` in the current transaction. Only needed for Core
+    statements; rows flushed through the ORM are picked up automatically.
+    """
+    db.info.setdefault(WRITTEN_USERS_KEY, set()).add(user_id)
+
+
+# --- Session Listeners ---
+# Registered on the Session class, so they also cover the sync sessions behind AsyncSession.
+@event.listens_for(Session, "before_flush")
+def _refuse_replica_writes(session, flush_context, instances):
+    if is_replica_session(session) and (session.new or session.dirty or session.deleted):
+        raise ReplicaWriteError("This session reads from a replica; write through get_db instead.")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_writers(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here.
+    user_ids = {getattr(obj, "user_id", None) for obj in itertools.chain(session.new, session.dirty, session.deleted)}
+    user_ids.discard(None)
+    if user_ids:
+        session.info.setdefault(WRITTEN_USERS_KEY, set()).update(user_ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_writers(session):
+    user_ids = session.info.pop(WRITTEN_USERS_KEY, None)
+    writers = _request_writers.get()
+    if user_ids and writers is not None:
+        writers.update(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writers(session):
+    session.info.pop(WRITTEN_USERS_KEY, None)
+
+
+# --- Dependencies ---
+_optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+
+def _claimed_user_id(token: Optional[str]) -> Optional[UUID]:
+    if not token:
+        return None
+    try:
+        user_id = jwt.get_unverified_claims(token).get("user_id")
+        return UUID(user_id) if user_id else None
+    except (JWTError, ValueError, TypeError, AttributeError):
+        return None
+
+
+def caller_id(token: Optional[str] = Depends(_optional_oauth2_scheme)) -> Optional[UUID]:
+    """
+    The user id claimed by the bearer token, used for routing only. The signature is
+    not checked here (the auth dependencies do that): a forged claim can do no more
+    than choose where its own reads are served from.
+    """
+    return _claimed_user_id(token)
+
+
+def reads_own_writes(request: Request, user_id: Optional[UUID] = Depends(caller_id)) -> bool:
+    return router.wrote_recently(user_id, request.cookies.get(LAST_WRITE_COOKIE))
+
+
+def get_read_db(db: Session = Depends(get_db), sticky: bool = Depends(reads_own_writes)):
+    """
+    A session for routes that only read. The primary session is only connected if it's used.
+    """
+    if not router.use_replica(sticky):
+        yield db
+        return
+    replica = router.replica_session()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def get_async_read_db(db: AsyncSession = Depends(get_async_db), sticky: bool = Depends(reads_own_writes)):
+    if not router.use_replica(sticky):
+        yield db
+        return
+    async with router.async_replica_session() as replica:
+        yield replica
+
+
+# --- Middleware ---
+async def track_writes(request: Request, call_next):
+    """
+    Collects the users whose writes this request committed and, if the caller is one
+    of them, hands the caller a fresh last-write cookie.
+    """
+    writers: Set[UUID] = set()
+    token = _request_writers.set(writers)
+    try:
+        response = await call_next(request)
+    finally:
+        _request_writers.reset(token)
+
+    if writers and router.has_replicas:
+        authorization = request.headers.get("Authorization", "")
+        user_id = _claimed_user_id(authorization[7:] if authorization.lower().startswith("bearer ") else None)
+        if user_id in writers:
+            samesite = READ_YOUR_WRITES_COOKIE_SAMESITE
+            response.set_cookie(
+                LAST_WRITE_COOKIE, router.last_write_cookie(user_id),
+                max_age=max(1, int(router.stickiness_seconds) + 1), httponly=True,
+                samesite=samesite, secure=samesite == "none",
+            )
+    return response
@@ -0,0 +1,223 @@
+# backend/rollups.py
+import sys
+import os
+import threading
+import time
+import argparse
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy import and_, func, or_, tuple_
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import models
+from backend.database import SessionLocal, dialect_insert
+
+WATERMARK_NAME = "event_daily"
+ROLLUP_BATCH_SIZE = int(os.getenv("ROLLUP_BATCH_SIZE", "10000"))
+# Events are buffered before they are written (see backend/events.py), so rows can land
+# slightly out of created_at order. Only events older than this are rolled up.
+ROLLUP_LATENESS_SECONDS = float(os.getenv("ROLLUP_LATENESS_SECONDS", "300"))
+# How often each worker advances the rollups in the background. 0 turns that off,
+# e.g. where `python -m backend.rollups --loop` runs as a separate job instead.
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "60"))
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _rollup_batch(db: Session, rows) -> None:
+    """
+    Adds one batch of raw events to the rollup tables. The caller commits.
+    """
+    counts = Counter()
+    seen = set()
+    for _event_id, created_at, event_name, user_id in rows:
+        key = (_as_utc(created_at).date(), event_name)
+        counts[key] += 1
+        seen.add((*key, user_id))
+
+    db.execute(
+        dialect_insert(db, models.EventDailyUser).on_conflict_do_nothing(),
+        [{"day": day, "event_name": name, "user_id": user_id} for day, name, user_id in seen],
+    )
+
+    # Distinct users of the touched (day, event_name) pairs, from the small per-day user table.
+    user_counts = dict(
+        ((day, name), users)
+        for day, name, users in db.query(
+            models.EventDailyUser.day, models.EventDailyUser.event_name, func.count()
+        )
+        .filter(tuple_(models.EventDailyUser.day, models.EventDailyUser.event_name).in_(list(counts)))
+        .group_by(models.EventDailyUser.day, models.EventDailyUser.event_name)
+    )
+
+    insert = dialect_insert(db, models.EventDailyRollup)
+    db.execute(
+        insert.on_conflict_do_update(
+            index_elements=["day", "event_name"],
+            set_={
+                "event_count": models.EventDailyRollup.event_count + insert.excluded.event_count,
+                "user_count": insert.excluded.user_count,
+            },
+        ),
+        [
+            {"day": day, "event_name": name, "event_count": count, "user_count": user_counts[(day, name)]}
+            for (day, name), count in counts.items()
+        ],
+    )
+
+
+def _locked_watermark(db: Session) -> models.RollupWatermark:
+    """
+    The watermark row, created if missing and locked until the caller commits, so
+    workers advancing the rollups at the same time take turns batch by batch.
+    """
+    db.execute(
+        dialect_insert(db, models.RollupWatermark).values(name=WATERMARK_NAME)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
+    return (
+        db.query(models.RollupWatermark)
+        .filter(models.RollupWatermark.name == WATERMARK_NAME)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+
+
+def advance_rollups(db: Session, now: Optional[datetime] = None, batch_size: int = ROLLUP_BATCH_SIZE,
+                    lateness_seconds: float = ROLLUP_LATENESS_SECONDS) -> int:
+    """
+    Rolls up every raw event past the watermark (and older than the lateness window)
+    into `event_daily_rollups`. Each batch and the watermark move are committed together,
+    so every event is counted exactly once even if the job is interrupted.
+    Returns the number of events processed.
+    """
+    upper = (now or datetime.now(timezone.utc)) - timedelta(seconds=lateness_seconds)
+
+    processed = 0
+    while True:
+        watermark = _locked_watermark(db)
+        query = db.query(models.Event.id, models.Event.created_at, models.Event.event_name, models.Event.user_id).filter(
+            models.Event.created_at < upper
+        )
+        if watermark.last_created_at is not None:
+            query = query.filter(or_(
+                models.Event.created_at > watermark.last_created_at,
+                and_(models.Event.created_at == watermark.last_created_at, models.Event.id > watermark.last_event_id),
+            ))
+        rows = query.order_by(models.Event.created_at, models.Event.id).limit(batch_size).all()
+        if not rows:
+            break
+
+        _rollup_batch(db, rows)
+        watermark.last_event_id, watermark.last_created_at = rows[-1][0], rows[-1][1]
+        db.commit()
+        processed += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    db.commit()
+    return processed
+
+
+def get_rollups(db: Session, start: Optional[date] = None, end: Optional[date] = None,
+                event_name: Optional[str] = None) -> List[models.EventDailyRollup]:
+    """
+    Reads the daily rollups between `start` and `end` (inclusive), optionally for one event name.
+    """
+    query = db.query(models.EventDailyRollup)
+    if start is not None:
+        query = query.filter(models.EventDailyRollup.day >= start)
+    if end is not None:
+        query = query.filter(models.EventDailyRollup.day <= end)
+    if event_name:
+        query = query.filter(models.EventDailyRollup.event_name == event_name)
+    return query.order_by(models.EventDailyRollup.day, models.EventDailyRollup.event_name).all()
+
+
+# --- Background Scheduler ---
+class RollupScheduler:
+    """
+    Advances the rollups every `interval` seconds on a background thread, so
+    /analytics/rollups stays current without a separately run job. Every worker may
+    run one: the locked watermark keeps each event counted once.
+    """
+
+    def __init__(self, interval: float = ROLLUP_INTERVAL_SECONDS,
+                 session_factory: Callable[[], Session] = SessionLocal):
+        self.interval = interval
+        self.session_factory = session_factory
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.runs = 0
+        self.processed = 0
+
+    def run_once(self) -> int:
+        """ Advances the rollups once. Returns the number of events processed. """
+        db = self.session_factory()
+        try:
+            processed = advance_rollups(db)
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to advance the event rollups: {e}")
+            return 0
+        finally:
+            db.close()
+        self.runs += 1
+        self.processed += processed
+        return processed
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if not self._stopping:
+                self.run_once()
+
+    # --- Lifecycle ---
+    def start(self):
+        """ Starts the schedule, unless it is turned off or already running. """
+        with self._lock:
+            if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="rollup-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """ Stops the schedule. A run in progress finishes first. """
+        with self._lock:
+            self._stopping = True
+            thread, self._thread = self._thread, None
+        self._wakeup.set()
+        if thread is not None:
+            thread.join()
+
+
+scheduler = RollupScheduler()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Advance the daily event rollups past their watermark.")
+    parser.add_argument("--loop", type=float, default=0, help="Keep running, every N seconds.")
+    args = parser.parse_args()
+
+    while True:
+        db = SessionLocal()
+        try:
+            processed = advance_rollups(db)
+        finally:
+            db.close()
+        print(f"Rolled up {processed} events.")
+        if not args.loop:
+            break
+        time.sleep(args.loop)
@@ -1,5 +1,5 @@
 # backend/schemas.py
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from uuid import UUID
 from datetime import datetime, date
 from typing import List, Optional, Dict, Any
@@ -38,10 +38,11 @@ class BookBase(BaseModel):
 class BookCreate(BookBase):
     pass
 
-class Book(BookBase):
+# Catalog projection: everything but the text. Used by list, detail and recommendation endpoints.
+class BookSummary(BookBase):
     id: UUID
     created_at: datetime
-    content: List[BookContent] = []
+    total_tokens: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -62,6 +63,26 @@ class AIExplanation(BaseModel):
 class ExplainResponse(BaseModel):
     explanation: AIExplanation
 
+class BatchExplainRequest(BaseModel):
+    # Either an explicit list of words, or a paragraph whose words should all be explained
+    words: Optional[List[str]] = None
+    paragraph: Optional[str] = None
+    # Shared context for every word; defaults to the paragraph
+    context: Optional[str] = None
+    language: str = "es"
+
+class BatchExplainResponse(BaseModel):
+    explanations: Dict[str, AIExplanation]
+
+class ExplanationCacheStats(BaseModel):
+    entries: int
+    max_entries: int
+    hits: int
+    persistent_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
 
 # ==================================
 # Schemas for Vocabulary
@@ -71,6 +92,15 @@ class ExplainResponse(BaseModel):
 class ReviewRequest(BaseModel):
     performance_rating: int
 
+# One review in a batch sync. `reviewed_at` defaults to the time of the sync.
+class ReviewItem(BaseModel):
+    vocab_id: UUID
+    performance_rating: int = Field(ge=0, le=5)
+    reviewed_at: Optional[datetime] = None
+
+class ReviewBatchRequest(BaseModel):
+    reviews: List[ReviewItem]
+
 
 class VocabularyBase(BaseModel):
     word: str
@@ -92,6 +122,30 @@ class Vocabulary(VocabularyBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+# One page of a user's vocabulary, newest first.
+# Pass `next_cursor` back as `cursor` to get the following page; it is null on the last page.
+class VocabularyPage(BaseModel):
+    items: List[Vocabulary]
+    next_cursor: Optional[str] = None
+    total: int
+
+class DueVocabularyPage(BaseModel):
+    items: List[Vocabulary]
+    next_cursor: Optional[str] = None
+
+class DueCount(BaseModel):
+    due: int
+
+class ReviewBatchResponse(BaseModel):
+    updated: List[Vocabulary]
+    not_found: List[UUID] = []
+
+# Expected number of reviews on each of the next days, starting today.
+class ReviewForecast(BaseModel):
+    start_date: date
+    cards: int
+    daily_reviews: List[float]
+
 # ==================================
 # Schemas for Reading Activity
 # ==================================
@@ -112,6 +166,20 @@ class ReadingActivity(ReadingActivityBase):
 class LogActivityRequest(BaseModel):
     minutes: int
 
+# Sent periodically by the reader. `minutes` read since the last heartbeat and,
+# when reading a book, the paragraph reached (stored as UserBookLink.progress).
+class ReadingHeartbeat(BaseModel):
+    book_id: Optional[UUID] = None
+    minutes: int = Field(0, ge=0, le=60)
+    paragraph_index: Optional[int] = Field(None, ge=0)
+
+class HeartbeatStats(BaseModel):
+    pending: int
+    heartbeats: int
+    flushes: int
+    rows_written: int
+    dropped: int
+
 
 # ==================================
 # Schemas for User Stats
@@ -121,6 +189,8 @@ class UserStats(BaseModel):
     reading_streak: int
     total_words_learned: int
     total_minutes_read: int
+    longest_streak: int = 0
+    last_active_date: Optional[date] = None
 
 
 # ==================================
@@ -133,10 +203,10 @@ class UserBase(BaseModel):
 class UserCreate(UserBase):
     password: str # Password is required for creation
 
+# The profile only; the vocabulary is listed page by page from GET /vocabulary/
 class User(UserBase):
     id: UUID
     created_at: datetime
-    vocabulary: List[Vocabulary] = [] # Include the user's vocabulary list
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -146,6 +216,14 @@ class User(UserBase):
 # ==================================
 class TokenData(BaseModel):
     email: Optional[EmailStr] = None
+    user_id: Optional[UUID] = None
+
+# The authenticated caller, without any ORM state. Enough for endpoints that only need the id.
+class Principal(BaseModel):
+    id: UUID
+    email: EmailStr
+
+    model_config = ConfigDict(frozen=True)
 
 class Token(BaseModel):
     access_token: str
@@ -180,3 +258,32 @@ class Event(EventCreate):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class EventBatchRequest(BaseModel):
+    events: List[EventCreate]
+
+class EventBatchResponse(BaseModel):
+    accepted: int
+
+# One day of one event name, from the incremental rollups.
+class EventRollup(BaseModel):
+    day: date
+    event_name: str
+    event_count: int
+    user_count: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+class EventBufferStats(BaseModel):
+    pending: int
+    max_size: int
+    accepted: int
+    written: int
+    rejected: int
+    failed: int
+    dropped: int
+
+class ReadRoutingStats(BaseModel):
+    replicas: int
+    primary_reads: int
+    replica_reads: int
@@ -1,16 +1,23 @@
 # backend/security.py
+import hashlib
+import hmac
 import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Dict, Optional, Tuple
+from uuid import UUID
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # Import necessary modules from our app
-from . import crud, schemas
-from .database import get_db
+from . import crud, models, schemas
+from .database import get_async_db, get_db
 
 # --- Password Hashing (Existing Code) ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -45,11 +52,80 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-# --- NEW: Dependency to get the current user ---
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def sign_value(value: str) -> str:
     """
-    Decode the JWT token to get the current user.
-    This function will be used as a dependency in protected endpoints.
+    Appends an HMAC of `value` under SECRET_KEY, for values handed to the client (e.g. cookies).
+    """
+    signature = hmac.new(SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+    return f"{value}.{signature}"
+
+def unsign_value(signed: str) -> Optional[str]:
+    """
+    Returns the value of a `sign_value` result, or None if it was tampered with.
+    """
+    value, _, signature = signed.rpartition(".")
+    expected = hmac.new(SECRET_KEY.encode(), value.encode(), hashlib.sha256).hexdigest()
+    return value if value and hmac.compare_digest(signature, expected) else None
+
+# --- Identity Cache ---
+IDENTITY_CACHE_TTL_SECONDS = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "60"))
+IDENTITY_CACHE_MAX_ENTRIES = 10_000
+
+
+class IdentityCache:
+    """
+    A small TTL-bounded map of user id -> Principal, so authenticated requests that
+    only need the caller's identity skip the users table entirely.
+    Entries are dropped whenever the user row is updated or deleted.
+    """
+
+    def __init__(self, ttl_seconds: float = IDENTITY_CACHE_TTL_SECONDS, max_entries: int = IDENTITY_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[UUID, Tuple[schemas.Principal, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: UUID) -> Optional[schemas.Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            return entry[0]
+
+    def put(self, principal: schemas.Principal):
+        with self._lock:
+            # A refreshed entry moves to the end, keeping the dict in expiry order.
+            self._entries.pop(principal.id, None)
+            if len(self._entries) >= self.max_entries:
+                # Drop the entry closest to expiry (the oldest one).
+                del self._entries[next(iter(self._entries))]
+            self._entries[principal.id] = (principal, time.monotonic() + self.ttl_seconds)
+
+    def invalidate(self, user_id: UUID):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_identity(mapper, connection, target):
+    identity_cache.invalidate(target.id)
+
+
+# --- Dependencies to get the current user ---
+def _decode_token(token: str) -> schemas.TokenData:
+    """
+    Decodes and validates the JWT, returning its identity claims.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,11 +137,105 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+        token_data = schemas.TokenData(email=email, user_id=payload.get("user_id"))
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = crud.get_user_by_email(db, email=token_data.email)
+    return token_data
+
+
+def _load_user(db: Session, token_data: schemas.TokenData) -> Optional[models.User]:
+    if token_data.user_id is not None:
+        user = crud.get_user(db, user_id=token_data.user_id)
+        # Guard against a recycled id: the token must still belong to the same account.
+        if user is not None and user.email != token_data.email:
+            return None
+        return user
+    # Tokens issued before the user_id claim existed
+    return crud.get_user_by_email(db, email=token_data.email)
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Decode the JWT token to get the current user.
+    This function will be used as a dependency in protected endpoints.
+    The user is resolved by primary key from the token's `user_id` claim.
+    """
+    token_data = _decode_token(token)
+    user = _load_user(db, token_data)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
+
+
+def _cached_principal(token_data: schemas.TokenData) -> Optional[schemas.Principal]:
+    if token_data.user_id is None:
+        return None
+    principal = identity_cache.get(token_data.user_id)
+    if principal is not None and principal.email == token_data.email:
+        return principal
+    return None
+
+
+def _remember_principal(user: Optional[models.User]) -> schemas.Principal:
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    principal = schemas.Principal(id=user.id, email=user.email)
+    identity_cache.put(principal)
+    return principal
+
+
+def get_current_principal(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> schemas.Principal:
+    """
+    Lightweight alternative to `get_current_user` for endpoints that only need the
+    caller's id. Served from the identity cache; the database is only consulted on a miss.
+    """
+    token_data = _decode_token(token)
+    principal = _cached_principal(token_data)
+    if principal is not None:
+        return principal
+    return _remember_principal(_load_user(db, token_data))
+
+
+async def _load_user_async(db: AsyncSession, token_data: schemas.TokenData) -> Optional[models.User]:
+    if token_data.user_id is not None:
+        user = await db.get(models.User, token_data.user_id)
+        if user is not None and user.email != token_data.email:
+            return None
+        return user
+    return (await db.scalars(crud.user_by_email_statement(token_data.email))).first()
+
+
+async def get_current_principal_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> schemas.Principal:
+    """
+    `get_current_principal` for async routes: cache hits never leave the event loop,
+    and misses use the async engine.
+    """
+    token_data = _decode_token(token)
+    principal = _cached_principal(token_data)
+    if principal is not None:
+        return principal
+    return _remember_principal(await _load_user_async(db, token_data))
+
+
+# --- Admin Access ---
+# Comma-separated emails of the accounts allowed to read the operational endpoints.
+ADMIN_EMAILS = {email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+
+def get_admin_principal(principal: schemas.Principal = Depends(get_current_principal)) -> schemas.Principal:
+    """
+    Like `get_current_principal`, but only for accounts listed in ADMIN_EMAILS.
+    """
+    if principal.email.lower() not in ADMIN_EMAILS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return principal
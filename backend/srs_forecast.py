@@ -0,0 +1,166 @@
+# backend/srs_forecast.py
+import sys
+import os
+import argparse
+from datetime import date, datetime, timezone
+from typing import Dict, Mapping, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import models
+
+# Share of reviews that get each SM-2 rating (0-5). Used when the caller has no better estimate.
+DEFAULT_RATING_DISTRIBUTION: Dict[int, float] = {5: 0.3, 4: 0.4, 3: 0.2, 2: 0.05, 1: 0.05}
+MIN_EASE_FACTOR = 1.3
+
+
+# --- Vectorized SM-2 ---
+def sm2_step(intervals: np.ndarray, ease_factors: np.ndarray, ratings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Applies one review to many cards at once. Mirrors `crud.apply_srs_review`.
+    Returns (new_intervals, new_ease_factors).
+    """
+    grown = np.where(intervals == 1, 6, np.round(intervals * ease_factors))
+    new_intervals = np.where(ratings >= 3, grown, 1).astype(np.int64)
+    misses = 5 - ratings
+    new_ease_factors = np.maximum(ease_factors + (0.1 - misses * (0.08 + misses * 0.02)), MIN_EASE_FACTOR)
+    return new_intervals, new_ease_factors
+
+
+def parse_distribution(spec: str) -> Dict[int, float]:
+    """
+    Parses "5:0.3,4:0.4,3:0.2,1:0.1" into {5: 0.3, 4: 0.4, 3: 0.2, 1: 0.1}.
+    Raises ValueError if it is malformed.
+    """
+    distribution: Dict[int, float] = {}
+    for part in spec.split(","):
+        rating, _, weight = part.partition(":")
+        distribution[int(rating)] = float(weight)
+    validate_distribution(distribution)
+    return distribution
+
+
+def validate_distribution(distribution: Mapping[int, float]):
+    if not distribution:
+        raise ValueError("The rating distribution is empty.")
+    if any(not 0 <= rating <= 5 for rating in distribution):
+        raise ValueError("Ratings must be between 0 and 5.")
+    if any(weight < 0 for weight in distribution.values()) or sum(distribution.values()) <= 0:
+        raise ValueError("Rating weights must be non-negative and not all zero.")
+
+
+# --- Loading ---
+def load_cards(db: Session, user_id: Optional[UUID] = None, today: Optional[date] = None):
+    """
+    Loads the SRS columns into arrays: (intervals, ease_factors, due_days), where
+    `due_days` counts days from `today` (overdue cards are due on day 0).
+    With no `user_id`, loads every user's cards.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    query = db.query(models.Vocabulary.interval, models.Vocabulary.ease_factor, models.Vocabulary.next_review_at)
+    if user_id is not None:
+        query = query.filter(models.Vocabulary.user_id == user_id)
+    rows = query.all()
+
+    intervals = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    ease_factors = np.fromiter((row[1] for row in rows), dtype=np.float64, count=len(rows))
+    due_days = np.fromiter(((row[2].date() - today).days for row in rows), dtype=np.int64, count=len(rows))
+    return intervals, ease_factors, np.maximum(due_days, 0)
+
+
+# --- Simulation ---
+def forecast_reviews(
+    intervals: np.ndarray,
+    ease_factors: np.ndarray,
+    due_days: np.ndarray,
+    days: int,
+    distribution: Mapping[int, float] = DEFAULT_RATING_DISTRIBUTION,
+    runs: int = 20,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Simulates the review load of the next `days` days and returns the expected number
+    of reviews per day (averaged over `runs` Monte Carlo runs).
+
+    Every card due on a day is assumed to be reviewed that day, with a rating drawn
+    from `distribution`, and rescheduled by SM-2. All runs are simulated together:
+    the state is a (runs, cards) matrix and each simulated day is one vectorized step.
+    """
+    validate_distribution(distribution)
+    ratings = np.fromiter(distribution.keys(), dtype=np.int64)
+    weights = np.fromiter(distribution.values(), dtype=np.float64)
+    weights = weights / weights.sum()
+
+    rng = np.random.default_rng(seed)
+    interval_state = np.tile(np.asarray(intervals, dtype=np.int64), (runs, 1))
+    ease_state = np.tile(np.asarray(ease_factors, dtype=np.float64), (runs, 1))
+    due_state = np.tile(np.asarray(due_days, dtype=np.int64), (runs, 1))
+
+    load = np.zeros((runs, days), dtype=np.int64)
+    for day in range(days):
+        due = due_state == day
+        load[:, day] = due.sum(axis=1)
+        count = int(load[:, day].sum())
+        if not count:
+            continue
+        drawn = rng.choice(ratings, size=count, p=weights)
+        new_intervals, new_ease = sm2_step(interval_state[due], ease_state[due], drawn)
+        interval_state[due] = new_intervals
+        ease_state[due] = new_ease
+        due_state[due] = day + new_intervals
+
+    return load.mean(axis=0)
+
+
+def forecast_for_user(
+    db: Session,
+    user_id: Optional[UUID],
+    days: int,
+    distribution: Mapping[int, float] = DEFAULT_RATING_DISTRIBUTION,
+    runs: int = 20,
+    seed: Optional[int] = None,
+):
+    """
+    Loads a user's cards (or everyone's, with no `user_id`) and forecasts their review load.
+    Returns (cards, expected reviews per day starting today).
+    """
+    intervals, ease_factors, due_days = load_cards(db, user_id=user_id)
+    daily = forecast_reviews(intervals, ease_factors, due_days, days, distribution=distribution, runs=runs, seed=seed)
+    return len(intervals), daily
+
+
+if __name__ == "__main__":
+    from backend.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Forecast the daily review load across all users.")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--runs", type=int, default=20, help="Monte Carlo runs to average.")
+    parser.add_argument("--distribution", default=None, help='Rating shares, e.g. "5:0.3,4:0.4,3:0.2,1:0.1".')
+    parser.add_argument("--user-id", default=None, help="Forecast a single user instead.")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    distribution = parse_distribution(args.distribution) if args.distribution else DEFAULT_RATING_DISTRIBUTION
+    db = SessionLocal()
+    try:
+        cards, daily = forecast_for_user(
+            db,
+            user_id=UUID(args.user_id) if args.user_id else None,
+            days=args.days,
+            distribution=distribution,
+            runs=args.runs,
+            seed=args.seed,
+        )
+    finally:
+        db.close()
+
+    print(f"Forecast for {cards} cards over {args.days} days:")
+    for day, reviews in enumerate(daily):
+        print(f"  day {day:>3}: {reviews:10.1f}")
+    if len(daily):
+        print(f"Peak: {daily.max():.1f} reviews on day {int(daily.argmax())}; mean {daily.mean():.1f}/day.")
@@ -0,0 +1,189 @@
+# backend/startup.py
+"""
+Startup steps that used to run as side effects of importing `backend.main`. Importing
+the app is now cheap (worker boot, test collection, scripts); the work happens here,
+either in the app's lifespan or explicitly:
+
+    python -m backend.startup migrate    # create missing tables and indexes
+    python -m backend.startup warmup     # run the warmup once and report step timings
+    python -m backend.startup profile    # import time per module for backend.main
+"""
+import argparse
+import asyncio
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from . import ai, coverage, models
+from .database import SessionLocal, engine, get_async_sessionmaker
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- Configuration ---
+# Create missing tables and indexes when a worker starts. Turn off where `migrate` runs as a deploy step.
+CREATE_SCHEMA_ON_STARTUP = os.getenv("CREATE_SCHEMA_ON_STARTUP", "true").lower() == "true"
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+# Most recent persisted explanations loaded into the memory tier by the warmup.
+WARMUP_EXPLANATIONS = int(os.getenv("WARMUP_EXPLANATIONS", "2000"))
+
+
+# --- Schema ---
+def create_schema(bind=engine) -> Dict[str, List[str]]:
+    """
+    Creates missing tables, then the indexes missing from existing tables, which
+    `create_all` skips. Columns are never added to an existing table: those missing
+    are returned as "table.column" under "missing_columns" and need a manual migration.
+    """
+    models.Base.metadata.create_all(bind=bind)
+    inspector = inspect(bind)
+    report: Dict[str, List[str]] = {"created_indexes": [], "missing_columns": []}
+    for table in models.Base.metadata.sorted_tables:
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(bind)
+                report["created_indexes"].append(index.name)
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        report["missing_columns"] += [
+            f"{table.name}.{column.name}" for column in table.columns if column.name not in existing_columns
+        ]
+    return report
+
+
+# --- Readiness ---
+_ready = False
+
+
+def mark_ready(ready: bool = True):
+    global _ready
+    _ready = ready
+
+
+def is_ready() -> bool:
+    return _ready
+
+
+# --- Warmup ---
+def _warm_database(session_factory: Callable[[], Session]):
+    db = session_factory()
+    try:
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
+def _warm_coverage_index(session_factory: Callable[[], Session]):
+    db = session_factory()
+    try:
+        coverage.get_coverage_index(db)
+    finally:
+        db.close()
+
+
+async def _warm_async_database(async_session_factory: Optional[Callable[[], AsyncSession]]):
+    async with (async_session_factory or get_async_sessionmaker())() as db:
+        await db.execute(text("SELECT 1"))
+
+
+async def warm_up(
+    session_factory: Callable[[], Session] = SessionLocal,
+    async_session_factory: Optional[Callable[[], AsyncSession]] = None,
+    explanations: int = WARMUP_EXPLANATIONS,
+) -> Dict[str, float]:
+    """
+    Primes this process's connection pools and caches so the first requests don't pay
+    for them. A failing step is reported and skipped: its cache then fills on first use.
+    Returns the seconds spent per step.
+    """
+    steps = [
+        ("database", lambda: asyncio.to_thread(_warm_database, session_factory)),
+        ("async_database", lambda: _warm_async_database(async_session_factory)),
+        ("coverage_index", lambda: asyncio.to_thread(_warm_coverage_index, session_factory)),
+        ("explanation_cache", lambda: asyncio.to_thread(ai.explanation_cache.warm, explanations)),
+    ]
+    timings: Dict[str, float] = {}
+    for name, step in steps:
+        started_at = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            print(f"Warmup step '{name}' failed: {e}")
+        timings[name] = time.perf_counter() - started_at
+    print("Warmup: " + ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings.items()))
+    return timings
+
+
+# --- Import Profiling ---
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_import_times(report: str) -> List[Tuple[str, int, int]]:
+    """
+    Parses `python -X importtime` output into (module, self µs, cumulative µs) rows.
+    """
+    rows = []
+    for line in report.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+def profile_imports(module: str = "backend.main") -> List[Tuple[str, int, int]]:
+    """
+    Imports `module` in a fresh interpreter with `-X importtime` and returns its import timings.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return parse_import_times(result.stderr)
+
+
+def print_import_report(rows: List[Tuple[str, int, int]], top: int = 25):
+    total = sum(self_us for _module, self_us, _cumulative in rows)
+    by_package: Dict[str, int] = defaultdict(int)
+    for module, self_us, _cumulative in rows:
+        by_package[module.split(".")[0]] += self_us
+
+    print(f"{len(rows)} modules imported in {total / 1000:.0f} ms")
+    print(f"\n{'package':<40} {'self ms':>9} {'share':>7}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:<40} {self_us / 1000:>9.1f} {self_us / total:>7.1%}")
+    print(f"\n{'module':<40} {'self ms':>9} {'cumul. ms':>10}")
+    for module, self_us, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"{module:<40} {self_us / 1000:>9.1f} {cumulative_us / 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Schema creation, warmup and startup profiling for the backend.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("migrate", help="Create missing tables and indexes.")
+    warmup_parser = subparsers.add_parser("warmup", help="Run the worker warmup and report step timings.")
+    warmup_parser.add_argument("--explanations", type=int, default=WARMUP_EXPLANATIONS)
+    profile_parser = subparsers.add_parser("profile", help="Report import time per module.")
+    profile_parser.add_argument("--module", default="backend.main")
+    profile_parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        report = create_schema()
+        print(f"Created missing tables and {len(report['created_indexes'])} missing indexes: "
+              + (", ".join(report["created_indexes"]) or "none"))
+        if report["missing_columns"]:
+            print("Columns missing from existing tables (not added, migrate them by hand): "
+                  + ", ".join(report["missing_columns"]))
+    elif args.command == "warmup":
+        asyncio.run(warm_up(explanations=args.explanations))
+    else:
+        print_import_report(profile_imports(args.module), top=args.top)
@@ -1,20 +1,30 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 # --- Import your project's modules ---
 from backend.main import app
-from backend.database import Base, get_db
+from backend.database import Base, create_async_db_engine, create_db_engine, get_async_db, get_db
+from backend.explanation_cache import ExplanationCache
+from backend.events import EventBuffer
+from backend.reading_sessions import HeartbeatCoalescer
+from backend.replicas import ReadRouter
+from backend import ai, events, reading_sessions, replicas, security
 
 # --- Test Database Configuration ---
 # Use an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Same tuned engine profile as the application
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The async routes use the same file. No pooling: the TestClient may run each request on a new event loop.
+async_engine = create_async_db_engine(SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 # --- Fixture to set up and tear down the database ---
 @pytest.fixture(scope="function")
@@ -46,10 +56,81 @@ def client(db_session):
         finally:
             db_session.close()
     
-    # Apply the override
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    # Apply the overrides
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     
     yield TestClient(app)
     
-    # Clean up the override after tests are done
-    del app.dependency_overrides[get_db]
\ No newline at end of file
+    # Clean up the overrides after tests are done
+    del app.dependency_overrides[get_db]
+    del app.dependency_overrides[get_async_db]
+
+# --- Fixture to isolate the explanation cache ---
+@pytest.fixture(scope="function")
+def explanation_cache(db_session, monkeypatch):
+    """
+    An empty two-tier explanation cache whose persistent tier lives in the test database.
+    """
+    cache = ExplanationCache(session_factory=TestingSessionLocal)
+    monkeypatch.setattr(ai, "explanation_cache", cache)
+    return cache
+
+# --- Fixture to isolate the analytics event buffer ---
+@pytest.fixture(scope="function")
+def event_buffer(db_session, monkeypatch):
+    """
+    An empty event buffer that writes to the test database. Call `flush()` to write synchronously.
+    """
+    buffer = EventBuffer(flush_size=1000, flush_interval=60, session_factory=TestingSessionLocal)
+    monkeypatch.setattr(events, "buffer", buffer)
+    yield buffer
+    buffer.stop()
+
+# --- Fixture to isolate the reading-session heartbeat coalescer ---
+@pytest.fixture(scope="function")
+def heartbeat_coalescer(db_session, monkeypatch):
+    """
+    A coalescer that writes to the test database and only flushes when `flush()` is called.
+    """
+    coalescer = HeartbeatCoalescer(flush_interval=3600, session_factory=TestingSessionLocal)
+    monkeypatch.setattr(reading_sessions, "coalescer", coalescer)
+    yield coalescer
+    coalescer.stop()
+
+# --- Fixture to route reads to a replica ---
+@pytest.fixture(scope="function")
+def replica(db_session, monkeypatch, tmp_path):
+    """
+    A read router with one "replica": a separate SQLite file with the same schema
+    that nothing replicates into, so tests can tell which database served a read.
+    Yields a plain session on the replica file for seeding it.
+    """
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    router = ReadRouter([url], stickiness_seconds=60, poolclass=NullPool)
+    monkeypatch.setattr(replicas, "router", router)
+    seed_engine = create_db_engine(url, poolclass=NullPool)
+    Base.metadata.create_all(bind=seed_engine)
+    seed = sessionmaker(autocommit=False, autoflush=False, bind=seed_engine)()
+    try:
+        yield seed
+    finally:
+        seed.close()
+        seed_engine.dispose()
+        asyncio.run(router.dispose())
+
+# --- Fixture for the admin-only endpoints ---
+@pytest.fixture(scope="function")
+def admin_headers(client, monkeypatch):
+    """
+    Auth headers of a registered account listed in ADMIN_EMAILS.
+    """
+    email = "admin@example.com"
+    monkeypatch.setattr(security, "ADMIN_EMAILS", {email})
+    client.post("/users/", json={"email": email, "password": "adminpassword"})
+    token = client.post("/token", data={"username": email, "password": "adminpassword"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
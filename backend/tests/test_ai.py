@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from backend import ai
+
+
+@pytest.fixture
+def fake_provider(explanation_cache):
+    """
+    Swap Gemini for the local fake provider and start every test with an empty cache.
+    """
+    provider = ai.FakeProvider(delay=0.05)
+    ai.set_provider(provider)
+    yield provider
+    ai.set_provider(None)
+
+
+def test_concurrent_identical_lookups_share_one_call(fake_provider):
+    """
+    Tests that concurrent lookups of the same word are coalesced into one provider call.
+    """
+    async def lookup_many():
+        return await asyncio.gather(*[
+            ai.get_ai_explanation("Libro", "Un libro abierto.", "es") for _ in range(20)
+        ])
+
+    results = asyncio.run(lookup_many())
+
+    assert fake_provider.calls == 1
+    assert all(r == results[0] for r in results)
+    assert results[0].translation == "Libro"
+
+
+def test_outbound_requests_respect_concurrency_cap(fake_provider, monkeypatch):
+    """
+    Tests that distinct words never exceed the configured number of in-flight provider calls.
+    """
+    monkeypatch.setattr(ai, "MAX_CONCURRENT_REQUESTS", 2)
+    monkeypatch.setattr(ai, "_limiter", None)
+
+    async def lookup_distinct():
+        await asyncio.gather(*[ai.get_ai_explanation(f"palabra{i}", "...", "es") for i in range(6)])
+
+    asyncio.run(lookup_distinct())
+
+    assert fake_provider.calls == 6
+    assert fake_provider.max_in_flight == 2
+
+
+def test_explain_endpoint_uses_provider_and_cache(client: TestClient, fake_provider):
+    """
+    Tests the /explain endpoint end to end against the fake provider.
+    """
+    payload = {"word": "casa", "context": "La casa es grande."}
+    first = client.post("/explain", json=payload)
+    second = client.post("/explain", json=payload)
+
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert first.json()["explanation"]["translation"] == "casa"
+    assert fake_provider.calls == 1
+
+
+
+def test_explanations_survive_a_cold_memory_tier(fake_provider, explanation_cache):
+    """
+    Tests that a restarted worker (empty memory tier) is served from the persistent tier.
+    """
+    asyncio.run(ai.get_ai_explanation("perro", "El perro duerme.", "es"))
+    explanation_cache.clear()
+
+    explanation = asyncio.run(ai.get_ai_explanation("Perro", "Otro contexto.", "es"))
+
+    assert explanation.translation == "perro"
+    assert fake_provider.calls == 1
+    assert explanation_cache.stats()["persistent_hits"] == 1
+
+
+def test_memory_tier_is_lru_and_ttl_bounded(explanation_cache, monkeypatch):
+    """
+    Tests LRU eviction and TTL expiry of the memory tier, and its counters.
+    """
+    explanation_cache.max_entries = 2
+    explanation = ai.AIExplanation(definition="d", part_of_speech="noun", translation="t")
+    keys = [explanation_cache.make_key("es", w) for w in ("uno", "dos", "tres")]
+
+    explanation_cache.put(keys[0], explanation)
+    explanation_cache.put(keys[1], explanation)
+    assert explanation_cache.get(keys[0]) is not None  # "uno" is now most recently used
+    explanation_cache.put(keys[2], explanation)
+
+    assert explanation_cache.get(keys[1]) is None
+    assert explanation_cache.get(keys[0]) is not None
+    assert explanation_cache.stats()["evictions"] == 1
+
+    explanation_cache.ttl_seconds = 0
+    explanation_cache.put(keys[0], explanation)
+    assert explanation_cache.get(keys[0]) is None
+    assert explanation_cache.stats()["expirations"] == 1
+
+
+def test_batch_explain_dedupes_and_groups_misses(client: TestClient, fake_provider, monkeypatch):
+    """
+    Tests that /explain/batch serves cached words from the cache and sends the
+    remaining distinct words to the provider in multi-word prompts.
+    """
+    monkeypatch.setattr(ai, "BATCH_PROMPT_SIZE", 4)
+    client.post("/explain", json={"word": "gato", "context": "..."})
+    assert fake_provider.calls == 1
+
+    paragraph = "El gato y el perro comen. El gato duerme, y el perro ladra."
+    response = client.post("/explain/batch", json={"paragraph": paragraph, "language": "es"})
+
+    assert response.status_code == 200
+    explanations = response.json()["explanations"]
+    assert set(explanations) == {"el", "gato", "y", "perro", "comen", "duerme", "ladra"}
+    # 6 uncached distinct words in prompts of 4 -> 2 more provider calls
+    assert fake_provider.calls == 3
+    assert fake_provider.words_explained == 1 + 6
+
+
+def test_batch_explain_requires_words(client: TestClient, fake_provider):
+    response = client.post("/explain/batch", json={"paragraph": "123 456"})
+    assert response.status_code == 400
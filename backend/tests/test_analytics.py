@@ -1,9 +1,12 @@
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
-from backend import models
+from backend import models, schemas
 import uuid # 1. Import the uuid library
+from backend.events import EventBuffer
+from backend.tests.conftest import TestingSessionLocal
 
-def test_log_event_success(client: TestClient, db_session: Session):
+def test_log_event_success(client: TestClient, db_session: Session, event_buffer: EventBuffer):
     """
     Tests that a generic event can be successfully logged for an authenticated user.
     """
@@ -40,9 +43,87 @@ def test_log_event_success(client: TestClient, db_session: Session):
     # 4. Verify that the event was actually saved to the database
     # Convert the string ID from the response back to a UUID object
     event_id_from_response = uuid.UUID(response_data["id"])
+    event_buffer.flush()
     
     db_event = db_session.query(models.Event).filter(models.Event.id == event_id_from_response).first()
     
     assert db_event is not None
     assert str(db_event.user_id) == user_id_str
-    assert db_event.properties["book_id"] == "a1b2c3d4-e5f6-7890-1234-567890abcdef"
\ No newline at end of file
+    assert db_event.properties["book_id"] == "a1b2c3d4-e5f6-7890-1234-567890abcdef"
+
+
+def test_log_event_batch_is_written_in_one_flush(client: TestClient, db_session: Session, event_buffer: EventBuffer):
+    email = "analytics-batch@example.com"
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    events = [{"event_name": "paragraph_read", "properties": {"index": i}} for i in range(25)]
+    response = client.post("/events/log/batch", headers=headers, json={"events": events})
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 25}
+
+    assert event_buffer.stats().pending == 25
+    assert db_session.query(models.Event).count() == 0
+    assert event_buffer.flush() == 25
+    assert db_session.query(models.Event).filter(models.Event.event_name == "paragraph_read").count() == 25
+
+
+def test_full_event_buffer_applies_backpressure(client: TestClient, db_session: Session, event_buffer: EventBuffer):
+    email = "analytics-full@example.com"
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Stop the flusher so nothing makes room, then fill the buffer.
+    event_buffer.stop()
+    event_buffer.max_size = 3
+    event_buffer.submit_timeout = 0.05
+    event_buffer.start = lambda: None
+    events = [{"event_name": "page_view"}] * 3
+    assert client.post("/events/log/batch", headers=headers, json={"events": events}).status_code == 200
+
+    response = client.post("/events/log", headers=headers, json={"event_name": "page_view"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert event_buffer.stats().rejected == 1
+
+    # Draining on shutdown writes what was accepted.
+    event_buffer.stop()
+    assert db_session.query(models.Event).count() == 3
+
+
+def test_failed_event_batch_is_retried_then_dropped(db_session: Session):
+    user = models.User(email="analytics-retry@example.com", hashed_password="...")
+    db_session.add(user)
+    db_session.commit()
+
+    failures = {"left": 1}
+
+    def flaky_session():
+        db = TestingSessionLocal()
+        if failures["left"]:
+            failures["left"] -= 1
+
+            def locked(*args, **kwargs):
+                raise OperationalError("INSERT INTO events", {}, Exception("database is locked"))
+            db.execute = locked
+        return db
+
+    buffer = EventBuffer(flush_size=2, max_attempts=2, session_factory=flaky_session)
+    buffer.start = lambda: None
+    buffer.submit(user.id, [schemas.EventCreate(event_name="page_view")] * 3)
+
+    # The first batch fails and goes back to the front; nothing is lost.
+    assert buffer.flush() == 0
+    assert (buffer.stats().pending, buffer.stats().failed) == (3, 2)
+    assert buffer.flush() == 3
+    assert db_session.query(models.Event).count() == 3
+
+    # A batch that keeps failing is dropped after `max_attempts` writes.
+    failures["left"] = 2
+    buffer.submit(user.id, [schemas.EventCreate(event_name="page_view")])
+    assert buffer.flush() == 0
+    assert buffer.flush() == 0
+    stats = buffer.stats()
+    assert (stats.pending, stats.dropped) == (0, 1)
@@ -1,6 +1,7 @@
+import json
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
-from backend import crud, schemas # To create a book for testing
+from backend import crud, models, schemas # To create a book for testing
 
 def test_read_books_endpoint(client: TestClient, db_session: Session):
     """
@@ -35,4 +36,57 @@ def test_read_book_endpoint_not_found(client: TestClient):
     non_existent_uuid = "123e4567-e89b-12d3-a456-426614174000"
     response = client.get(f"/books/{non_existent_uuid}")
     assert response.status_code == 404
-    assert response.json() == {"detail": "Book not found"}
\ No newline at end of file
+    assert response.json() == {"detail": "Book not found"}
+
+def test_catalog_endpoints_do_not_serialize_content(client: TestClient, db_session: Session):
+    """
+    Test that the catalog and detail endpoints return the summary projection,
+    while paragraphs remain available from the content endpoint.
+    """
+    book = crud.create_book(db=db_session, book=schemas.BookCreate(
+        title="Long Book", author="Author", language="es", difficulty_level=2
+    ))
+    db_session.add(models.BookContent(
+        book_id=book.id, paragraph_index=0,
+        original_text="Había una vez un libro muy largo.", translated_text="..."
+    ))
+    db_session.commit()
+
+    list_response = client.get("/books/")
+    assert list_response.status_code == 200
+    assert "content" not in list_response.json()[0]
+
+    detail_response = client.get(f"/books/{book.id}")
+    assert detail_response.status_code == 200
+    assert "content" not in detail_response.json()
+
+    content_response = client.get(f"/books/{book.id}/content")
+    assert content_response.status_code == 200
+    assert len(content_response.json()) == 1
+
+
+def test_read_book_content_window_and_stream(client: TestClient, db_session: Session):
+    """
+    Test keyset windows over paragraph_index and the NDJSON streaming download.
+    """
+    book = crud.create_book(db=db_session, book=schemas.BookCreate(
+        title="Windowed Book", author="Author", language="es", difficulty_level=2
+    ))
+    for i in range(10):
+        db_session.add(models.BookContent(
+            book_id=book.id, paragraph_index=i,
+            original_text=f"Párrafo número {i}.", translated_text="..."
+        ))
+    db_session.commit()
+
+    window = client.get(f"/books/{book.id}/content", params={"from": 4, "count": 3})
+    assert window.status_code == 200
+    assert [p["paragraph_index"] for p in window.json()] == [4, 5, 6]
+
+    assert client.get(f"/books/{book.id}/content", params={"count": 0}).status_code == 422
+
+    stream = client.get(f"/books/{book.id}/content/stream")
+    assert stream.status_code == 200
+    assert stream.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in stream.text.splitlines()]
+    assert [p["paragraph_index"] for p in lines] == list(range(10))
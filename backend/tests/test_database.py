@@ -0,0 +1,33 @@
+from sqlalchemy import text
+
+from backend.database import async_database_url, create_db_engine, normalize_database_url
+
+
+def test_sqlite_connections_use_the_tuned_profile(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+    with engine.connect() as connection:
+        pragma = lambda name: connection.execute(text(f"PRAGMA {name}")).scalar()
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 5000
+        assert pragma("cache_size") < 0
+        assert pragma("mmap_size") > 0
+    engine.dispose()
+
+
+def test_in_memory_sqlite_skips_file_only_pragmas():
+    engine = create_db_engine("sqlite://")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "memory"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+
+
+def test_postgres_scheme_is_normalized():
+    assert normalize_database_url("postgres://u:p@db/app") == "postgresql://u:p@db/app"
+    assert normalize_database_url("sqlite:///./x.db") == "sqlite:///./x.db"
+
+
+def test_async_driver_is_picked_from_the_sync_url():
+    assert async_database_url("sqlite:///./backend/app.db") == "sqlite+aiosqlite:///./backend/app.db"
+    assert async_database_url("postgres://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
@@ -0,0 +1,55 @@
+from uuid import uuid4
+from backend import models, populate_db
+
+
+def test_bulk_ingest_reuses_existing_words(db_session, tmp_path):
+    """
+    Tests that bulk ingestion writes paragraphs and links, and that a second book
+    in the same language reuses existing Word rows instead of duplicating them.
+    """
+    source = tmp_path / "book.txt"
+    source.write_text(
+        "Preface that must be ignored.\n"
+        "*** START OF THE PROJECT GUTENBERG EBOOK TEST ***\n\n"
+        "The cat sat on the mat all day long.\n\n"
+        "Short.\n\n"
+        "The dog slept by the door all night.\n"
+        "*** END OF THE PROJECT GUTENBERG EBOOK TEST ***\n",
+        encoding="utf-8",
+    )
+    word_counts = populate_db.parse_book_file(str(source), "en")
+    assert word_counts["the"] == 4
+    assert word_counts["cat"] == 1
+    unique_words = set(word_counts)
+
+    word_ids = populate_db.load_word_ids(db_session, "en")
+    for title in ("First", "Second"):
+        book = models.Book(id=uuid4(), title=title, author="A", language="en", difficulty_level=1)
+        db_session.add(book)
+        db_session.flush()
+        with open(source, encoding="utf-8") as f:
+            populate_db.bulk_ingest_book(db_session, book.id, "en", populate_db.iter_paragraphs(f), word_counts, word_ids)
+        db_session.commit()
+
+    assert db_session.query(models.Word).count() == len(unique_words)
+    assert db_session.query(models.BookContent).count() == 4
+    assert db_session.query(models.BookWordLink).count() == 2 * len(unique_words)
+    the_id = word_ids["the"]
+    occurrences = db_session.query(models.BookWordLink.c.occurrences).filter(
+        models.BookWordLink.c.word_id == the_id
+    ).all()
+    assert occurrences == [(4,), (4,)]
+    assert populate_db.parse_book_file(str(tmp_path / "missing.txt"), "en") is None
+
+
+def test_iter_paragraphs_is_lazy():
+    """
+    Tests that paragraphs are emitted as soon as they end, before the rest of the input is read.
+    """
+    def lines():
+        yield "*** START OF THE PROJECT GUTENBERG EBOOK TEST ***"
+        yield "A first paragraph that is long enough."
+        yield ""
+        raise AssertionError("read past the first paragraph")
+
+    assert next(populate_db.iter_paragraphs(lines())) == "A first paragraph that is long enough."
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import pytest
+from sqlalchemy import update
+from backend import ai, models, prewarm
+from backend.tests.test_recommendations import create_book_with_words
+
+
+@pytest.fixture
+def fake_provider(explanation_cache):
+    provider = ai.FakeProvider()
+    ai.set_provider(provider)
+    yield provider
+    ai.set_provider(None)
+
+
+def test_rank_book_words_by_frequency_and_rarity(db_session):
+    """
+    Tests that frequent in-book words rank first (catalog frequency breaking ties),
+    and that rarity favours words found in few books.
+    """
+    book = create_book_with_words(db_session, "Libro A", "es", 1, {"casa", "perro", "zorro"})
+    create_book_with_words(db_session, "Libro B", "es", 1, {"casa", "perro"})
+    create_book_with_words(db_session, "Libro C", "es", 1, {"casa"})
+
+    assert prewarm.rank_book_words(db_session, book, top_n=2) == ["casa", "perro"]
+    assert prewarm.rank_book_words(db_session, book, top_n=1, rank_by="rarity") == ["zorro"]
+
+    zorro = db_session.query(models.Word).filter_by(text="zorro").one()
+    db_session.execute(update(models.BookWordLink).where(
+        models.BookWordLink.c.book_id == book.id, models.BookWordLink.c.word_id == zorro.id
+    ).values(occurrences=7))
+    db_session.commit()
+    assert prewarm.rank_book_words(db_session, book, top_n=1) == ["zorro"]
+
+
+def test_prewarm_fills_cache_and_resumes_from_checkpoint(db_session, explanation_cache, fake_provider, tmp_path, monkeypatch):
+    """
+    Tests that the job caches each book's top-N words and that a second run
+    resumes from the checkpoint without calling the provider again.
+    """
+    monkeypatch.setattr(ai, "BATCH_PROMPT_SIZE", 2)
+    book = create_book_with_words(db_session, "Libro", "es", 1, {"uno", "dos", "tres", "cuatro", "cinco"})
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    processed = asyncio.run(prewarm.prewarm_explanations(
+        db_session, top_n=4, words_per_minute=0, checkpoint_path=checkpoint_path
+    ))
+
+    assert processed == 4
+    assert fake_provider.calls == 2
+    top_words = prewarm.rank_book_words(db_session, book, top_n=4)
+    with open(checkpoint_path) as f:
+        assert json.load(f) == {str(book.id): sorted(top_words)}
+    for word in top_words:
+        assert explanation_cache.get(explanation_cache.make_key("es", word)) is not None
+
+    processed_again = asyncio.run(prewarm.prewarm_explanations(
+        db_session, top_n=4, words_per_minute=0, checkpoint_path=checkpoint_path
+    ))
+    assert processed_again == 0
+    assert fake_provider.calls == 2
+
+
+def test_failed_words_are_not_checkpointed(db_session, explanation_cache, tmp_path, monkeypatch):
+    """
+    Tests that a provider failure stops the run without marking the words done,
+    so the next run explains them.
+    """
+    class FailingProvider(ai.FakeProvider):
+        async def explain_many(self, words, context, language):
+            self.calls += 1
+            raise RuntimeError("provider down")
+
+    monkeypatch.setattr(ai, "BATCH_PROMPT_SIZE", 2)
+    book = create_book_with_words(db_session, "Libro", "es", 1, {"uno", "dos", "tres", "cuatro"})
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    failing = FailingProvider()
+    ai.set_provider(failing)
+    try:
+        processed = asyncio.run(prewarm.prewarm_explanations(
+            db_session, top_n=4, words_per_minute=0, checkpoint_path=checkpoint_path
+        ))
+    finally:
+        ai.set_provider(None)
+    assert processed == 0
+    assert failing.calls == 1  # stopped after the first failed batch
+    with open(checkpoint_path) as f:
+        assert json.load(f) == {str(book.id): []}
+
+    provider = ai.FakeProvider()
+    ai.set_provider(provider)
+    try:
+        processed = asyncio.run(prewarm.prewarm_explanations(
+            db_session, top_n=4, words_per_minute=0, checkpoint_path=checkpoint_path
+        ))
+    finally:
+        ai.set_provider(None)
+    assert processed == 4
+
+
+def test_malformed_checkpoint_is_rejected(tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    checkpoint_path.write_text(json.dumps({"some-book": 40}))
+    with pytest.raises(ValueError):
+        prewarm.load_checkpoint(str(checkpoint_path))
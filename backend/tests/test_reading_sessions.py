@@ -0,0 +1,121 @@
+from datetime import date
+from uuid import uuid4
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend import crud, models, reading_sessions, schemas, security
+from backend.reading_sessions import HeartbeatCoalescer
+from backend.tests.conftest import TestingSessionLocal
+
+
+def login(client: TestClient, email: str) -> dict:
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_heartbeats_are_coalesced_into_one_flush(client: TestClient, db_session: Session, heartbeat_coalescer: HeartbeatCoalescer):
+    headers = login(client, "heartbeat@example.com")
+    book = models.Book(id=uuid4(), title="Platero", author="Jiménez", language="es", difficulty_level=2)
+    db_session.add(book)
+    db_session.commit()
+
+    for paragraph_index in range(1, 6):
+        response = client.post("/users/me/reading/heartbeat", headers=headers, json={
+            "book_id": str(book.id), "minutes": 1, "paragraph_index": paragraph_index,
+        })
+        assert response.status_code == 202
+    # Nothing is written until the flush.
+    assert db_session.query(models.ReadingActivity).count() == 0
+
+    # One activity row and one progress row, whatever the number of heartbeats.
+    assert heartbeat_coalescer.flush() == 2
+    activity = db_session.query(models.ReadingActivity).one()
+    assert (activity.date, activity.minutes_read) == (date.today(), 5)
+    link = db_session.query(models.UserBookLink).one()
+    assert (link.book_id, link.progress) == (book.id, 5)
+
+    # Later flushes add minutes and move progress with upserts.
+    client.post("/users/me/reading/heartbeat", headers=headers, json={"book_id": str(book.id), "minutes": 2, "paragraph_index": 9})
+    heartbeat_coalescer.flush()
+    db_session.expire_all()
+    assert db_session.query(models.ReadingActivity).one().minutes_read == 7
+    assert db_session.query(models.UserBookLink).one().progress == 9
+
+    stats = client.get("/users/me/stats", headers=headers).json()
+    assert (stats["total_minutes_read"], stats["reading_streak"]) == (7, 1)
+
+
+
+def test_cached_stats_reflect_a_heartbeat_flush(client: TestClient, db_session: Session, heartbeat_coalescer: HeartbeatCoalescer):
+    """
+    The flush writes with Core statements, which skip the mapper listeners; the
+    next stats request must still see its minutes rather than the cached numbers.
+    """
+    headers = login(client, "heartbeat-stats@example.com")
+    assert client.get("/users/me/stats", headers=headers).json()["total_minutes_read"] == 0
+
+    client.post("/users/me/reading/heartbeat", headers=headers, json={"minutes": 3})
+    heartbeat_coalescer.flush()
+
+    stats = client.get("/users/me/stats", headers=headers).json()
+    assert (stats["total_minutes_read"], stats["reading_streak"]) == (3, 1)
+
+def test_progress_for_unknown_books_is_dropped(client: TestClient, db_session: Session, heartbeat_coalescer: HeartbeatCoalescer):
+    headers = login(client, "heartbeat-unknown@example.com")
+    client.post("/users/me/reading/heartbeat", headers=headers, json={"book_id": str(uuid4()), "minutes": 3, "paragraph_index": 4})
+    assert heartbeat_coalescer.flush() == 1
+    assert db_session.query(models.UserBookLink).count() == 0
+    assert db_session.query(models.ReadingActivity).one().minutes_read == 3
+
+
+def test_logging_activity_twice_upserts_one_row(db_session: Session):
+    user = models.User(id=uuid4(), email="upsert-activity@example.com", hashed_password="...")
+    db_session.add(user)
+    db_session.commit()
+
+    crud.log_or_update_reading_activity(db=db_session, user_id=user.id, minutes=10)
+    activity = crud.log_or_update_reading_activity(db=db_session, user_id=user.id, minutes=5)
+    assert activity.minutes_read == 15
+    assert db_session.query(models.ReadingActivity).filter_by(user_id=user.id).count() == 1
+
+
+def test_a_failing_user_does_not_hold_back_the_others(db_session: Session, monkeypatch):
+    """
+    Tests that when one user's rows can't be written, everyone else's still are,
+    and that the bad update is dropped after `max_attempts` flushes.
+    """
+    good, bad = uuid4(), uuid4()
+    db_session.add(models.User(id=good, email="good-reader@example.com", hashed_password="..."))
+    db_session.commit()
+
+    write = reading_sessions.write_reading_progress
+
+    def failing_for_bad_user(db, minutes, progress):
+        if any(user_id == bad for user_id, _day in minutes):
+            raise RuntimeError("foreign key violation")
+        return write(db, minutes, progress)
+    monkeypatch.setattr(reading_sessions, "write_reading_progress", failing_for_bad_user)
+
+    coalescer = HeartbeatCoalescer(flush_interval=3600, max_attempts=2, session_factory=TestingSessionLocal)
+    heartbeat = schemas.ReadingHeartbeat(minutes=4)
+    coalescer.record(good, heartbeat)
+    coalescer.record(bad, heartbeat)
+    try:
+        assert coalescer.flush() == 1
+        assert db_session.query(models.ReadingActivity).one().user_id == good
+        assert coalescer.stats().pending == 1
+
+        coalescer.flush()
+        stats = coalescer.stats()
+        assert (stats.pending, stats.dropped) == (0, 1)
+    finally:
+        coalescer.stop()
+
+
+def test_heartbeat_stats_are_admin_only(client: TestClient, monkeypatch):
+    headers = login(client, "heartbeat-admin@example.com")
+    assert client.get("/admin/reading/heartbeats/stats", headers=headers).status_code == 403
+
+    monkeypatch.setattr(security, "ADMIN_EMAILS", {"heartbeat-admin@example.com"})
+    assert client.get("/admin/reading/heartbeats/stats", headers=headers).json()["dropped"] == 0
@@ -1,6 +1,7 @@
 # backend/tests/test_recommendations.py
 from uuid import uuid4
-from backend import crud, models
+from sqlalchemy import update
+from backend import coverage, crud, models
 
 # Helper function to create a book with a specific vocabulary
 def create_book_with_words(db_session, title, language, difficulty, words):
@@ -92,4 +93,67 @@ def test_recommendations_with_vocabulary_coverage(db_session):
     assert recommendations[1].id == good_book.id
     # The "Library Book" should not be in the list, even though it has 100% coverage
     recommended_ids = {rec.id for rec in recommendations}
-    assert library_book.id not in recommended_ids
\ No newline at end of file
+    assert library_book.id not in recommended_ids
+
+def test_coverage_index_matches_set_intersection(db_session):
+    """
+    Tests that the vectorized coverage pass agrees with a per-book set intersection
+    and is rebuilt when a new book is ingested.
+    """
+    book_a = create_book_with_words(db_session, "Book A", "en", 1, {"uno", "dos", "tres", "cuatro"})
+    book_b = create_book_with_words(db_session, "Book B", "en", 1, {"dos", "cinco"})
+    known = {"dos", "tres", "unrelated"}
+
+    index = coverage.get_coverage_index(db_session)
+    scores = dict(zip(index.book_ids, index.coverage(known)))
+    assert scores[book_a.id] == 2 / 4
+    assert scores[book_b.id] == 1 / 2
+
+    book_c = create_book_with_words(db_session, "Book C", "en", 1, {"tres"})
+    index = coverage.get_coverage_index(db_session)
+    assert dict(zip(index.book_ids, index.coverage(known)))[book_c.id] == 1.0
+
+
+def test_recommendations_use_token_weighted_coverage(db_session):
+    """
+    Tests that coverage counts running words: knowing a word that fills most of a book
+    matters more than knowing many words that each occur once.
+    """
+    user = models.User(id=uuid4(), email="tokens@example.com", hashed_password="...")
+    db_session.add(user)
+    add_vocabulary_to_user(db_session, user, {"el"})
+
+    # Type coverage is 1/50 for both; token coverage is 98/147 for the first one.
+    dense_book = create_book_with_words(db_session, "Dense", "es", 1, {"el"} | {f"w{i}" for i in range(49)})
+    sparse_book = create_book_with_words(db_session, "Sparse", "es", 1, {"el"} | {f"v{i}" for i in range(49)})
+    el = db_session.query(models.Word).filter_by(text="el", language="es").one()
+    db_session.execute(update(models.BookWordLink).where(
+        models.BookWordLink.c.book_id == dense_book.id, models.BookWordLink.c.word_id == el.id
+    ).values(occurrences=98))
+    db_session.commit()
+
+    index = coverage.get_coverage_index(db_session)
+    token_coverage = dict(zip(index.book_ids, index.token_coverage({"el"})))
+    assert token_coverage[dense_book.id] == 98 / 147
+    assert token_coverage[sparse_book.id] == 1 / 50
+
+    recommendations = crud.get_user_recommendations(db=db_session, user=user, limit=2)
+    assert [book.id for book in recommendations] == [dense_book.id, sparse_book.id]
+
+
+def test_coverage_index_follows_the_catalog_version(db_session, replica):
+    """
+    Tests that a version bump (e.g. from populate_db in another process) rebuilds the
+    index, and that the primary and a replica each keep their own index.
+    """
+    book = create_book_with_words(db_session, "Versioned", "en", 1, {"uno"})
+    index = coverage.get_coverage_index(db_session)
+    assert coverage.get_coverage_index(db_session) is index
+
+    coverage.bump_catalog_version(db_session)
+    db_session.commit()
+    assert coverage.get_coverage_index(db_session) is not index
+
+    # The replica has no books yet; its empty index doesn't replace the primary's.
+    assert coverage.get_coverage_index(replica).book_ids == []
+    assert coverage.get_coverage_index(db_session).book_ids == [book.id]
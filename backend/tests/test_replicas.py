@@ -0,0 +1,128 @@
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend import crud, models, replicas
+from backend.replicas import ReadRouter, ReplicaWriteError
+
+
+def _login(client: TestClient, email: str) -> dict:
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _user_id(db_session: Session, email: str) -> uuid.UUID:
+    return db_session.query(models.User.id).filter(models.User.email == email).scalar()
+
+
+def test_catalog_reads_are_served_by_the_replica(client: TestClient, db_session: Session, replica: Session):
+    """
+    Anonymous catalog reads go to the replica; the primary's rows aren't visible there.
+    """
+    db_session.add(models.Book(id=uuid.uuid4(), title="Primary Only", author="A", language="es", difficulty_level=1))
+    db_session.commit()
+    replica.add(models.Book(id=uuid.uuid4(), title="Replica Only", author="A", language="es", difficulty_level=1))
+    replica.commit()
+
+    response = client.get("/books/")
+    assert response.status_code == 200
+    assert [book["title"] for book in response.json()] == ["Replica Only"]
+    assert replicas.router.stats().replica_reads == 1
+
+
+def test_reads_stay_on_the_primary_after_the_users_own_write(client: TestClient, db_session: Session, replica: Session):
+    writer = _login(client, "writer@example.com")
+    other_client = TestClient(client.app)
+    reader = _login(other_client, "reader@example.com")
+
+    # Before writing, the user's reads come from the (empty) replica.
+    assert client.get("/vocabulary/", headers=writer).json()["items"] == []
+
+    created = client.post("/vocabulary/", headers=writer, json={"word": "hola", "definition": "{}", "context_sentence": "..."})
+    assert created.status_code == 200
+    assert replicas.LAST_WRITE_COOKIE in created.cookies
+
+    # The write's cookie pins the writer to the primary, so they see their new word...
+    assert [item["word"] for item in client.get("/vocabulary/", headers=writer).json()["items"]] == ["hola"]
+    # ...while other users keep reading from the replica.
+    other_client.get("/vocabulary/", headers=reader)
+    stats = replicas.router.stats()
+    assert stats.replica_reads == 2
+    assert stats.primary_reads == 1
+
+
+def test_stickiness_holds_across_workers(client: TestClient, db_session: Session, replica: Session, monkeypatch):
+    """
+    The last write travels with the client, so a worker that never saw the write still honours it.
+    """
+    headers = _login(client, "roaming@example.com")
+    client.post("/vocabulary/", headers=headers, json={"word": "hola", "definition": "{}", "context_sentence": "..."})
+
+    fresh_worker = ReadRouter(replicas.router.replica_urls, stickiness_seconds=60)
+    monkeypatch.setattr(replicas, "router", fresh_worker)
+
+    assert [item["word"] for item in client.get("/vocabulary/", headers=headers).json()["items"]] == ["hola"]
+    assert fresh_worker.stats().primary_reads == 1
+
+
+def test_async_reads_are_routed_too(client: TestClient, db_session: Session, replica: Session):
+    email = "async-reader@example.com"
+    headers = _login(client, email)
+    user_id = _user_id(db_session, email)
+    replica.add(models.Vocabulary(
+        user_id=user_id, word="adiós", definition="{}", context_sentence="...",
+        next_review_at=datetime.now(timezone.utc) - timedelta(days=1),
+    ))
+    replica.commit()
+
+    assert client.get("/vocabulary/due-count", headers=headers).json() == {"due": 1}
+    assert [word["word"] for word in client.get("/vocabulary/due-for-review", headers=headers).json()["items"]] == ["adiós"]
+
+
+def test_stats_on_a_replica_do_not_write(client: TestClient, db_session: Session, replica: Session):
+    """
+    Stats for a user without streak state are computed on the replica without storing the backfill.
+    """
+    headers = _login(client, "stats-reader@example.com")
+
+    response = client.get("/users/me/stats", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["reading_streak"] == 0
+    assert replica.query(models.ReadingStreak).count() == 0
+    # Stats read from a replica may be stale, so they aren't cached.
+    assert crud.user_stats_cache.get(_user_id(db_session, "stats-reader@example.com"), date.today()) is None
+
+
+def test_replica_sessions_refuse_writes(replica: Session):
+    session = replicas.router.replica_session()
+    try:
+        session.add(models.Book(id=uuid.uuid4(), title="Nope", author="A", language="es", difficulty_level=1))
+        with pytest.raises(ReplicaWriteError):
+            session.commit()
+    finally:
+        session.close()
+
+
+def test_last_write_cookie_expires_and_is_bound_to_its_user():
+    router = ReadRouter(["sqlite://"], stickiness_seconds=5)
+    user_id = uuid.uuid4()
+    cookie = router.last_write_cookie(user_id)
+
+    assert router.wrote_recently(user_id, cookie)
+    assert not router.wrote_recently(uuid.uuid4(), cookie)
+    assert not router.wrote_recently(user_id, router.last_write_cookie(user_id, written_at=time.time() - 10))
+    # A cookie that wasn't signed by us is ignored.
+    assert not router.wrote_recently(user_id, cookie[:-1] + ("0" if cookie[-1] != "0" else "1"))
+    assert not router.wrote_recently(user_id, f"{user_id}:{time.time()}")
+
+
+def test_without_replicas_every_read_uses_the_primary():
+    router = ReadRouter([])
+
+    assert not router.use_replica(False)
+    assert router.stats().primary_reads == 1
@@ -0,0 +1,87 @@
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.rollups import RollupScheduler, advance_rollups
+from backend.tests.conftest import TestingSessionLocal
+
+
+def add_event(db: Session, user_id: uuid.UUID, name: str, created_at: datetime):
+    db.add(models.Event(user_id=user_id, event_name=name, created_at=created_at))
+
+
+def test_rollups_advance_incrementally(client: TestClient, db_session: Session, admin_headers: dict):
+    alice, bob = uuid.uuid4(), uuid.uuid4()
+    day_one = datetime(2026, 3, 1, 9, tzinfo=timezone.utc)
+    day_two = day_one + timedelta(days=1)
+    for created_at, user_id, name in [
+        (day_one, alice, "page_view"),
+        (day_one + timedelta(minutes=1), alice, "page_view"),
+        (day_one + timedelta(minutes=2), bob, "page_view"),
+        (day_one + timedelta(minutes=3), bob, "word_saved"),
+    ]:
+        add_event(db_session, user_id, name, created_at)
+    db_session.commit()
+
+    # Small batches exercise the keyset walk past the watermark.
+    assert advance_rollups(db_session, now=day_two + timedelta(hours=1), batch_size=3) == 4
+    # Nothing new: nothing is counted twice.
+    assert advance_rollups(db_session, now=day_two + timedelta(hours=1)) == 0
+
+    # Later events for the same day (from a returning user) and the next day.
+    add_event(db_session, alice, "page_view", day_one + timedelta(hours=5))
+    add_event(db_session, alice, "page_view", day_two)
+    # Too recent: inside the lateness window, left for the next run.
+    add_event(db_session, bob, "page_view", day_two + timedelta(minutes=58))
+    db_session.commit()
+    assert advance_rollups(db_session, now=day_two + timedelta(hours=1)) == 2
+
+    response = client.get("/analytics/rollups", params={"event_name": "page_view"}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"day": "2026-03-01", "event_name": "page_view", "event_count": 4, "user_count": 2},
+        {"day": "2026-03-02", "event_name": "page_view", "event_count": 1, "user_count": 1},
+    ]
+
+    assert advance_rollups(db_session, now=day_two + timedelta(hours=2)) == 1
+    rollup = db_session.get(models.EventDailyRollup, (date(2026, 3, 2), "page_view"))
+    assert (rollup.event_count, rollup.user_count) == (2, 2)
+
+    day_one_only = client.get("/analytics/rollups", params={"start": "2026-03-01", "end": "2026-03-01"}, headers=admin_headers).json()
+    assert [(r["event_name"], r["event_count"]) for r in day_one_only] == [("page_view", 4), ("word_saved", 1)]
+
+
+def test_operational_endpoints_are_admin_only(client: TestClient, admin_headers: dict):
+    client.post("/users/", json={"email": "reader@example.com", "password": "testpassword"})
+    token = client.post("/token", data={"username": "reader@example.com", "password": "testpassword"}).json()["access_token"]
+    reader_headers = {"Authorization": f"Bearer {token}"}
+
+    for path in ["/analytics/rollups", "/events/buffer/stats", "/explain/cache/stats", "/database/read-routing/stats"]:
+        assert client.get(path).status_code == 401, path
+        assert client.get(path, headers=reader_headers).status_code == 403, path
+        assert client.get(path, headers=admin_headers).status_code == 200, path
+
+
+def test_scheduler_advances_rollups_in_the_background(db_session: Session):
+    add_event(db_session, uuid.uuid4(), "page_view", datetime.now(timezone.utc) - timedelta(hours=1))
+    db_session.commit()
+
+    scheduler = RollupScheduler(interval=0.05, session_factory=TestingSessionLocal)
+    scheduler.start()
+    try:
+        deadline = time.monotonic() + 5
+        while scheduler.processed == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        scheduler.stop()
+
+    assert scheduler.processed == 1
+    assert db_session.query(models.EventDailyRollup).one().event_count == 1
+
+    # Turned off: start() doesn't schedule anything.
+    disabled = RollupScheduler(interval=0, session_factory=TestingSessionLocal)
+    disabled.start()
+    assert disabled._thread is None
@@ -36,7 +36,7 @@ def test_srs_flow(client: TestClient, db_session: Session):
     # 4. Act & Assert: Fetch words due for review
     due_response = client.get("/vocabulary/due-for-review", headers=headers)
     assert due_response.status_code == 200
-    due_words = due_response.json()
+    due_words = due_response.json()["items"]
     assert len(due_words) == 1
     
     # --- CONVERT THIS ID FOR THE NEXT API CALL ---
@@ -64,4 +64,64 @@ def test_srs_flow(client: TestClient, db_session: Session):
     # 6. Act & Assert: Fetch due words again
     due_response_after = client.get("/vocabulary/due-for-review", headers=headers)
     assert due_response_after.status_code == 200
-    assert len(due_response_after.json()) == 0
\ No newline at end of file
+    assert due_response_after.json() == {"items": [], "next_cursor": None}
+
+def test_due_queue_is_paged_most_overdue_first(client: TestClient, db_session: Session):
+    email = "srs-queue@example.com"
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Five due words (word0 is the most overdue) and one that is not due yet.
+    utc_now = datetime.now(timezone.utc)
+    for i, days_overdue in enumerate([30, 20, 10, 5, 1, -1]):
+        word_id = uuid.UUID(client.post("/vocabulary/", headers=headers, json={"word": f"word{i}", "definition": "{}", "context_sentence": "..."}).json()["id"])
+        db_session.get(models.Vocabulary, word_id).next_review_at = utc_now - timedelta(days=days_overdue)
+    db_session.commit()
+
+    assert client.get("/vocabulary/due-count", headers=headers).json() == {"due": 5}
+
+    first = client.get("/vocabulary/due-for-review?limit=2", headers=headers).json()
+    assert [w["word"] for w in first["items"]] == ["word0", "word1"]
+
+    second = client.get(f"/vocabulary/due-for-review?limit=2&cursor={first['next_cursor']}", headers=headers).json()
+    assert [w["word"] for w in second["items"]] == ["word2", "word3"]
+
+    last = client.get(f"/vocabulary/due-for-review?limit=2&cursor={second['next_cursor']}", headers=headers).json()
+    assert [w["word"] for w in last["items"]] == ["word4"]
+    assert last["next_cursor"] is None
+
+    assert client.get("/vocabulary/due-for-review?cursor=garbage", headers=headers).status_code == 400
+
+
+def test_batch_review_applies_in_one_request(client: TestClient, db_session: Session):
+    email = "srs-batch@example.com"
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    good_id = client.post("/vocabulary/", headers=headers, json={"word": "bueno", "definition": "{}", "context_sentence": "..."}).json()["id"]
+    bad_id = client.post("/vocabulary/", headers=headers, json={"word": "malo", "definition": "{}", "context_sentence": "..."}).json()["id"]
+    missing_id = str(uuid.uuid4())
+
+    reviewed_at = datetime.now(timezone.utc) - timedelta(days=2)
+    response = client.post("/vocabulary/reviews/batch", headers=headers, json={"reviews": [
+        {"vocab_id": good_id, "performance_rating": 5, "reviewed_at": reviewed_at.isoformat()},
+        {"vocab_id": bad_id, "performance_rating": 1},
+        {"vocab_id": missing_id, "performance_rating": 4},
+    ]})
+    assert response.status_code == 200
+    result = response.json()
+    assert result["not_found"] == [missing_id]
+    updated = {item["id"]: item for item in result["updated"]}
+    assert updated[good_id]["interval"] == 6
+    assert updated[bad_id]["interval"] == 1
+
+    # Offline reviews are scheduled from when they happened, not from the sync.
+    good = db_session.get(models.Vocabulary, uuid.UUID(good_id))
+    db_session.refresh(good)
+    scheduled = good.next_review_at.replace(tzinfo=timezone.utc)
+    assert abs(scheduled - (reviewed_at + timedelta(days=6))) < timedelta(seconds=5)
+
+    invalid = client.post("/vocabulary/reviews/batch", headers=headers, json={"reviews": [{"vocab_id": good_id, "performance_rating": 9}]})
+    assert invalid.status_code == 422
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from backend import crud, models
+from backend.srs_forecast import forecast_reviews, parse_distribution, sm2_step
+
+
+def test_vectorized_step_matches_crud():
+    for interval, ease in [(1, 2.5), (6, 2.5), (15, 1.3), (40, 2.9)]:
+        for rating in range(6):
+            card = models.Vocabulary(interval=interval, ease_factor=ease)
+            crud.apply_srs_review(card, rating)
+            new_intervals, new_ease = sm2_step(np.array([interval]), np.array([ease]), np.array([rating]))
+            assert new_intervals[0] == card.interval
+            assert np.isclose(new_ease[0], card.ease_factor)
+
+
+def test_forecast_with_perfect_recall_is_deterministic():
+    # Two new cards due today, one due in 3 days. Always rated 5: intervals go 1 -> 6 -> 16.
+    daily = forecast_reviews(
+        intervals=np.array([1, 1, 1]),
+        ease_factors=np.array([2.5, 2.5, 2.5]),
+        due_days=np.array([0, 0, 3]),
+        days=10,
+        distribution={5: 1.0},
+        runs=3,
+    )
+    expected = np.zeros(10)
+    expected[[0, 3, 6, 9]] = [2, 1, 2, 1]
+    assert np.array_equal(daily, expected)
+
+
+def test_parse_distribution_rejects_bad_ratings():
+    assert parse_distribution("5:0.5,1:0.5") == {5: 0.5, 1: 0.5}
+    for spec in ["7:1", "5:-1", "abc"]:
+        with pytest.raises(ValueError):
+            parse_distribution(spec)
+
+
+def test_forecast_endpoint(client: TestClient, db_session: Session):
+    email = "forecast@example.com"
+    client.post("/users/", json={"email": email, "password": "testpassword"})
+    token = client.post("/token", data={"username": email, "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for word in ["uno", "dos"]:
+        client.post("/vocabulary/", headers=headers, json={"word": word, "definition": "{}", "context_sentence": "..."})
+
+    response = client.get("/vocabulary/forecast?days=7&distribution=5:1", headers=headers)
+    assert response.status_code == 200
+    forecast = response.json()
+    assert forecast["cards"] == 2
+    assert forecast["daily_reviews"] == [2.0, 0, 0, 0, 0, 0, 2.0]
+
+    assert client.get("/vocabulary/forecast?distribution=9:1", headers=headers).status_code == 400
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text
+
+from backend import ai, coverage, models, startup
+from backend.tests.conftest import TestingAsyncSessionLocal, TestingSessionLocal
+
+
+def test_importing_the_app_does_not_load_the_ai_sdk_or_need_a_key():
+    """
+    The AI SDK is only imported by the first explanation, and a missing key doesn't break the import.
+    """
+    code = "import sys, backend.main; print('google.generativeai' in sys.modules)"
+    env = {key: value for key, value in os.environ.items() if key != "GOOGLE_API_KEY"}
+    result = subprocess.run([sys.executable, "-c", code], cwd=startup.PROJECT_ROOT, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
+
+
+def test_warm_up_primes_the_caches(db_session, explanation_cache):
+    now = datetime.now(timezone.utc)
+    explanation = ai.AIExplanation(definition="d", part_of_speech="noun", translation="t").model_dump()
+    db_session.add_all([
+        models.ExplanationCacheEntry(language="es", word="nuevo", context_hash="", explanation=explanation, created_at=now),
+        models.ExplanationCacheEntry(language="es", word="viejo", context_hash="", explanation=explanation,
+                                     created_at=now - timedelta(minutes=5)),
+        models.ExplanationCacheEntry(language="es", word="caducado", context_hash="", explanation=explanation,
+                                     created_at=now - timedelta(seconds=explanation_cache.ttl_seconds + 60)),
+        models.Book(id=uuid4(), title="Platero", author="Jiménez", language="es", difficulty_level=2),
+    ])
+    db_session.commit()
+    coverage.invalidate_coverage_index()
+
+    timings = asyncio.run(startup.warm_up(
+        session_factory=TestingSessionLocal, async_session_factory=TestingAsyncSessionLocal, explanations=10
+    ))
+
+    assert set(timings) == {"database", "async_database", "coverage_index", "explanation_cache"}
+    # Fresh entries are in memory, expired ones aren't, and the counters are untouched.
+    assert explanation_cache.make_key("es", "nuevo") in explanation_cache
+    assert explanation_cache.make_key("es", "viejo") in explanation_cache
+    assert explanation_cache.make_key("es", "caducado") not in explanation_cache
+    assert explanation_cache.stats()["hits"] == 0
+    assert len(coverage._indexes) == 1
+
+
+def test_warm_up_survives_a_failing_step(db_session, explanation_cache, monkeypatch):
+    def broken(limit):
+        raise RuntimeError("no table")
+    monkeypatch.setattr(explanation_cache, "warm", broken)
+
+    timings = asyncio.run(startup.warm_up(
+        session_factory=TestingSessionLocal, async_session_factory=TestingAsyncSessionLocal
+    ))
+
+    assert "explanation_cache" in timings
+
+
+def test_readiness_follows_the_startup_steps(client: TestClient, monkeypatch):
+    monkeypatch.setattr(startup, "_ready", False)
+    assert client.get("/health/ready").status_code == 503
+
+    startup.mark_ready()
+    assert client.get("/health/ready").json() == {"status": "ready"}
+
+
+def test_create_schema_adds_missing_indexes_to_existing_tables(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP INDEX ix_vocabulary_user_next_review"))
+        connection.execute(text("DROP TABLE catalog_version"))
+        connection.execute(text("CREATE TABLE catalog_version (id INTEGER PRIMARY KEY)"))
+
+    report = startup.create_schema(bind=engine)
+
+    assert report == {"created_indexes": ["ix_vocabulary_user_next_review"], "missing_columns": ["catalog_version.version"]}
+    assert "ix_vocabulary_user_next_review" in {index["name"] for index in inspect(engine).get_indexes("vocabulary")}
+    assert startup.create_schema(bind=engine)["created_indexes"] == []
+    engine.dispose()
+
+
+def test_parse_import_times():
+    report = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   encodings.aliases\n"
+        "import time:      3400 |      15000 | backend.main\n"
+    )
+
+    assert startup.parse_import_times(report) == [("encodings.aliases", 120, 120), ("backend.main", 3400, 15000)]
@@ -1,9 +1,12 @@
+import threading
+import time
 import pytest
 from datetime import date, timedelta
 from uuid import uuid4
 
 # Import your project's modules
 from backend import crud, models, schemas
+from backend.tests.conftest import TestingSessionLocal
 
 def test_get_user_stats_no_activity(db_session):
     """
@@ -102,4 +105,118 @@ def test_get_user_stats_streak_ending_yesterday(db_session):
 
     # Assert
     assert stats.reading_streak == 2
-    assert stats.total_minutes_read == 20
\ No newline at end of file
+    assert stats.total_minutes_read == 20
+
+
+def test_long_streak_spans_several_scan_windows(db_session):
+    """
+    A streak longer than the first scan window is still counted in full.
+    """
+    user = models.User(id=uuid4(), email="long-streak@example.com", hashed_password="...")
+    today = date.today()
+    streak_days = crud.STREAK_SCAN_DAYS * 2 + 5
+    user.reading_history = [
+        models.ReadingActivity(date=today - timedelta(days=i), minutes_read=1) for i in range(streak_days)
+    ] + [models.ReadingActivity(date=today - timedelta(days=streak_days + 1), minutes_read=1)]
+    db_session.add(user)
+    db_session.commit()
+
+    assert crud.get_reading_streak(db_session, user.id, today) == streak_days
+    # An old streak that ended two days ago doesn't count.
+    assert crud.get_reading_streak(db_session, user.id, today + timedelta(days=2)) == 0
+
+
+def test_stats_are_cached_until_the_next_write(db_session):
+    user = models.User(id=uuid4(), email="cached-stats@example.com", hashed_password="...")
+    db_session.add(user)
+    db_session.commit()
+
+    first = crud.get_user_stats(db=db_session, user=user)
+    assert crud.user_stats_cache.get(user.id, date.today()) == first
+
+    crud.log_or_update_reading_activity(db=db_session, user_id=user.id, minutes=12)
+    assert crud.user_stats_cache.get(user.id, date.today()) is None
+    assert crud.get_user_stats(db=db_session, user=user).total_minutes_read == 12
+
+    crud.create_vocabulary_entry(
+        db=db_session,
+        vocabulary=schemas.VocabularyCreate(word="gato", definition="cat", context_sentence="El gato."),
+        user_id=user.id,
+    )
+    stats = crud.get_user_stats(db=db_session, user=user)
+    assert (stats.total_words_learned, stats.reading_streak) == (1, 1)
+
+
+def test_streak_state_is_maintained_on_activity(db_session):
+    user = models.User(id=uuid4(), email="streak-state@example.com", hashed_password="...")
+    today = date.today()
+    user.reading_history = [
+        models.ReadingActivity(date=today - timedelta(days=i), minutes_read=5) for i in range(1, 4)
+    ] + [models.ReadingActivity(date=today - timedelta(days=i), minutes_read=5) for i in range(10, 15)]
+    db_session.add(user)
+    db_session.commit()
+
+    # The first activity under streak tracking backfills from history, then advances.
+    crud.log_or_update_reading_activity(db=db_session, user_id=user.id, minutes=5)
+    streak = db_session.get(models.ReadingStreak, user.id)
+    assert (streak.current_streak, streak.longest_streak, streak.last_active_date) == (4, 5, today)
+
+    # More minutes on the same day don't extend the streak.
+    crud.log_or_update_reading_activity(db=db_session, user_id=user.id, minutes=5)
+    stats = crud.get_user_stats(db=db_session, user=user)
+    assert (stats.reading_streak, stats.longest_streak, stats.last_active_date) == (4, 5, today)
+
+
+def test_repair_job_fixes_drifted_streaks(db_session):
+    from backend.repair_streaks import repair_reading_streaks
+
+    user = models.User(id=uuid4(), email="repair@example.com", hashed_password="...")
+    today = date.today()
+    user.reading_history = [models.ReadingActivity(date=today - timedelta(days=i), minutes_read=5) for i in range(6)]
+    db_session.add(user)
+    db_session.add(models.ReadingStreak(user_id=user.id, current_streak=1, longest_streak=1, last_active_date=today))
+    db_session.commit()
+    assert crud.get_user_stats(db=db_session, user=user).reading_streak == 1
+
+    assert repair_reading_streaks(db_session, [user.id]) == 1
+    stats = crud.get_user_stats(db=db_session, user=user)
+    assert (stats.reading_streak, stats.longest_streak) == (6, 6)
+    assert repair_reading_streaks(db_session, [user.id]) == 0
+
+
+def test_concurrent_first_activities_share_one_streak_row(db_session):
+    """
+    Two sessions record a user's first activity at once, e.g. a heartbeat flush and
+    /reading/log in another worker: neither may fail on the streak row's primary key.
+    """
+    user = models.User(id=uuid4(), email="streak-race@example.com", hashed_password="...")
+    db_session.add(user)
+    db_session.commit()
+    today = date.today()
+
+    first, second = TestingSessionLocal(), TestingSessionLocal()
+    errors = []
+
+    def advance_in_second_session():
+        try:
+            crud.advance_reading_streak(second, user.id, today)
+            second.commit()
+        except Exception as e:
+            errors.append(e)
+            second.rollback()
+
+    try:
+        # The first session hasn't committed when the second one starts.
+        crud.advance_reading_streak(first, user.id, today)
+        racer = threading.Thread(target=advance_in_second_session)
+        racer.start()
+        time.sleep(0.2)
+        first.commit()
+        racer.join()
+    finally:
+        first.close()
+        second.close()
+
+    assert errors == []
+    streak = db_session.get(models.ReadingStreak, user.id)
+    assert (streak.current_streak, streak.last_active_date) == (1, today)
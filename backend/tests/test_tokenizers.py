@@ -0,0 +1,22 @@
+from backend.tokenizers import get_tokenizer, DEFAULT_TOKENIZER
+
+
+def test_spanish_keeps_accented_words_whole():
+    tokens = get_tokenizer("es").tokenize("¿Dónde está el niño? ¡Allí, junto a la señora Núñez!")
+    assert tokens == ["dónde", "está", "el", "niño", "allí", "junto", "a", "la", "señora", "núñez"]
+
+
+def test_french_elision_and_exceptions():
+    tokens = get_tokenizer("fr").tokenize("L’homme qu'il aimait n’était là qu’aujourd’hui, jusqu'à l'été.")
+    assert tokens == ["homme", "il", "aimait", "était", "là", "aujourd'hui", "à", "été"]
+
+
+def test_english_contractions_and_possessives():
+    tokens = get_tokenizer("en").tokenize("The Fox's tail wasn't there; the foxes' den was.")
+    assert tokens == ["the", "fox", "tail", "wasn't", "there", "the", "foxes", "den", "was"]
+
+
+def test_unknown_language_falls_back_and_streams():
+    tokenizer = get_tokenizer("de")
+    assert tokenizer is DEFAULT_TOKENIZER
+    assert list(tokenizer.iter_stream(["Grüße aus", "Köln 2024"])) == ["grüße", "aus", "köln"]
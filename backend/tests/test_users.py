@@ -1,4 +1,6 @@
 from fastapi.testclient import TestClient
+from uuid import UUID, uuid4
+from backend import models, schemas, security
 
 # We don't need to import db_session here because pytest handles it automatically.
 
@@ -71,4 +73,45 @@ def test_login_with_wrong_password_fails(client: TestClient):
         headers={"Content-Type": "application/x-www-form-urlencoded"}
     )
     assert response.status_code == 401
-    assert response.json() == {"detail": "Incorrect email or password"}
\ No newline at end of file
+    assert response.json() == {"detail": "Incorrect email or password"}
+
+def test_principal_is_cached_and_invalidated_on_user_change(client: TestClient, db_session):
+    """
+    Test that id-only endpoints resolve the caller from the identity cache, and that
+    changing the user row drops the cached identity.
+    """
+    user_id = UUID(client.post("/users/", json={"email": "cached@example.com", "password": "pw"}).json()["id"])
+    token = client.post("/token", data={"username": "cached@example.com", "password": "pw"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/vocabulary/due-for-review", headers=headers).status_code == 200
+    assert security.identity_cache.get(user_id).email == "cached@example.com"
+
+    user = db_session.get(models.User, user_id)
+    user.email = "renamed@example.com"
+    db_session.commit()
+    assert security.identity_cache.get(user_id) is None
+
+    # The old token no longer matches the account it was issued for.
+    assert client.get("/vocabulary/due-for-review", headers=headers).status_code == 401
+    assert client.get("/users/me/", headers=headers).status_code == 401
+
+def test_identity_cache_refresh_does_not_evict_other_entries():
+    """
+    Test that re-caching a principal in a full cache replaces its own entry instead
+    of evicting an unrelated one.
+    """
+    cache = security.IdentityCache(ttl_seconds=60, max_entries=2)
+    first = schemas.Principal(id=uuid4(), email="first@example.com")
+    second = schemas.Principal(id=uuid4(), email="second@example.com")
+    cache.put(first)
+    cache.put(second)
+
+    cache.put(first)
+    assert cache.get(first.id) == first
+    assert cache.get(second.id) == second
+
+    # `first` was refreshed last, so `second` is now the oldest entry.
+    cache.put(schemas.Principal(id=uuid4(), email="third@example.com"))
+    assert cache.get(second.id) is None
+    assert cache.get(first.id) == first
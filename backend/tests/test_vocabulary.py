@@ -39,18 +39,23 @@ def test_create_and_read_vocabulary_entry(client: TestClient):
     assert created_entry["word"] == "biblioteca"
     assert created_entry["user_id"] == user_id
 
-    # --- STEP 4 (CORRECTED) ---
-    # Fetch the full user data from the secure /users/me endpoint
+    # --- STEP 4 ---
+    # The profile no longer embeds the vocabulary...
     read_response = client.get("/users/me/", headers=headers)
     assert read_response.status_code == 200
-    
-    # The vocabulary list is now nested inside the user object
-    user_data = read_response.json()
-    read_data = user_data["vocabulary"]
+    assert "vocabulary" not in read_response.json()
+
+    # ...it is listed page by page instead
+    list_response = client.get("/vocabulary/", headers=headers)
+    assert list_response.status_code == 200
+    page = list_response.json()
+    read_data = page["items"]
     
     assert isinstance(read_data, list)
     assert len(read_data) == 1
     assert read_data[0]["word"] == "biblioteca"
+    assert page["total"] == 1
+    assert page["next_cursor"] is None
 
 
 def test_create_vocabulary_entry_unauthorized(client: TestClient):
@@ -65,4 +70,52 @@ def test_create_vocabulary_entry_unauthorized(client: TestClient):
     }
     response = client.post("/vocabulary/", json=vocab_data)
     assert response.status_code == 401
-    assert response.json() == {"detail": "Not authenticated"}
\ No newline at end of file
+    assert response.json() == {"detail": "Not authenticated"}
+
+
+def test_vocabulary_listing_keyset_pagination(client: TestClient):
+    """
+    Tests walking a user's vocabulary page by page with the cursor, plus the prefix filter.
+    """
+    client.post("/users/", json={"email": "pager@example.com", "password": "testpassword"})
+    token = client.post("/token", data={"username": "pager@example.com", "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    words = [f"palabra{i}" for i in range(7)] + ["casa", "cama"]
+    for word in words:
+        client.post("/vocabulary/", headers=headers, json={"word": word, "definition": "{}", "context_sentence": "..."})
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 4}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/vocabulary/", headers=headers, params=params).json()
+        assert page["total"] == len(words)
+        seen.extend(item["word"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == list(reversed(words))
+
+    filtered = client.get("/vocabulary/", headers=headers, params={"q": "ca"}).json()
+    assert {item["word"] for item in filtered["items"]} == {"casa", "cama"}
+    assert filtered["total"] == 2
+
+    assert client.get("/vocabulary/", headers=headers, params={"cursor": "garbage"}).status_code == 400
+
+
+def test_vocabulary_search_matches_wildcards_literally(client: TestClient):
+    client.post("/users/", json={"email": "wildcards@example.com", "password": "testpassword"})
+    token = client.post("/token", data={"username": "wildcards@example.com", "password": "testpassword"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    for word in ["casa", "_casa", "100%", "a\\b"]:
+        client.post("/vocabulary/", headers=headers, json={"word": word, "definition": "{}", "context_sentence": "..."})
+
+    def search(q):
+        return {item["word"] for item in client.get("/vocabulary/", headers=headers, params={"q": q}).json()["items"]}
+
+    assert search("_") == {"_casa"}
+    assert search("%") == set()
+    assert search("100%") == {"100%"}
+    assert search("a\\") == {"a\\b"}
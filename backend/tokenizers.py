@@ -0,0 +1,104 @@
+# backend/tokenizers.py
+import re
+import unicodedata
+from typing import Dict, FrozenSet, Iterable, Iterator, List
+
+# A word is a run of letters (any script, accents included), optionally joined by
+# apostrophes: "niño", "où", "don't", "l'homme", "aujourd'hui".
+WORD_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*")
+
+# Typographic apostrophes and the modifier letter are folded into a plain "'".
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "ʼ": "'", "´": "'"})
+
+
+class Tokenizer:
+    """
+    A compiled, language-specific tokenizer.
+
+    Text is NFC-normalized and lowercased, then split into words by `WORD_PATTERN`.
+    Apostrophes inside a word are resolved by the language's rules:
+      - `elisions`: elided prefixes dropped in front of the head word ("l'homme" -> "homme")
+      - `suffixes`: clitic endings dropped from the word ("fox's" -> "fox")
+      - `keep`: words whose apostrophe is part of the word ("aujourd'hui", "don't")
+      - otherwise, with `split_unknown`, the apostrophe separates two words.
+    """
+
+    def __init__(self, language: str, elisions: Iterable[str] = (), suffixes: Iterable[str] = (),
+                 keep: Iterable[str] = (), split_unknown: bool = True):
+        self.language = language
+        self.elisions: FrozenSet[str] = frozenset(elisions)
+        self.suffixes = tuple(sorted(suffixes, key=len, reverse=True))
+        self.keep: FrozenSet[str] = frozenset(keep)
+        self.split_unknown = split_unknown
+
+    def normalize(self, text: str) -> str:
+        return unicodedata.normalize("NFC", text).translate(_APOSTROPHES).lower()
+
+    def _resolve(self, word: str) -> Iterator[str]:
+        if "'" not in word or word in self.keep:
+            yield word
+            return
+        prefix, _, rest = word.partition("'")
+        if prefix in self.elisions:
+            yield from self._resolve(rest)
+            return
+        for suffix in self.suffixes:
+            if word.endswith(suffix) and len(word) > len(suffix):
+                yield word[:-len(suffix)]
+                return
+        if self.split_unknown:
+            for part in word.split("'"):
+                yield part
+        else:
+            yield word
+
+    def iter_tokens(self, text: str) -> Iterator[str]:
+        """
+        Lazily yields the normalized tokens (running words) of a piece of text.
+        """
+        for match in WORD_PATTERN.finditer(self.normalize(text)):
+            yield from self._resolve(match.group())
+
+    def tokenize(self, text: str) -> List[str]:
+        return list(self.iter_tokens(text))
+
+    def iter_stream(self, chunks: Iterable[str]) -> Iterator[str]:
+        """
+        Tokenizes an iterable of paragraphs or lines without joining them,
+        so memory is bounded by the largest chunk.
+        """
+        for chunk in chunks:
+            yield from self.iter_tokens(chunk)
+
+
+# --- Registry ---
+TOKENIZERS: Dict[str, Tokenizer] = {
+    "en": Tokenizer(
+        "en",
+        suffixes=("'s",),
+        keep=(
+            "don't", "doesn't", "didn't", "can't", "couldn't", "won't", "wouldn't", "shouldn't",
+            "isn't", "aren't", "wasn't", "weren't", "hasn't", "haven't", "hadn't", "mustn't",
+            "i'm", "i've", "i'll", "i'd", "you're", "you've", "you'll", "you'd", "he's", "he'll",
+            "he'd", "she's", "she'll", "she'd", "it's", "we're", "we've", "we'll", "we'd",
+            "they're", "they've", "they'll", "they'd", "that's", "there's", "let's", "o'clock",
+        ),
+        split_unknown=False,
+    ),
+    "fr": Tokenizer(
+        "fr",
+        elisions=("l", "d", "j", "m", "n", "s", "t", "c", "qu", "jusqu", "lorsqu", "puisqu", "quoiqu", "presqu", "quelqu"),
+        keep=("aujourd'hui", "prud'homme", "prud'hommes", "presqu'île", "quelqu'un", "quelqu'une"),
+    ),
+    "es": Tokenizer("es"),
+}
+
+DEFAULT_TOKENIZER = Tokenizer("default")
+
+
+def get_tokenizer(language: str) -> Tokenizer:
+    """
+    Returns the tokenizer for a `Book.language` code, falling back to a generic
+    Unicode-aware tokenizer for languages without specific rules.
+    """
+    return TOKENIZERS.get((language or "").lower(), DEFAULT_TOKENIZER)
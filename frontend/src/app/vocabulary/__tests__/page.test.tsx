@@ -32,18 +32,22 @@ describe('Vocabulary Page', () => {
         const mockUserData = {
             id: 'user-123',
             email: 'test@example.com',
-            vocabulary: [
+        };
+        const mockVocabularyPage = {
+            items: [
                 { id: 'v1', word: 'biblioteca', context_sentence: 'La biblioteca está abierta.', definition: '{"translation": "library"}' },
                 { id: 'v2', word: 'gato', context_sentence: 'El gato duerme.', definition: '{"translation": "cat"}' }
-            ]
+            ],
+            next_cursor: null,
+            total: 2,
         };
         // The component needs both the user and the token to function
         (useAuth as jest.Mock).mockReturnValue({ user: mockUserData, token: 'fake-token' });
 
-        // Mock the fetch call to the /users/me endpoint
+        // Mock the fetch call to the /vocabulary/ endpoint
         (global.fetch as jest.Mock).mockResolvedValue({
             ok: true,
-            json: jest.fn().mockResolvedValue(mockUserData),
+            json: jest.fn().mockResolvedValue(mockVocabularyPage),
         });
 
         // 2. Act: Render the component
@@ -62,12 +66,11 @@ describe('Vocabulary Page', () => {
         const mockUserWithNoWords = {
             id: 'user-456',
             email: 'newuser@example.com',
-            vocabulary: [] // Empty array is key
         };
         (useAuth as jest.Mock).mockReturnValue({ user: mockUserWithNoWords, token: 'fake-token' });
         (global.fetch as jest.Mock).mockResolvedValue({
             ok: true,
-            json: jest.fn().mockResolvedValue(mockUserWithNoWords),
+            json: jest.fn().mockResolvedValue({ items: [], next_cursor: null, total: 0 }), // Empty page is key
         });
 
         // 2. Act
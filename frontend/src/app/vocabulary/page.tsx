@@ -5,11 +5,13 @@ import Link from 'next/link';
 import { BookText, PlayCircle } from 'lucide-react';
 import { useAuth } from '@/providers/AuthProvider'; // Import the useAuth hook
 import { VocabularyItem, AIExplanation } from '@/types';
-import { getUserData } from '../../lib/api';
+import { getVocabularyPage } from '../../lib/api';
 
 const VocabularyPage = () => {
     const { user, token } = useAuth(); // Get the user and token from our Auth context
     const [vocabularyList, setVocabularyList] = useState<VocabularyItem[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState<boolean>(false);
     const [loading, setLoading] = useState<boolean>(true);
     const [error, setError] = useState<string | null>(null);
 
@@ -20,9 +22,9 @@ const VocabularyPage = () => {
                 setLoading(true);
                 setError(null);
                 try {
-                    const userData = await getUserData(token);
-                    // The user's vocabulary is nested inside the user object
-                    setVocabularyList(userData.vocabulary || []);
+                    const page = await getVocabularyPage(token);
+                    setVocabularyList(page.items);
+                    setNextCursor(page.next_cursor);
                 } catch (err) {
                     setError(err instanceof Error ? err.message : 'An unknown error occurred');
                 } finally {
@@ -37,6 +39,20 @@ const VocabularyPage = () => {
         }
     }, [token]); // Re-run this effect if the token changes (e.g., user logs in/out)
 
+    const loadMore = async () => {
+        if (!token || !nextCursor) return;
+        setLoadingMore(true);
+        try {
+            const page = await getVocabularyPage(token, nextCursor);
+            setVocabularyList((current) => [...current, ...page.items]);
+            setNextCursor(page.next_cursor);
+        } catch (err) {
+            setError(err instanceof Error ? err.message : 'An unknown error occurred');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const renderContent = () => {
         if (loading) {
             return <p className="text-center text-slate-500">Loading your vocabulary...</p>;
@@ -94,6 +110,17 @@ const VocabularyPage = () => {
                         </div>
                     );
                 })}
+                {nextCursor && (
+                    <div className="text-center pt-4">
+                        <button
+                            onClick={loadMore}
+                            disabled={loadingMore}
+                            className="px-6 py-2 text-sm font-semibold text-amber-700 dark:text-amber-400 border border-amber-600 rounded-lg hover:bg-amber-50 dark:hover:bg-slate-800 disabled:opacity-50"
+                        >
+                            {loadingMore ? 'Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
         );
     };
@@ -39,14 +39,14 @@ describe('Practice Page', () => {
     });
 
     it('should fetch due vocabulary on load and display the first word', async () => {
-        (api.getDueVocabulary as jest.Mock).mockResolvedValue(mockVocabulary);
+        (api.getDueVocabulary as jest.Mock).mockResolvedValue({ items: mockVocabulary, next_cursor: null });
         render(<PracticePage />);
         expect(api.getDueVocabulary).toHaveBeenCalledWith(mockToken);
         expect(await screen.findByText('biblioteca')).toBeInTheDocument();
     });
 
     it('should call the reviewWord API with rating 5 when "I Knew This" is clicked', async () => {
-        (api.getDueVocabulary as jest.Mock).mockResolvedValue(mockVocabulary);
+        (api.getDueVocabulary as jest.Mock).mockResolvedValue({ items: mockVocabulary, next_cursor: null });
         (api.reviewWord as jest.Mock).mockResolvedValue({});
 
         render(<PracticePage />);
@@ -66,7 +66,7 @@ describe('Practice Page', () => {
     });
 
     it('should call the reviewWord API with rating 1 when "Review Again" is clicked', async () => {
-        (api.getDueVocabulary as jest.Mock).mockResolvedValue(mockVocabulary);
+        (api.getDueVocabulary as jest.Mock).mockResolvedValue({ items: mockVocabulary, next_cursor: null });
         (api.reviewWord as jest.Mock).mockResolvedValue({});
 
         render(<PracticePage />);
@@ -85,14 +85,14 @@ describe('Practice Page', () => {
         });
     });
 
-    it('should display a "no words due" message if the API returns an empty array', async () => {
-        (api.getDueVocabulary as jest.Mock).mockResolvedValue([]);
+    it('should display a "no words due" message if the API returns no due words', async () => {
+        (api.getDueVocabulary as jest.Mock).mockResolvedValue({ items: [], next_cursor: null });
         render(<PracticePage />);
         expect(await screen.findByText(/you have no words due for review right now/i)).toBeInTheDocument();
     });
 
     it('should display the session complete screen after the last card', async () => {
-        (api.getDueVocabulary as jest.Mock).mockResolvedValue([mockVocabulary[0]]);
+        (api.getDueVocabulary as jest.Mock).mockResolvedValue({ items: [mockVocabulary[0]], next_cursor: null });
         (api.reviewWord as jest.Mock).mockResolvedValue({});
 
         render(<PracticePage />);
@@ -106,4 +106,19 @@ describe('Practice Page', () => {
         });
         expect(screen.getByText(/you knew/i).textContent).toContain('1');
     });
-});
\ No newline at end of file
+
+    it('should fetch the next batch of due words when the current one runs out', async () => {
+        (api.getDueVocabulary as jest.Mock)
+            .mockResolvedValueOnce({ items: [mockVocabulary[0]], next_cursor: 'next-batch' })
+            .mockResolvedValueOnce({ items: [mockVocabulary[1]], next_cursor: null });
+        (api.reviewWord as jest.Mock).mockResolvedValue({});
+
+        render(<PracticePage />);
+        await screen.findByText('biblioteca');
+
+        fireEvent.click(screen.getByRole('button', { name: /i knew this/i }));
+
+        expect(await screen.findByText('gato')).toBeInTheDocument();
+        expect(api.getDueVocabulary).toHaveBeenLastCalledWith(mockToken, 'next-batch');
+    });
+});
@@ -13,6 +13,8 @@ const PracticePage = () => {
     const { user, token } = useAuth();
     // --- State Management ---
     const [vocabulary, setVocabulary] = useState<VocabularyItem[]>([]);
+    // Cursor of the next batch of due words, fetched when the current batch runs out
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
     const [currentIndex, setCurrentIndex] = useState(0);
     const [loading, setLoading] = useState<boolean>(true);
     const [error, setError] = useState<string | null>(null);
@@ -28,8 +30,10 @@ const PracticePage = () => {
                 setLoading(true);
                 setError(null);
                 try {
-                    const data = await getDueVocabulary(token);
+                    const page = await getDueVocabulary(token);
+                    const data = page.items;
                     setVocabulary(data);
+                    setNextCursor(page.next_cursor);
                     // 2. Log an event when a practice session starts
                     if (data.length > 0) {
                         logEvent(token, 'practice_session_started', { word_count: data.length });
@@ -52,20 +56,34 @@ const PracticePage = () => {
     }, [currentIndex, vocabulary]);
 
     // --- Event Handlers ---
-    const handleNextCard = () => {
+    const handleNextCard = async () => {
         if (currentIndex < vocabulary.length - 1) {
             setCurrentIndex(currentIndex + 1);
-        } else {
-            // 3. Log an event when the session is completed, before setting the state
-            if (token) {
-                logEvent(token, 'practice_session_completed', {
-                    known_count: knownCount,
-                    review_count: reviewCount,
-                    total_words: vocabulary.length
-                });
+            return;
+        }
+        if (nextCursor && token) {
+            try {
+                const page = await getDueVocabulary(token, nextCursor);
+                setNextCursor(page.next_cursor);
+                if (page.items.length > 0) {
+                    setVocabulary(prev => [...prev, ...page.items]);
+                    setCurrentIndex(currentIndex + 1);
+                    return;
+                }
+            } catch (err) {
+                setError(err instanceof Error ? err.message : 'An unknown error occurred');
+                return;
             }
-            setIsSessionComplete(true);
         }
+        // 3. Log an event when the session is completed, before setting the state
+        if (token) {
+            logEvent(token, 'practice_session_completed', {
+                known_count: knownCount,
+                review_count: reviewCount,
+                total_words: vocabulary.length
+            });
+        }
+        setIsSessionComplete(true);
     };
 
     const handleReview = async (performanceRating: 1 | 5) => {
@@ -80,7 +98,7 @@ const PracticePage = () => {
                 setReviewCount(prev => prev + 1);
             }
 
-            handleNextCard();
+            await handleNextCard();
         } catch (err) {
             console.error("Failed to submit review:", err);
             setError("Could not save review. Please try again.");
@@ -1,4 +1,4 @@
-import { User, UserStats, TokenResponse, Book, BookContent, AIExplanation, VocabularyItem } from "../types";
+import { User, UserStats, TokenResponse, Book, BookContent, AIExplanation, DueVocabularyPage, VocabularyItem, VocabularyPage } from "../types";
 
 export const registerUser = async (email: string, password: string): Promise<User> => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/users/`, {
@@ -40,6 +40,7 @@ export const loginUser = async (email: string, password: string): Promise<TokenR
 
 export const getUserData = async (token: string): Promise<User> => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/users/me/`, {
+        credentials: 'include',
         headers: {
             'Authorization': `Bearer ${token}`,
         },
@@ -89,12 +90,15 @@ export const getAIExplanation = async (word: string, context: string, language:
     return data.explanation;
 };
 
+// Authenticated calls send cookies: the API's last-write cookie keeps a user's reads
+// on the primary database right after their own writes.
 export const saveVocabularyWord = async (
     token: string,
     wordData: { word: string; definition: string; context_sentence: string }
 ): Promise<VocabularyItem> => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/vocabulary/`, {
         method: 'POST',
+        credentials: 'include',
         headers: {
             'Content-Type': 'application/json',
             'Authorization': `Bearer ${token}`
@@ -105,9 +109,12 @@ export const saveVocabularyWord = async (
     return response.json();
 };
 
-export const getDueVocabulary = async (token: string): Promise<VocabularyItem[]> => {
-    // This now fetches the user's specific vocabulary, not the public list.
-    const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/vocabulary/due-for-review`, {
+export const getVocabularyPage = async (token: string, cursor?: string | null, limit: number = 50): Promise<VocabularyPage> => {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.append('cursor', cursor);
+
+    const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/vocabulary/?${params.toString()}`, {
+        credentials: 'include',
         headers: {
             'Authorization': `Bearer ${token}`,
         },
@@ -117,8 +124,25 @@ export const getDueVocabulary = async (token: string): Promise<VocabularyItem[]>
         throw new Error('Failed to fetch your vocabulary. Please try logging in again.');
     }
 
+    return response.json();
+};
+
+export const getDueVocabulary = async (token: string, cursor?: string | null, limit: number = 50): Promise<DueVocabularyPage> => {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.append('cursor', cursor);
+
+    const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/vocabulary/due-for-review?${params.toString()}`, {
+        credentials: 'include',
+        headers: {
+            'Authorization': `Bearer ${token}`,
+        },
+    });
+
+    if (!response.ok) {
+        throw new Error('Failed to fetch your vocabulary. Please try logging in again.');
+    }
 
-    return response.json();// Return the vocabulary list from the user object
+    return response.json();
 };
 
 // --- Function to submit a review for a word ---
@@ -129,6 +153,7 @@ export const reviewWord = async (
 ): Promise<VocabularyItem> => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/vocabulary/${wordId}/review`, {
         method: 'POST',
+        credentials: 'include',
         headers: {
             'Content-Type': 'application/json',
             'Authorization': `Bearer ${token}`
@@ -144,6 +169,7 @@ export const reviewWord = async (
 
 export const fetchUserStats = async (token: string): Promise<UserStats> => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/users/me/stats`, {
+        credentials: 'include',
         headers: {
             Authorization: `Bearer ${token}`,
         },
@@ -159,6 +185,7 @@ export const fetchUserStats = async (token: string): Promise<UserStats> => {
 export const logReadingActivity = async (token: string, minutes: number): Promise<void> => {
     await fetch(`${process.env.NEXT_PUBLIC_API_URL}/users/me/activity`, {
         method: 'POST',
+        credentials: 'include',
         headers: {
             'Content-Type': 'application/json',
             Authorization: `Bearer ${token}`,
@@ -170,6 +197,7 @@ export const logReadingActivity = async (token: string, minutes: number): Promis
 // --- Recommendation Function ---
 export const getUserRecommendations = async (token: string): Promise<Book[]> => {
     const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL}/users/me/recommendations`, {
+        credentials: 'include',
         headers: {
             'Authorization': `Bearer ${token}`,
         },
@@ -191,6 +219,7 @@ export const logEvent = async (
     try {
         await fetch(`${process.env.NEXT_PUBLIC_API_URL}/events/log`, {
             method: 'POST',
+            credentials: 'include',
             headers: {
                 'Content-Type': 'application/json',
                 'Authorization': `Bearer ${token}`,
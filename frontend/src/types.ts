@@ -8,6 +8,19 @@ export interface VocabularyItem {
     created_at: string;
 }
 
+// One page of the user's vocabulary from GET /vocabulary/
+export interface VocabularyPage {
+    items: VocabularyItem[];
+    next_cursor: string | null;
+    total: number;
+}
+
+// One batch of the user's due words from GET /vocabulary/due-for-review
+export interface DueVocabularyPage {
+    items: VocabularyItem[];
+    next_cursor: string | null;
+}
+
 // The interface for the AI explanation data
 export interface AIExplanation {
     definition: string;
@@ -20,7 +33,6 @@ export interface AIExplanation {
 export interface User {
     username: string;
     user_id: string;
-    vocabulary?: VocabularyItem[];
 }
 
 // This represents a book from your library
@@ -49,6 +61,8 @@ export interface UserStats {
     reading_streak: number;
     total_words_learned: number;
     total_minutes_read: number;
+    longest_streak: number;
+    last_active_date: string | null;
 }
 
 // Token response from backend